@@ -5,6 +5,18 @@
 #              are available and how they're implemented.
 #              Don't modify the contents of this file.
 
+import os
+import pickle
+import struct
+import zlib
+from bisect import bisect_left
+from sys import byteorder
+
+try:
+    import numpy as np
+except ImportError:     # batch hashes fall back to pure Python
+    np = None
+
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
@@ -16,26 +28,32 @@ class DynamicArray:
     """
     Class implementing a Dynamic Array
     Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
+    append, extend, pop, swap, get_at_index, set_at_index, length,
+    get_unchecked, set_unchecked, filled, iterator, slicing
     """
 
     def __init__(self, arr=None) -> None:
         """Initialize new dynamic array using a list."""
         self._data = arr.copy() if arr else []
 
-    def __iter__(self):
+    @classmethod
+    def filled(cls, length: int, value: object = None) -> "DynamicArray":
         """
-        Disable iterator capability for DynamicArray class
-        This means loops and aggregate functions like
-        those shown below won't work:
-
-        da = DynamicArray()
-        for value in da:        # will not work
-        min(da)                 # will not work
-        max(da)                 # will not work
-        sort(da)                # will not work
+        Return a new dynamic array of length elements that all hold value,
+        allocated in one step. Every element refers to the same value
+        object.
         """
-        return None
+        array = cls()
+        array._data = [value] * length
+        return array
+
+    def __iter__(self):
+        """Return an iterator over the elements, first to last."""
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        """Return length of array, so len() works."""
+        return len(self._data)
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -45,6 +63,10 @@ class DynamicArray:
         """Add new element at the end of the array."""
         self._data.append(value)
 
+    def extend(self, values) -> None:
+        """Add every element of an iterable at the end of the array."""
+        self._data.extend(values)
+
     def pop(self):
         """Remove element from end of the array and return it."""
         return self._data.pop()
@@ -55,29 +77,103 @@ class DynamicArray:
 
     def get_at_index(self, index: int):
         """Return value of element at a given index."""
-        if index < 0 or index >= self.length():
+        if index < 0 or index >= len(self._data):
             raise DynamicArrayException
         return self._data[index]
 
-    def __getitem__(self, index: int):
-        """Return value of element at a given index using [] syntax."""
-        return self.get_at_index(index)
+    def __getitem__(self, index):
+        """
+        Return value of element at a given index using [] syntax, or a
+        DynamicArrayView of the elements a slice selects.
+        """
+        if isinstance(index, slice):
+            return DynamicArrayView(self, index)
+        if index < 0 or index >= len(self._data):
+            raise DynamicArrayException
+        return self._data[index]
+
+    def get_unchecked(self, index: int):
+        """
+        Return value of element at a given index without checking it is in
+        range, for internal callers that already know it is.
+        """
+        return self._data[index]
 
     def set_at_index(self, index: int, value: object) -> None:
         """Set value of element at a given index."""
-        if index < 0 or index >= self.length():
+        if index < 0 or index >= len(self._data):
             raise DynamicArrayException
         self._data[index] = value
 
     def __setitem__(self, index: int, value: object) -> None:
         """Set value of element at a given index using [] syntax."""
-        self.set_at_index(index, value)
+        if index < 0 or index >= len(self._data):
+            raise DynamicArrayException
+        self._data[index] = value
+
+    def set_unchecked(self, index: int, value: object) -> None:
+        """
+        Set value of element at a given index without checking it is in
+        range, for internal callers that already know it is.
+        """
+        self._data[index] = value
 
     def length(self) -> int:
         """Return length of array."""
         return len(self._data)
 
 
+class DynamicArrayView:
+    """
+    Window onto the elements of a DynamicArray that a slice selects. No
+    elements are copied: reads and writes go to the underlying array.
+    Supported methods are: get_at_index, set_at_index, length, iterator
+    """
+
+    def __init__(self, array: DynamicArray, selection: slice) -> None:
+        """Initialize a view of the elements of array selection picks."""
+        self._data = array._data
+        # Slicing a range resolves negative bounds and steps once, up front
+        self._indices = range(len(self._data))[selection]
+
+    def __iter__(self):
+        """Return an iterator over the viewed elements."""
+        data = self._data
+        return (data[index] for index in self._indices)
+
+    def __len__(self) -> int:
+        """Return the number of viewed elements."""
+        return len(self._indices)
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return str(list(self))
+
+    def get_at_index(self, index: int):
+        """Return value of the viewed element at a given index."""
+        if index < 0 or index >= len(self._indices):
+            raise DynamicArrayException
+        return self._data[self._indices[index]]
+
+    def __getitem__(self, index: int):
+        """Return value of the viewed element at a given index using []."""
+        return self.get_at_index(index)
+
+    def set_at_index(self, index: int, value: object) -> None:
+        """Set value of the viewed element at a given index."""
+        if index < 0 or index >= len(self._indices):
+            raise DynamicArrayException
+        self._data[self._indices[index]] = value
+
+    def __setitem__(self, index: int, value: object) -> None:
+        """Set value of the viewed element at a given index using []."""
+        self.set_at_index(index, value)
+
+    def length(self) -> int:
+        """Return the number of viewed elements."""
+        return len(self._indices)
+
+
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
     hash = 0
@@ -96,6 +192,566 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+# ----------------- Batch and seeded hash functions ----------------- #
+
+MASK_64 = (1 << 64) - 1
+FNV_OFFSET_64 = 0xcbf29ce484222325
+FNV_PRIME_64 = 0x100000001b3
+XX_PRIME_1 = 0x9E3779B185EBCA87
+XX_PRIME_2 = 0xC2B2AE3D27D4EB4F
+XX_PRIME_3 = 0x165667B19E3779F9
+
+
+def hash_keys(function: callable, keys) -> list:
+    """
+    Return the hashes of every key in keys as a list.
+    Uses the batch variant attached to function (function.batch) if it has
+    one, otherwise calls function once per key.
+    """
+    batch = getattr(function, 'batch', None)
+    if batch is not None:
+        return batch(keys)
+    return [function(key) for key in keys]
+
+
+def _code_points(keys: list):
+    """
+    Return (codes, starts, ends) numpy arrays for a list of string keys:
+    every character's code point, and each key's slice of codes.
+    """
+    codes = np.frombuffer(''.join(keys).encode('utf-32-le'),
+                          dtype='<u4').astype(np.int64)
+    ends = np.cumsum(np.fromiter(map(len, keys), dtype=np.int64,
+                                 count=len(keys)))
+    starts = ends - np.fromiter(map(len, keys), dtype=np.int64,
+                                count=len(keys))
+    return codes, starts, ends
+
+
+def _segment_sums(values, starts, ends) -> list:
+    """Return the sum of values[start:end] for every start/end pair."""
+    totals = np.concatenate((np.zeros(1, dtype=values.dtype),
+                             np.cumsum(values)))
+    return (totals[ends] - totals[starts]).tolist()
+
+
+def hash_function_1_batch(keys) -> list:
+    """Batch variant of hash_function_1; returns a list of hashes."""
+    keys = list(keys)
+    if np is None or not keys:
+        return [sum(map(ord, key)) for key in keys]
+    codes, starts, ends = _code_points(keys)
+    return _segment_sums(codes, starts, ends)
+
+
+def hash_function_2_batch(keys) -> list:
+    """Batch variant of hash_function_2; returns a list of hashes."""
+    keys = list(keys)
+    if np is None or not keys:
+        return [sum(position * code for position, code
+                    in enumerate(map(ord, key), 1)) for key in keys]
+    codes, starts, ends = _code_points(keys)
+    # Position of each character within its own key, starting at 1
+    positions = np.arange(1, codes.shape[0] + 1, dtype=np.int64) - \
+        np.repeat(starts, ends - starts)
+    return _segment_sums(codes * positions, starts, ends)
+
+
+hash_function_1.batch = hash_function_1_batch
+hash_function_2.batch = hash_function_2_batch
+
+
+def _byte_matrix(keys: list, width_multiple: int = 1):
+    """
+    Return (lengths, matrix) for a list of string keys, where
+    matrix holds each key's UTF-8 bytes in a zero padded row whose width
+    is a multiple of width_multiple.
+    """
+    encoded = [key.encode() for key in keys]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64,
+                          count=len(encoded))
+    width = int(lengths.max()) if len(encoded) else 0
+    width += -width % width_multiple
+    matrix = np.zeros((len(encoded), width), dtype=np.uint8)
+    # Boolean assignment fills row by row, matching the joined byte order
+    matrix[np.arange(width) < lengths[:, None]] = \
+        np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return lengths, matrix
+
+
+def fnv1a_hash(key: str, seed: int = 0) -> int:
+    """
+    64-bit FNV-1a hash of the key's UTF-8 bytes.
+    The seed is mixed into the offset basis to give independent hashes.
+    """
+    hash = (FNV_OFFSET_64 ^ seed) & MASK_64
+    for byte in key.encode():
+        hash = ((hash ^ byte) * FNV_PRIME_64) & MASK_64
+    return hash
+
+
+def fnv1a_hash_batch(keys, seed: int = 0) -> list:
+    """Batch variant of fnv1a_hash; returns a list of hashes."""
+    keys = list(keys)
+    if np is None or not keys:
+        return [fnv1a_hash(key, seed) for key in keys]
+    lengths, matrix = _byte_matrix(keys)
+    hashes = np.full(len(keys), (FNV_OFFSET_64 ^ seed) & MASK_64,
+                     dtype=np.uint64)
+    prime = np.uint64(FNV_PRIME_64)
+    # Vectorized across keys, one byte column at a time; uint64 arithmetic
+    # wraps modulo 2**64 like the masked pure Python version
+    with np.errstate(over='ignore'):
+        for column in range(matrix.shape[1]):
+            mixed = (hashes ^ matrix[:, column]) * prime
+            hashes = np.where(column < lengths, mixed, hashes)
+    return hashes.tolist()
+
+
+def _words(data: bytes):
+    """Return data zero padded to a multiple of 8 bytes as 64-bit words."""
+    data += bytes(-len(data) % 8)
+    words = memoryview(data).cast('Q')
+    if byteorder == 'little':
+        return words
+    return [int.from_bytes(data[i:i + 8], 'little')
+            for i in range(0, len(data), 8)]
+
+
+def _avalanche(hash: int) -> int:
+    """xxHash64 style finalizer that spreads every input bit across the hash."""
+    hash ^= hash >> 33
+    hash = (hash * XX_PRIME_2) & MASK_64
+    hash ^= hash >> 29
+    hash = (hash * XX_PRIME_3) & MASK_64
+    hash ^= hash >> 32
+    return hash
+
+
+def word_hash(key: str, seed: int = 0) -> int:
+    """
+    xxHash style 64-bit hash of the key's UTF-8 bytes.
+    Consumes eight bytes per step instead of one character and finishes with
+    an avalanche, so it is better distributed than hash_function_1 and
+    hash_function_2 and faster than them on longer keys.
+    """
+    data = key.encode()
+    hash = (seed + len(data) * XX_PRIME_3) & MASK_64
+    for word in _words(data):
+        hash = ((hash ^ word) * XX_PRIME_1) & MASK_64
+        hash ^= hash >> 29
+    return _avalanche(hash)
+
+
+def word_hash_batch(keys, seed: int = 0) -> list:
+    """Batch variant of word_hash; returns a list of hashes."""
+    keys = list(keys)
+    if np is None or not keys:
+        return [word_hash(key, seed) for key in keys]
+    lengths, matrix = _byte_matrix(keys, 8)
+    words = matrix.view('<u8')
+    wordCounts = (lengths + 7) // 8
+    hashes = ((lengths.astype(np.uint64) * np.uint64(XX_PRIME_3)) +
+              np.uint64(seed & MASK_64))
+    prime, shift = np.uint64(XX_PRIME_1), np.uint64(29)
+    with np.errstate(over='ignore'):
+        for column in range(words.shape[1]):
+            mixed = (hashes ^ words[:, column]) * prime
+            mixed ^= mixed >> shift
+            hashes = np.where(column < wordCounts, mixed, hashes)
+    return [_avalanche(hash) for hash in hashes.tolist()]
+
+
+fnv1a_hash.batch = fnv1a_hash_batch
+word_hash.batch = word_hash_batch
+
+
+# ------------------ Integer and bytes key hashes ------------------ #
+
+# Keys that can change after they are put; maps store a bytes copy instead
+BUFFER_KEY_TYPES = (bytearray, memoryview)
+
+
+def int_hash(key: int, seed: int = 0) -> int:
+    """
+    64-bit hash of an integer key: the key's low 64 bits (two's complement
+    for negative keys) run through the avalanche finalizer, with no string
+    conversion. Keys outside the 64-bit range are hashed from their bytes.
+    """
+    if -0x8000000000000000 <= key <= MASK_64:
+        return _avalanche((key + seed) & MASK_64)
+    length = (key.bit_length() + 8) // 8
+    return bytes_hash(key.to_bytes(length, 'little', signed=True), seed)
+
+
+def int_hash_batch(keys, seed: int = 0) -> list:
+    """Batch variant of int_hash; returns a list of hashes."""
+    keys = list(keys)
+    if np is None or not keys:
+        return [int_hash(key, seed) for key in keys]
+    try:
+        hashes = np.array(keys, dtype=np.int64).view(np.uint64)
+    except OverflowError:
+        # Some key doesn't fit in a signed 64-bit integer
+        return [int_hash(key, seed) for key in keys]
+    prime2, prime3 = np.uint64(XX_PRIME_2), np.uint64(XX_PRIME_3)
+    with np.errstate(over='ignore'):
+        hashes = hashes + np.uint64(seed & MASK_64)
+        hashes ^= hashes >> np.uint64(33)
+        hashes *= prime2
+        hashes ^= hashes >> np.uint64(29)
+        hashes *= prime3
+        hashes ^= hashes >> np.uint64(32)
+    return hashes.tolist()
+
+
+def bytes_hash(key, seed: int = 0) -> int:
+    """
+    word_hash of a bytes, bytearray or memoryview key, read in place eight
+    bytes at a time without copying the key; bytes_hash(text.encode())
+    equals word_hash(text).
+    """
+    view = memoryview(key)
+    if view.format != 'B':
+        view = view.cast('B')
+    length = view.nbytes
+    whole = length - length % 8
+    hash = (seed + length * XX_PRIME_3) & MASK_64
+    if byteorder == 'little':
+        words = view[:whole].cast('Q')
+    else:
+        words = [int.from_bytes(view[i:i + 8], 'little')
+                 for i in range(0, whole, 8)]
+    for word in words:
+        hash = ((hash ^ word) * XX_PRIME_1) & MASK_64
+        hash ^= hash >> 29
+    if whole < length:
+        # The last few bytes form one zero padded word
+        hash = ((hash ^ int.from_bytes(view[whole:], 'little')) *
+                XX_PRIME_1) & MASK_64
+        hash ^= hash >> 29
+    return _avalanche(hash)
+
+
+def bytes_hash_batch(keys, seed: int = 0) -> list:
+    """Batch variant of bytes_hash; returns a list of hashes."""
+    return [bytes_hash(key, seed) for key in keys]
+
+
+int_hash.batch = int_hash_batch
+bytes_hash.batch = bytes_hash_batch
+
+
+def make_seeded_hash(seed: int, function: callable = word_hash) -> callable:
+    """
+    Return a single argument hash function (with a .batch variant) that
+    applies the given seeded hash function with a fixed seed, for use as a
+    HashMap's function parameter.
+    """
+    def seeded(key: str) -> int:
+        return function(key, seed)
+
+    def seeded_batch(keys) -> list:
+        return function.batch(keys, seed)
+
+    seeded.batch = seeded_batch
+    return seeded
+
+
+# --------------------- Capacity policies --------------------- #
+
+class PrimeCapacity:
+    """
+    Prime table capacities found by trial division, indexed with hash %
+    capacity. This is what the HashMaps use when no policy is given.
+    """
+
+    # Offsets between probes grow by 2 each step: j**2 quadratic probing
+    probe_increment = 2
+
+    @staticmethod
+    def is_prime(capacity: int) -> bool:
+        """Determine if given integer is a prime number and return boolean."""
+        if capacity == 2 or capacity == 3:
+            return True
+        if capacity < 2 or capacity % 2 == 0:
+            return False
+        factor = 3
+        while factor * factor <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+        return True
+
+    def next_capacity(self, capacity: int) -> int:
+        """Return the smallest valid capacity that is at least capacity."""
+        if capacity <= 2:
+            return 2
+        if capacity % 2 == 0:
+            capacity += 1
+        while not self.is_prime(capacity):
+            capacity += 2
+        return capacity
+
+    def hash_function(self, function: callable) -> callable:
+        """Return the hash function a HashMap should use with this policy."""
+        return function
+
+
+class PrimeLadderCapacity(PrimeCapacity):
+    """
+    Prime table capacities read from a precomputed ladder, so growing a
+    table never runs trial division until it outgrows the ladder.
+    """
+
+    # Each rung is the smallest prime above twice the previous one, which is
+    # the sequence repeatedly doubling a table with _next_prime produces
+    LADDER = [3, 7, 17, 37, 79, 163, 331, 673, 1361, 2729, 5471, 10949,
+              21911, 43853, 87719, 175447, 350899, 701819, 1403641, 2807303,
+              5614657, 11229331, 22458671, 44917381, 89834777, 179669557,
+              359339171, 718678369, 1437356741, 2874713497, 5749427029,
+              11498854069, 22997708177, 45995416409, 91990832831,
+              183981665689, 367963331389, 735926662813, 1471853325643]
+
+    def next_capacity(self, capacity: int) -> int:
+        """Return the smallest ladder prime that is at least capacity."""
+        rung = bisect_left(self.LADDER, capacity)
+        if rung < len(self.LADDER):
+            return self.LADDER[rung]
+        return super().next_capacity(capacity)
+
+
+class PowerOfTwoCapacity:
+    """
+    Power of two table capacities. Hashes are run through a 64-bit finalizer
+    first, so hash % capacity (equivalently hash & (capacity - 1)) depends on
+    every bit of the original hash and weak hashes like hash_function_1
+    still spread across the table.
+    """
+
+    # Offsets between probes grow by 1 each step: triangular probing, which
+    # visits every slot of a power of two table
+    probe_increment = 1
+
+    def next_capacity(self, capacity: int) -> int:
+        """Return the smallest power of two that is at least capacity."""
+        return 1 << max(capacity - 1, 1).bit_length()
+
+    def hash_function(self, function: callable) -> callable:
+        """Return function with the finalizer applied to its hashes."""
+        def mixed(key: str) -> int:
+            return _avalanche(function(key) & MASK_64)
+
+        batch = getattr(function, 'batch', None)
+        if batch is not None:
+            mixed.batch = lambda keys: [_avalanche(hash & MASK_64)
+                                        for hash in batch(keys)]
+        return mixed
+
+
+# ----------------------- Snapshots ----------------------- #
+
+SNAPSHOT_MAGIC = b'PYHMSNP1'
+SNAPSHOT_HEADER = struct.Struct('<BQq')     # flags, entry count, check hash
+SNAPSHOT_LENGTH = struct.Struct('<I')       # length prefix of each chunk
+SNAPSHOT_CHUNK = 4096                       # entries per chunk
+SNAPSHOT_COMPRESSED = 1
+SNAPSHOT_TTLS = 2                           # chunks carry remaining TTLs
+# Hashed to recognise a snapshot's hash function; the first one the
+# function accepts is used, so int and bytes key hashes work too
+SNAPSHOT_CHECK_KEYS = ('hash_map_snapshot', b'hash_map_snapshot',
+                       0x68617368_6d6170)
+
+
+def _snapshot_check(function: callable) -> int:
+    """Return the hash a snapshot uses to recognise its hash function."""
+    for key in SNAPSHOT_CHECK_KEYS:
+        try:
+            return function(key) & ((1 << 63) - 1)
+        except (TypeError, AttributeError):
+            continue
+    return 0
+
+
+def write_snapshot(path: str, entries, count: int, function: callable,
+                   compress: bool = False) -> None:
+    """
+    Write count (key, value, hash, ttl) entries to a snapshot file at path,
+    where ttl is the seconds the entry has left to live, or None if it
+    never expires. Entries are written as length-prefixed pickled chunks of
+    SNAPSHOT_CHUNK keys, values, hashes and TTLs, each optionally zlib
+    compressed, and the file is written under a temporary name and renamed
+    into place when done. TTLs are stored rather than expiry times because
+    the maps' clocks are only meaningful within one process.
+    """
+    tempPath = path + '.tmp'
+    flags = SNAPSHOT_TTLS | (SNAPSHOT_COMPRESSED if compress else 0)
+    with open(tempPath, 'wb') as file:
+        file.write(SNAPSHOT_MAGIC)
+        file.write(SNAPSHOT_HEADER.pack(flags, count,
+                                        _snapshot_check(function)))
+
+        def write_chunk(keys, values, hashes, ttls):
+            payload = pickle.dumps((keys, values, hashes, ttls),
+                                   pickle.HIGHEST_PROTOCOL)
+            if compress:
+                payload = zlib.compress(payload)
+            file.write(SNAPSHOT_LENGTH.pack(len(payload)))
+            file.write(payload)
+
+        keys, values, hashes, ttls = [], [], [], []
+        for key, value, hash, ttl in entries:
+            keys.append(key)
+            values.append(value)
+            hashes.append(hash)
+            ttls.append(ttl)
+            if len(keys) == SNAPSHOT_CHUNK:
+                write_chunk(keys, values, hashes, ttls)
+                keys, values, hashes, ttls = [], [], [], []
+        if keys:
+            write_chunk(keys, values, hashes, ttls)
+        # A zero length marks the end of the chunks
+        file.write(SNAPSHOT_LENGTH.pack(0))
+    os.replace(tempPath, path)
+
+
+class SnapshotReader:
+    """
+    Streams the chunks of a snapshot file written by write_snapshot.
+    Snapshots hold pickled data, so only load files from trusted sources.
+    """
+
+    def __init__(self, path: str, function: callable) -> None:
+        """
+        Open the snapshot and read its header. count is the number of
+        entries, and the stored hashes are only handed back if the snapshot
+        was written with the same hash function.
+        """
+        self._file = open(path, 'rb')
+        if self._file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            self._file.close()
+            raise ValueError(path + ' is not a HashMap snapshot')
+        flags, self.count, check = SNAPSHOT_HEADER.unpack(
+            self._file.read(SNAPSHOT_HEADER.size))
+        self._compressed = bool(flags & SNAPSHOT_COMPRESSED)
+        self._has_ttls = bool(flags & SNAPSHOT_TTLS)
+        self._same_function = check == _snapshot_check(function)
+
+    def __enter__(self) -> "SnapshotReader":
+        """Return the reader for use in a with block."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the file at the end of a with block."""
+        self._file.close()
+
+    def __iter__(self):
+        """
+        Yield (keys, values, hashes, ttls) lists one chunk at a time; hashes
+        is None if they have to be recomputed, and ttls is None if the
+        snapshot predates stored TTLs.
+        """
+        while True:
+            length, = SNAPSHOT_LENGTH.unpack(
+                self._file.read(SNAPSHOT_LENGTH.size))
+            if length == 0:
+                return
+            payload = self._file.read(length)
+            if self._compressed:
+                payload = zlib.decompress(payload)
+            if self._has_ttls:
+                keys, values, hashes, ttls = pickle.loads(payload)
+            else:
+                (keys, values, hashes), ttls = pickle.loads(payload), None
+            yield (keys, values, hashes if self._same_function else None,
+                   ttls)
+
+
+# ------------------------- Expiry ------------------------- #
+
+# Buckets or slots a HashMap holding entries with a TTL sweeps on every put
+TTL_SWEEP_STEP = 4
+
+
+# ----------------------- Statistics ----------------------- #
+
+class OperationStats:
+    """
+    Counters a HashMap keeps while its stats are enabled: the probes (chain
+    nodes or slots examined) every get and put takes, and the number of
+    resizes and the time spent in them.
+    """
+
+    def __init__(self, hook: callable = None) -> None:
+        """
+        Initialize zeroed counters. hook, if given, is called as
+        hook(event, value) after every get or put with event 'get' or 'put'
+        and the probes it took, and after every resize with event 'resize'
+        and the seconds it took, so the numbers can be exported as they
+        happen.
+        """
+        self.hook = hook
+        # Probes of the latest lookup, set by the map as it walks the table
+        self.probes = 0
+        self.counts = {'get': 0, 'put': 0}
+        self.total_probes = {'get': 0, 'put': 0}
+        self.max_probes = {'get': 0, 'put': 0}
+        self.resizes = 0
+        self.resize_seconds = 0.0
+
+    def record(self, kind: str) -> None:
+        """Count a 'get' or 'put' that took the latest lookup's probes."""
+        probes = self.probes
+        self.counts[kind] += 1
+        self.total_probes[kind] += probes
+        if probes > self.max_probes[kind]:
+            self.max_probes[kind] = probes
+        if self.hook is not None:
+            self.hook(kind, probes)
+
+    def record_resize(self, seconds: float) -> None:
+        """Count a resize that took seconds."""
+        self.resizes += 1
+        self.resize_seconds += seconds
+        if self.hook is not None:
+            self.hook('resize', seconds)
+
+    def as_dict(self) -> dict:
+        """Return the counters as a dict of plain numbers."""
+        report = {'resizes': self.resizes,
+                  'resize_seconds': self.resize_seconds}
+        for kind in ('get', 'put'):
+            count = self.counts[kind]
+            report[kind + 's'] = count
+            report['mean_' + kind + '_probes'] = \
+                self.total_probes[kind] / count if count else 0.0
+            report['max_' + kind + '_probes'] = self.max_probes[kind]
+        return report
+
+
+def hash_distribution(hashes: list, capacity: int) -> dict:
+    """
+    Return how well a table's full hashes spread over capacity buckets:
+    distinct_hashes is the number of distinct hashes per key (1.0 unless
+    keys collide outright, as anagrams do under hash_function_1), and
+    hash_quality is the expected cost of a successful chained lookup with
+    these hashes relative to uniformly random ones (1.0 is ideal, higher
+    means clustering).
+    """
+    count = len(hashes)
+    if count == 0:
+        return {'distinct_hashes': 1.0, 'hash_quality': 1.0}
+    buckets = {}
+    for hash in hashes:
+        buckets[hash % capacity] = buckets.get(hash % capacity, 0) + 1
+    # sum of b * (b + 1) / 2 over the buckets, against its expected value
+    # for count keys hashed uniformly into capacity buckets
+    cost = sum(size * (size + 1) / 2 for size in buckets.values())
+    expected = count / (2 * capacity) * (count + 2 * capacity - 1)
+    return {'distinct_hashes': len(set(hashes)) / count,
+            'hash_quality': cost / expected}
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,11 +759,19 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    # Clock time the node expires at; nodes without a TTL share this default
+    expires = None
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None,
+                 hash: int = None) -> None:
+        """
+        Initialize node given a key and value.
+        The key's full hash can be cached so a map never has to recompute it.
+        """
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -141,7 +805,8 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, insert_node, remove, contains, length,
+    iterator
     """
 
     def __init__(self) -> None:
@@ -168,35 +833,49 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> None:
+        """Insert new node at front of the list, caching the key's hash."""
+        self._head = SLNode(key, value, self._head, hash)
+        self._size += 1
+
+    def insert_node(self, node: SLNode) -> None:
+        """Insert an existing node at front of the list, keeping its fields."""
+        node.next = self._head
+        self._head = node
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash: int = None) -> SLNode:
         """
         Remove first node with matching key.
-        Return True if removal was successful, False otherwise.
+        If hash is given, nodes with a different cached hash are skipped
+        without comparing keys.
+        Return the removed node if removal was successful, None otherwise.
         """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
                     self._head = node.next
                 self._size -= 1
-                return True
+                return node
 
             previous, node = node, node.next
-        return False
+        return None
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If hash is given, a node must also have it as its cached hash.
+        Keys are compared first: in a bucket every node's hash is often the
+        same (e.g. with hash_function_2), so checking hashes first would
+        only add a comparison per node.
+        """
         node = self._head
         while node:
-            if node.key == key:
+            if node.key == key and (hash is None or node.hash == hash):
                 return node
             node = node.next
         return node
@@ -210,10 +889,17 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    # Clock time the entry expires at; entries without a TTL share this default
+    expires = None
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """
+        Initialize an entry for use in a hash map.
+        The key's full hash can be cached so a map never has to recompute it.
+        """
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
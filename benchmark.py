@@ -0,0 +1,337 @@
+# Description: Benchmark harness comparing the Separate Chaining and Open
+#              Addressing HashMaps, both hash functions and the builtin dict
+#              across workloads and sizes, writing JSON results that can be
+#              compared against a baseline to catch regressions.
+#
+# Usage: python benchmark.py --sizes 1000,10000 --output results.json
+#        python benchmark.py --compare baseline.json --threshold 0.15
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+
+import hash_map_oa
+import hash_map_sc
+import hash_map_sc_compact
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+
+WORKLOADS = ('insert', 'read', 'churn', 'zipf', 'resize', 'find_mode')
+MAPS = ('sc', 'sc_compact', 'oa', 'dict')
+HASH_FUNCTIONS = {'hash_function_1': hash_function_1,
+                  'hash_function_2': hash_function_2}
+KEY_LENGTH = 12
+ZIPF_EXPONENT = 1.1
+
+
+# ----------------------- Workload generation ----------------------- #
+
+def make_keys(count: int, rng: random.Random) -> list:
+    """
+    Returns count distinct random lowercase keys of KEY_LENGTH characters.
+    """
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    keys = set()
+    while len(keys) < count:
+        keys.add(''.join(rng.choice(letters) for _ in range(KEY_LENGTH)))
+    keys = sorted(keys)
+    rng.shuffle(keys)
+    return keys
+
+
+def zipf_sample(keys: list, count: int, rng: random.Random) -> list:
+    """
+    Returns count keys drawn from keys with Zipfian popularity, so the
+    first keys are by far the most common.
+    """
+    weights = accumulate(1 / rank ** ZIPF_EXPONENT
+                         for rank in range(1, len(keys) + 1))
+    cumulative = list(weights)
+    total = cumulative[-1]
+    return [keys[min(bisect_left(cumulative, rng.random() * total),
+                     len(keys) - 1)]
+            for _ in range(count)]
+
+
+def make_operations(workload: str, size: int, rng: random.Random) -> tuple:
+    """
+    Returns (setup, operations) for a workload: setup is the list of keys
+    put before timing starts, and operations a list of (op, key) pairs,
+    where op is 'put', 'get' or 'remove'.
+    """
+    keys = make_keys(size * 2, rng)
+    present, absent = keys[:size], keys[size:]
+
+    if workload in ('insert', 'resize'):
+        return [], [('put', key) for key in present]
+
+    if workload == 'read':
+        # Mostly hits, with one in ten lookups for a missing key
+        return present, [('get', absent[index] if index % 10 == 0
+                          else rng.choice(present))
+                         for index in range(size)]
+
+    if workload == 'churn':
+        # Every step removes a live key and inserts a new one
+        operations = []
+        live = list(present)
+        for index in range(size):
+            position = rng.randrange(len(live))
+            operations.append(('remove', live[position]))
+            operations.append(('put', absent[index]))
+            live[position] = absent[index]
+        return present, operations
+
+    if workload == 'zipf':
+        # 70% reads, 20% writes and 10% removes of Zipf distributed keys
+        operations = []
+        for key in zipf_sample(keys, size, rng):
+            draw = rng.random()
+            op = 'get' if draw < 0.7 else 'put' if draw < 0.9 else 'remove'
+            operations.append((op, key))
+        return present[:size // 2], operations
+
+    if workload == 'find_mode':
+        return [], [('count', key) for key in zipf_sample(present, size, rng)]
+
+    raise ValueError('unknown workload ' + workload)
+
+
+# ------------------------- Map adapters ------------------------- #
+
+def make_map(kind: str, function: callable, capacity: int):
+    """
+    Returns a new map of the given kind ('sc', 'sc_compact', 'oa' or
+    'dict').
+    """
+    if kind == 'sc':
+        return hash_map_sc.HashMap(capacity, function)
+    if kind == 'sc_compact':
+        return hash_map_sc_compact.HashMap(capacity, function)
+    if kind == 'oa':
+        return hash_map_oa.HashMap(capacity, function)
+    return {}
+
+
+def bind_operations(map) -> dict:
+    """
+    Returns the put, get and remove callables for a map.
+    """
+    if isinstance(map, dict):
+        return {'put': lambda key: map.__setitem__(key, 1),
+                'get': map.get,
+                'remove': lambda key: map.pop(key, None)}
+    return {'put': lambda key: map.put(key, 1),
+            'get': map.get,
+            'remove': map.remove}
+
+
+def count_modes(kind: str, function: callable, keys: list) -> tuple:
+    """
+    Returns (modes, count) for keys, using find_mode itself for the SC maps
+    and the equivalent counting loop for the other maps.
+    """
+    if kind in ('sc', 'sc_compact') and function is hash_function_1:
+        da = DynamicArray()
+        for key in keys:
+            da.append(key)
+        module = hash_map_sc if kind == 'sc' else hash_map_sc_compact
+        return module.find_mode(da)
+
+    map = make_map(kind, function, len(keys))
+    if isinstance(map, dict):
+        for key in keys:
+            map[key] = map.get(key, 0) + 1
+    elif kind == 'sc_compact':
+        for key in keys:
+            map.put(key, (map.get(key) or 0) + 1)
+    else:
+        for key in keys:
+            map.update_with(key, lambda count: count + 1, 0)
+    maxCount = max((count for _, count in map.items()), default=1)
+    return [key for key, count in map.items() if count == maxCount], maxCount
+
+
+# --------------------------- Measurement --------------------------- #
+
+def percentiles(samples: array) -> dict:
+    """
+    Returns the p50, p90, p99 and max of a list of latencies.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    pick = lambda fraction: ordered[min(int(fraction * len(ordered)),
+                                        len(ordered) - 1)]
+    return {'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99),
+            'max': ordered[-1]}
+
+
+def run_once(workload: str, kind: str, function: callable, setup: list,
+             operations: list, size: int) -> tuple:
+    """
+    Runs a workload once and returns (seconds, latencies in ns). find_mode
+    is timed as a whole, so it has no per operation latencies.
+    """
+    if workload == 'find_mode':
+        keys = [key for _, key in operations]
+        start = time.perf_counter()
+        count_modes(kind, function, keys)
+        return time.perf_counter() - start, array('q')
+
+    # The resize workload starts tiny so the table grows all the way up
+    capacity = 1 if workload == 'resize' else max(size, 11)
+    map = make_map(kind, function, capacity)
+    bound = bind_operations(map)
+    for key in setup:
+        bound['put'](key)
+
+    clock = time.perf_counter_ns
+    latencies = array('q', [0]) * len(operations)
+    start = time.perf_counter()
+    for index in range(len(operations)):
+        op, key = operations[index]
+        call = bound[op]
+        before = clock()
+        call(key)
+        latencies[index] = clock() - before
+    return time.perf_counter() - start, latencies
+
+
+def peak_memory(workload: str, kind: str, function: callable, setup: list,
+                operations: list, size: int) -> int:
+    """
+    Returns the peak bytes allocated while running a workload once.
+    """
+    tracemalloc.start()
+    try:
+        run_once(workload, kind, function, setup, operations, size)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(workloads, maps, functions, sizes, repeat: int, seed: int,
+              memory: bool, log=sys.stderr) -> list:
+    """
+    Runs every combination and returns a list of result dicts.
+    """
+    results = []
+    for size in sizes:
+        for workload in workloads:
+            # Every map sees exactly the same operations
+            setup, operations = make_operations(workload, size,
+                                                random.Random(seed))
+            for kind in maps:
+                # dict always uses Python's own hash
+                names = ['builtin'] if kind == 'dict' else functions
+                for name in names:
+                    function = HASH_FUNCTIONS.get(name)
+                    runs = [run_once(workload, kind, function, setup,
+                                     operations, size)
+                            for _ in range(repeat)]
+                    seconds, latencies = min(runs, key=lambda run: run[0])
+                    result = {
+                        'workload': workload, 'map': kind, 'hash': name,
+                        'size': size, 'ops': len(operations),
+                        'seconds': seconds,
+                        'ops_per_sec': len(operations) / seconds
+                        if seconds else None,
+                        'latency_ns': percentiles(latencies),
+                        'peak_bytes': peak_memory(workload, kind, function,
+                                                  setup, operations, size)
+                        if memory else None,
+                    }
+                    results.append(result)
+                    print('%-9s %-4s %-15s %9d %12.0f ops/s' %
+                          (workload, kind, name, size,
+                           result['ops_per_sec'] or 0), file=log)
+    return results
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """
+    Returns a message for every result whose throughput fell more than
+    threshold (a fraction) below the matching baseline result.
+    """
+    key = lambda result: (result['workload'], result['map'], result['hash'],
+                          result['size'])
+    previous = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if not old or not old['ops_per_sec'] or not result['ops_per_sec']:
+            continue
+        change = result['ops_per_sec'] / old['ops_per_sec'] - 1
+        if change < -threshold:
+            regressions.append('%s %s %s %d: %.1f%% slower' %
+                               (key(result) + (-change * 100,)))
+    return regressions
+
+
+def _list(text: str) -> list:
+    """Split a comma separated command line value."""
+    return [item for item in text.split(',') if item]
+
+
+def main(argv=None) -> int:
+    """
+    Runs the benchmarks from the command line and returns the exit status,
+    1 if a comparison against a baseline found a regression.
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark the SC and OA HashMaps against dict.')
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma separated sizes, e.g. 1e3,1e5,1e7')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS))
+    parser.add_argument('--maps', default=','.join(MAPS))
+    parser.add_argument('--hashes', default=','.join(HASH_FUNCTIONS))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per case; the fastest is reported')
+    parser.add_argument('--seed', type=int, default=261)
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the tracemalloc peak memory runs')
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--compare', help='baseline JSON to check against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed throughput drop before failing')
+    args = parser.parse_args(argv)
+
+    sizes = [int(float(size)) for size in _list(args.sizes)]
+    results = benchmark(_list(args.workloads), _list(args.maps),
+                        _list(args.hashes), sizes, args.repeat, args.seed,
+                        not args.no_memory)
+    report = {
+        'meta': {'python': platform.python_version(),
+                 'implementation': platform.python_implementation(),
+                 'machine': platform.machine(),
+                 'seed': args.seed, 'repeat': args.repeat,
+                 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file)['results'],
+                                  args.threshold)
+        for message in regressions:
+            print('REGRESSION ' + message, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
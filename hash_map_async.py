@@ -0,0 +1,349 @@
+# Description: asyncio facade over the SC and OA HashMaps. Long operations
+#              (resizing, clearing, bulk loads, scans and snapshots) work
+#              through the table a chunk at a time and yield to the event
+#              loop in between, so no call blocks the loop for longer than
+#              one chunk however big the map gets.
+
+import asyncio
+from itertools import islice
+
+from a6_include import (DynamicArray, SnapshotReader, hash_function_1,
+                        hash_keys, write_snapshot)
+import hash_map_oa
+import hash_map_sc
+
+
+# Buckets, slots or entries handled between yields to the event loop
+ASYNC_CHUNK = 256
+
+
+def _sc_entries(buckets: DynamicArray, start: int, end: int,
+                now: float) -> list:
+    """
+    Returns the (key, value, hash, ttl) tuples in SC buckets start to end,
+    leaving out nodes expired at clock time now. ttl is the time a node
+    has left, or None if it never expires.
+    """
+    out = []
+    for index in range(start, end):
+        for node in buckets.get_unchecked(index):
+            if node.expires is None:
+                out.append((node.key, node.value, node.hash, None))
+            elif node.expires > now:
+                out.append((node.key, node.value, node.hash,
+                            node.expires - now))
+    return out
+
+
+def _oa_entries(buckets: DynamicArray, start: int, end: int,
+                now: float) -> list:
+    """
+    Returns the (key, value, hash, ttl) tuples in OA slots start to end,
+    leaving out entries expired at clock time now. ttl is the time an entry
+    has left, or None if it never expires.
+    """
+    out = []
+    for index in range(start, end):
+        entry = buckets.get_unchecked(index)
+        if not entry or entry.is_tombstone:
+            continue
+        if entry.expires is None:
+            out.append((entry.key, entry.value, entry.hash, None))
+        elif entry.expires > now:
+            out.append((entry.key, entry.value, entry.hash,
+                        entry.expires - now))
+    return out
+
+
+class AsyncHashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 map_type: str = 'sc',
+                 chunk_size: int = ASYNC_CHUNK,
+                 rehash_step: int = 4,
+                 capacity_policy=None) -> None:
+        """
+        Initialize new AsyncHashMap holding an SC or OA HashMap (map_type
+        'sc' or 'oa'). The map always grows incrementally, moving
+        rehash_step (at least 1) old buckets or slots on every operation,
+        so a put never pays for a whole rehash. Long operations handle
+        chunk_size buckets, slots or entries between yields to the loop;
+        inserts during a rehash also move at least rehash_step old buckets
+        each (the OA map moves more when it must, to finish a rehash before
+        the next one), so the longest stall is about chunk_size times the
+        buckets moved per insert.
+        Reads and writes can run while long operations are in progress:
+        during a resize lookups check both the old and the new table.
+        """
+        rehash_step = max(rehash_step, 1)
+        if map_type == 'oa':
+            self._map = hash_map_oa.HashMap(capacity, function, rehash_step,
+                                            capacity_policy)
+            self._entries = _oa_entries
+        else:
+            self._map = hash_map_sc.HashMap(capacity, function, rehash_step,
+                                            capacity_policy)
+            self._entries = _sc_entries
+        self._map_type = map_type
+        self._chunk_size = max(chunk_size, 1)
+        # Only one resize runs at a time, or a second one would have to
+        # finish the first in a single step
+        self._resizing = asyncio.Lock()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return str(self._map)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    # ------------------------------------------------------------------ #
+
+    async def _finish_rehash(self) -> None:
+        """
+        Completes any incremental rehash that is in progress, a chunk of old
+        buckets or slots at a time.
+        """
+        map = self._map
+        while map._old_buckets is not None:
+            if self._map_type == 'oa':
+                map._migrate_slots(self._chunk_size)
+            else:
+                map._migrate_buckets(self._chunk_size)
+            await asyncio.sleep(0)
+
+
+    async def _put_many(self, keys: list, values: list,
+                        hashes: list = None, ttls: list = None) -> None:
+        """
+        Updates or inserts keys[i]:values[i] for every i, a chunk at a time,
+        hashing each chunk's keys together unless hashes are given. If ttls
+        is given, an entry with a ttl other than None expires that many
+        seconds from now. Each insert grows the table incrementally, as put
+        does.
+        """
+        map = self._map
+        for start in range(0, len(keys), self._chunk_size):
+            end = min(start + self._chunk_size, len(keys))
+            if hashes is None:
+                chunkHashes = hash_keys(map._hash_function, keys[start:end])
+            else:
+                chunkHashes = hashes[start:end]
+            now = map._clock()
+            for index in range(start, end):
+                expires = None
+                if ttls and ttls[index] is not None:
+                    expires = now + ttls[index]
+                    map._has_ttl = True
+                map._before_insert()
+                map._put_hashed(keys[index], values[index],
+                                chunkHashes[index - start], expires)
+            await asyncio.sleep(0)
+
+
+    async def _walk(self):
+        """
+        Yields the map's unexpired (key, value, hash, ttl) tuples a chunk at
+        a time as lists. Writes can land between chunks: an entry present for the
+        whole walk is yielded exactly once, while one added or removed
+        meanwhile may or may not be. If the table is resized or cleared
+        mid-walk, the walk waits for any rehash to finish and starts over,
+        skipping the keys it already yielded.
+        """
+        map = self._map
+        await self._finish_rehash()
+        buckets = map._buckets
+        seen = set()
+        index = 0
+        while index < buckets.length():
+            end = min(index + self._chunk_size, buckets.length())
+            chunk = [entry for entry in self._entries(buckets, index, end,
+                                                      map._clock())
+                     if entry[0] not in seen]
+            index = end
+            if chunk:
+                seen.update(entry[0] for entry in chunk)
+                yield chunk
+            await asyncio.sleep(0)
+
+            if map._buckets is not buckets or map._old_buckets is not None:
+                await self._finish_rehash()
+                buckets = map._buckets
+                index = 0
+
+
+    async def put(self, key: str, value: object, ttl: float = None) -> None:
+        """
+        Updates the key:val pair in the Hash Table, inserting a new entry if
+        not present.
+        """
+        self._map.put(key, value, ttl)
+
+
+    async def get(self, key: str):
+        """
+        Returns the value associated with the parameter key.
+        """
+        return self._map.get(key)
+
+
+    async def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the HashTable contains key, else, False.
+        """
+        return self._map.contains_key(key)
+
+
+    async def remove(self, key: str) -> None:
+        """
+        Removes an entry with a given key from the Hash Table.
+        """
+        self._map.remove(key)
+
+
+    def table_load(self) -> float:
+        """
+        Returns the table load of the Hash Table.
+        """
+        return self._map.table_load()
+
+
+    async def put_many(self, pairs) -> None:
+        """
+        Updates or inserts every (key, value) pair in pairs, hashing and
+        inserting a chunk at a time. pairs can be any iterable, and is only
+        read a chunk at a time.
+        """
+        pairs = iter(pairs)
+        chunk = list(islice(pairs, self._chunk_size))
+        while chunk:
+            await self._put_many([pair[0] for pair in chunk],
+                                 [pair[1] for pair in chunk])
+            chunk = list(islice(pairs, self._chunk_size))
+
+
+    async def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a Dynamic Array of the values for every key in keys, with
+        None for keys that are not in the Hash Table, looking up a chunk at
+        a time.
+        """
+        map = self._map
+        keys = list(keys)
+        outArray = DynamicArray()
+        for start in range(0, len(keys), self._chunk_size):
+            chunk = keys[start:start + self._chunk_size]
+            hashes = hash_keys(map._hash_function, chunk)
+            for index in range(len(chunk)):
+                outArray.append(map._get_hashed(chunk[index], hashes[index]))
+            await asyncio.sleep(0)
+        return outArray
+
+
+    async def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the Hash Table to the next valid capacity, like the map's
+        own resize_table, but as an incremental rehash that moves chunk_size
+        old buckets or slots across between yields. Reads and writes made
+        meanwhile see every entry.
+        """
+        map = self._map
+        # Same limits as the map's resize_table
+        if new_capacity < 1 or \
+                self._map_type == 'oa' and new_capacity < map.get_size():
+            return
+
+        async with self._resizing:
+            await self._finish_rehash()
+            map._grow(map._fit_capacity(new_capacity))
+            await self._finish_rehash()
+
+
+    async def clear(self) -> None:
+        """
+        Clears the contents of the Hash Table without affecting the
+        capacity. The map is empty as soon as this is called; the old
+        table is then emptied a chunk at a time, so freeing its entries
+        doesn't block the loop either.
+        """
+        map = self._map
+        tables = [map._buckets]
+        if map._old_buckets is not None:
+            tables.append(map._old_buckets)
+        map.clear()
+
+        for table in tables:
+            for start in range(0, table.length(), self._chunk_size):
+                for index in range(start, min(start + self._chunk_size,
+                                              table.length())):
+                    table.set_unchecked(index, None)
+                await asyncio.sleep(0)
+
+
+    async def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a Dynamic Array of (key, value) tuples of the Hash Table's
+        contents, copied a chunk at a time. Entries written during the copy
+        may or may not be included.
+        """
+        outArray = DynamicArray()
+        async for chunk in self._walk():
+            outArray.extend((key, value) for key, value, _, _ in chunk)
+        return outArray
+
+
+    async def __aiter__(self):
+        """
+        Iterates over (key, value) tuples of the Hash Table's contents.
+        Unlike the maps' own iterators this doesn't fail if the map changes:
+        entries written during iteration may or may not be included.
+        """
+        async for chunk in self._walk():
+            for key, value, _, _ in chunk:
+                yield key, value
+
+
+    async def save(self, path: str, compress: bool = False) -> None:
+        """
+        Writes the Hash Table's contents to a binary snapshot file at path,
+        as the map's save does. The entries are copied a chunk at a time,
+        then pickled and written in the loop's default executor.
+        """
+        entries = []
+        async for chunk in self._walk():
+            entries.extend(chunk)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, write_snapshot, path, entries,
+                                   len(entries), self._map._hash_function,
+                                   compress)
+
+
+    async def load(self, path: str) -> None:
+        """
+        Adds the contents of a snapshot file written by save to the Hash
+        Table. Each chunk of the file is read and unpickled in the loop's
+        default executor, then inserted a chunk at a time.
+        """
+        loop = asyncio.get_running_loop()
+        reader = await loop.run_in_executor(None, SnapshotReader, path,
+                                            self._map._hash_function)
+        with reader:
+            chunks = iter(reader)
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                keys, values, hashes, ttls = chunk
+                await self._put_many(keys, values, hashes, ttls)
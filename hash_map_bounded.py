@@ -0,0 +1,453 @@
+# Description: Implementation of a bounded Separate Chaining HashMap for use
+#              as a cache. It caps its entries and/or bytes and evicts with
+#              an LRU, LFU or TinyLFU policy, using recency links kept in the
+#              chain nodes themselves.
+
+from sys import getsizeof
+
+from a6_include import BUFFER_KEY_TYPES, SLNode, hash_function_1
+from hash_map_frequency import CountMinSketch
+from hash_map_sc import HashMap
+
+
+class CacheNode(SLNode):
+    """
+    Chain node for a BoundedHashMap, which is also linked into its eviction
+    policy's doubly linked lists
+    """
+
+    def __init__(self, key: str, value: object, next: SLNode = None,
+                 hash: int = None, size: int = 0) -> None:
+        """Initialize a node of size bytes that isn't in any policy list."""
+        super().__init__(key, value, next, hash)
+        self.size = size
+        self.frequency = 1
+        self.older = None
+        self.newer = None
+
+
+def _new_list() -> CacheNode:
+    """
+    Returns the sentinel of a new, empty circular list of CacheNodes; its
+    newer link is the oldest node and its older link the newest.
+    """
+    sentinel = CacheNode(None, None)
+    sentinel.older = sentinel.newer = sentinel
+    return sentinel
+
+
+def _link_newest(sentinel: CacheNode, node: CacheNode) -> None:
+    """
+    Links node into a list as its newest node.
+    """
+    node.older = sentinel.older
+    node.newer = sentinel
+    sentinel.older.newer = node
+    sentinel.older = node
+
+
+def _unlink(node: CacheNode) -> None:
+    """
+    Unlinks node from whichever list it is in.
+    """
+    node.older.newer = node.newer
+    node.newer.older = node.older
+    node.older = node.newer = None
+
+
+# ---------------------- Eviction policies ---------------------- #
+
+class LRUPolicy:
+    """
+    Evicts the least recently used entry
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty recency list."""
+        self._recency = _new_list()
+
+    def record(self, key: str) -> None:
+        """Note an access to key, whether or not it is cached."""
+
+    def admit(self, key: str, victim: CacheNode) -> bool:
+        """Return True if key may replace victim; LRU always admits."""
+        return True
+
+    def added(self, node: CacheNode) -> None:
+        """Track a new entry as the most recently used."""
+        _link_newest(self._recency, node)
+
+    def accessed(self, node: CacheNode) -> None:
+        """Move an entry that was read or updated to most recently used."""
+        _unlink(node)
+        _link_newest(self._recency, node)
+
+    def removed(self, node: CacheNode) -> None:
+        """Stop tracking an entry that left the map."""
+        _unlink(node)
+
+    def victim(self) -> CacheNode:
+        """Return the entry to evict next."""
+        return self._recency.newer
+
+    def clear(self) -> None:
+        """Stop tracking every entry."""
+        self._recency = _new_list()
+
+
+class LFUPolicy:
+    """
+    Evicts the least frequently used entry, breaking ties by least recent
+    use. Entries with the same use count share a recency list, so every
+    operation is O(1).
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no frequency lists."""
+        self._lists = {}
+        self._min_frequency = 1
+
+    def record(self, key: str) -> None:
+        """Note an access to key, whether or not it is cached."""
+
+    def admit(self, key: str, victim: CacheNode) -> bool:
+        """Return True if key may replace victim; LFU always admits."""
+        return True
+
+    def _link(self, node: CacheNode) -> None:
+        """Link node into the list for its frequency."""
+        sentinel = self._lists.get(node.frequency)
+        if sentinel is None:
+            sentinel = self._lists[node.frequency] = _new_list()
+        _link_newest(sentinel, node)
+
+    def _unlink(self, node: CacheNode) -> None:
+        """Unlink node, dropping its frequency's list if it is now empty."""
+        _unlink(node)
+        sentinel = self._lists[node.frequency]
+        if sentinel.newer is sentinel:
+            del self._lists[node.frequency]
+
+    def added(self, node: CacheNode) -> None:
+        """Track a new entry with a use count of 1."""
+        node.frequency = 1
+        self._min_frequency = 1
+        self._link(node)
+
+    def accessed(self, node: CacheNode) -> None:
+        """Count another use of an entry."""
+        self._unlink(node)
+        if node.frequency == self._min_frequency and \
+                node.frequency not in self._lists:
+            self._min_frequency += 1
+        node.frequency += 1
+        self._link(node)
+
+    def removed(self, node: CacheNode) -> None:
+        """Stop tracking an entry that left the map."""
+        self._unlink(node)
+
+    def victim(self) -> CacheNode:
+        """Return the entry to evict next."""
+        if self._min_frequency not in self._lists:
+            # Only reached after removals emptied the lowest list
+            self._min_frequency = min(self._lists)
+        return self._lists[self._min_frequency].newer
+
+    def clear(self) -> None:
+        """Stop tracking every entry."""
+        self._lists = {}
+        self._min_frequency = 1
+
+
+class TinyLFUPolicy(LRUPolicy):
+    """
+    Evicts the least recently used entry, but only admits a new key if a
+    Count-Min sketch of recent accesses says it is used more often than the
+    entry it would replace, so one-off keys can't flush the cache.
+    """
+
+    def __init__(self, width: int = 1024, sample_size: int = None) -> None:
+        """
+        Initialize with a sketch of width counters per row. The sketch is
+        halved every sample_size accesses (10 * width by default) so the
+        frequencies follow recent traffic.
+        """
+        super().__init__()
+        self._sketch = CountMinSketch(width)
+        self._sample_size = 10 * width if sample_size is None else sample_size
+        self._samples = 0
+
+    def record(self, key: str) -> None:
+        """Note an access to key, whether or not it is cached."""
+        self._sketch.add(key)
+        self._samples += 1
+        if self._samples >= self._sample_size:
+            self._sketch.halve()
+            self._samples //= 2
+
+    def admit(self, key: str, victim: CacheNode) -> bool:
+        """Return True if key is used more often than victim."""
+        return self._sketch.estimate(key) > self._sketch.estimate(victim.key)
+
+
+# ------------------------------------------------------------------ #
+
+class BoundedHashMap(HashMap):
+    def __init__(self,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 policy=None,
+                 function: callable = hash_function_1,
+                 size_of: callable = getsizeof) -> None:
+        """
+        Initialize new BoundedHashMap that holds at most max_entries entries
+        and/or at most max_bytes bytes, measuring each entry as
+        size_of(key) + size_of(value). policy picks the entry to evict
+        (LRUPolicy() by default, or LFUPolicy() / TinyLFUPolicy()).
+        When max_entries is given the table is sized for it up front and
+        never grows.
+        """
+        if max_entries is None and max_bytes is None:
+            raise ValueError('BoundedHashMap needs max_entries or max_bytes')
+        # One spare bucket keeps a full cache below load 1, so put never
+        # grows the table
+        super().__init__(11 if max_entries is None else max_entries + 1,
+                         function)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._policy = LRUPolicy() if policy is None else policy
+        self._size_of = size_of
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_bytes(self) -> int:
+        """
+        Return the total size of the entries in bytes
+        """
+        return self._bytes
+
+    def get_hits(self) -> int:
+        """
+        Return the number of lookups that found their key
+        """
+        return self._hits
+
+    def get_misses(self) -> int:
+        """
+        Return the number of lookups that didn't find their key
+        """
+        return self._misses
+
+    def get_evictions(self) -> int:
+        """
+        Return the number of entries evicted to make room
+        """
+        return self._evictions
+
+    # ------------------------------------------------------------------ #
+
+    def _over(self, entries: int, bytes: int) -> bool:
+        """
+        Returns True if adding entries entries of bytes bytes would go over
+        either limit.
+        """
+        if self._max_entries is not None and \
+                self._size + entries > self._max_entries:
+            return True
+        return self._max_bytes is not None and \
+            self._bytes + bytes > self._max_bytes
+
+
+    def _unlink_node(self, node: CacheNode) -> None:
+        """
+        Removes a node from its bucket and its policy's lists.
+        """
+        self._buckets[node.hash % self._capacity].remove(node.key, node.hash)
+        self._policy.removed(node)
+        self._size -= 1
+        self._bytes -= node.size
+        self._modifications += 1
+
+
+    def _expired(self, node: CacheNode) -> bool:
+        """
+        Returns True if node has expired, unlinking it if so.
+        """
+        if node.expires is not None and node.expires <= self._clock():
+            self._unlink_node(node)
+            return True
+        return False
+
+
+    def _put_hashed(self, key: str, value: object, hash: int,
+                    expires: float = None) -> None:
+        """
+        Updates or inserts key:val given the key's already computed hash,
+        evicting entries until a new one fits.
+        """
+        self._policy.record(key)
+        node = self._find_node(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if node is None:
+            self._insert_hashed(key, value, hash, expires)
+            return
+
+        node.expires = expires
+        self._policy.accessed(node)
+        self._set_value(node, value)
+
+
+    def _set_value(self, node: CacheNode, value: object) -> None:
+        """
+        Stores value in an existing node and measures the entry again.
+        """
+        size = self._size_of(node.key) + self._size_of(value)
+        node.value = value
+        self._bytes += size - node.size
+        node.size = size
+        # A bigger value can push the map over max_bytes
+        while self._size > 0 and self._over(0, 0):
+            self._unlink_node(self._policy.victim())
+            self._evictions += 1
+
+
+    def _insert_hashed(self, key: str, value: object, hash: int,
+                       expires: float = None) -> CacheNode:
+        """
+        Inserts a new node for a key known not to be in the Hash Table,
+        evicting entries until it fits, and returns it. A key the policy
+        doesn't admit, or one bigger than max_bytes, is not stored and None
+        is returned.
+        """
+        if isinstance(key, BUFFER_KEY_TYPES):
+            key = bytes(key)
+        size = self._size_of(key) + self._size_of(value)
+        if self._max_bytes is not None and size > self._max_bytes:
+            return None
+        while self._size > 0 and self._over(1, size):
+            victim = self._policy.victim()
+            if not self._policy.admit(key, victim):
+                return None
+            self._unlink_node(victim)
+            self._evictions += 1
+
+        node = CacheNode(key, value, None, hash, size)
+        node.expires = expires
+        self._bucket_at(hash % self._capacity).insert_node(node)
+        self._size += 1
+        self._bytes += size
+        self._modifications += 1
+        self._policy.added(node)
+        return node
+
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes the Hash Table once for count more entries, as the separate
+        chaining HashMap does, but never beyond max_entries: any more would
+        only be evicted, and the table is sized for max_entries already.
+        """
+        if self._max_entries is not None:
+            count = min(count, self._max_entries - self._size)
+        super()._reserve(count)
+
+
+    def _locate(self, key: str, hash: int) -> CacheNode:
+        """
+        Returns the live node holding key given its already computed hash,
+        or None, counting a hit or a miss and marking the entry as used.
+        """
+        self._policy.record(key)
+        node = self._find_node(key, hash)
+        if node is None or self._expired(node):
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._policy.accessed(node)
+        return node
+
+
+    def _remove_hashed(self, key: str, hash: int) -> CacheNode:
+        """
+        Removes the entry for key given its already computed hash, returning
+        the removed node or None.
+        """
+        node = self._find_node(key, hash)
+        if node is not None:
+            self._unlink_node(node)
+        return node
+
+
+    def _relink(self, nodes: list) -> None:
+        """
+        Removes every node but nodes, unlinking each one so the policy and
+        the byte count stay in step.
+        """
+        self._finish_rehash()
+        keep = set(map(id, nodes))
+        for index in range(self._capacity):
+            for node in list(self._buckets.get_unchecked(index)):
+                if id(node) not in keep:
+                    self._unlink_node(node)
+
+
+    def _merge_hashed(self, key: str, value: object, hash: int,
+                      combine: callable) -> object:
+        """
+        Stores combine(old value, value) under key, given the key's already
+        computed hash, or value if the key is new, and returns what was
+        stored.
+        """
+        self._before_insert()
+        node = self._find_node(key, hash)
+        if node is not None and not self._expired(node):
+            value = combine(node.value, value)
+        self._put_hashed(key, value, hash)
+        return value
+
+
+    def update_with(self, key: str, function: callable,
+                    default: object = None) -> object:
+        """
+        Stores function(value) under key, using default as the value of a
+        missing key, and returns the new value. The entry's size is
+        measured again and any TTL is kept.
+        """
+        self._before_insert()
+        hash = self._hash_function(key)
+        # _locate already counts this as one use of the entry
+        node = self._locate(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if node is None:
+            value = function(default)
+            self._insert_hashed(key, value, hash)
+        else:
+            value = function(node.value)
+            self._set_value(node, value)
+        return value
+
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the HashTable contains key, else, False. This doesn't
+        count as a use of the entry.
+        """
+        node = self._find_node(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record('get')
+        return node is not None and not self._expired(node)
+
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the Hash Table without affecting the
+        capacity or the hit, miss and eviction counters.
+        """
+        super().clear()
+        self._policy.clear()
+        self._bytes = 0
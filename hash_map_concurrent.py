@@ -0,0 +1,258 @@
+# Description: Implementation of a thread-safe Separate Chaining HashMap that
+#              stripes its keys across independently locked segments.
+
+from contextlib import contextmanager
+from threading import Lock
+
+from a6_include import DynamicArray, hash_function_1
+from hash_map_sc import HashMap
+
+
+class ConcurrentHashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 segments: int = 16,
+                 rehash_step: int = 0,
+                 capacity_policy=None) -> None:
+        """
+        Initialize new ConcurrentHashMap made of separate chaining HashMap
+        segments, each guarded by its own lock and resized on its own.
+        capacity is split across the segments; the other arguments are
+        passed to every segment's HashMap.
+        """
+        self._segment_count = max(segments, 1)
+        segmentCapacity = max(capacity // self._segment_count, 1)
+
+        self._segments = DynamicArray()
+        self._locks = []
+        # Each segment's version is odd while a write is in progress, and
+        # changes with every write, so readers can detect a torn read
+        self._versions = []
+        for _ in range(self._segment_count):
+            self._segments.append(HashMap(segmentCapacity, function,
+                                          rehash_step, capacity_policy))
+            self._locks.append(Lock())
+            self._versions.append(0)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for index in range(self._segment_count):
+            with self._locks[index]:
+                out += 'Segment ' + str(index) + ':\n' + \
+                    str(self._segments[index])
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        size = 0
+        for index in range(self._segment_count):
+            size += self._segments[index].get_size()
+        return size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the total of every segment's capacity
+        """
+        capacity = 0
+        for index in range(self._segment_count):
+            capacity += self._segments[index].get_capacity()
+        return capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _segment_index(self, key: str) -> int:
+        """
+        Returns the index of the segment that owns key.
+        Segments are picked with Python's built in hash, which strings cache,
+        so routing a key never runs the map's own hash function.
+        """
+        return hash(key) % self._segment_count
+
+
+    @contextmanager
+    def _writing(self, index: int):
+        """
+        Locks a segment for writing and yields its HashMap, bumping the
+        segment's version before and after the write.
+        """
+        with self._locks[index]:
+            self._versions[index] += 1
+            try:
+                yield self._segments[index]
+            finally:
+                self._versions[index] += 1
+
+
+    def _read(self, index: int, key: str, read: callable):
+        """
+        Returns read(segment, key, hash) for the segment at index.
+        The read first runs without the lock and is kept only if no write
+        started or finished meanwhile; otherwise it is repeated under the
+        segment's lock.
+        """
+        segment = self._segments[index]
+        version = self._versions[index]
+        if version % 2 == 0:
+            try:
+                result = read(segment, key, segment._hash_function(key))
+            except Exception:
+                # A torn read can fail in many ways; the locked retry below
+                # raises any error that is real
+                pass
+            else:
+                if self._versions[index] == version:
+                    return result
+
+        with self._locks[index]:
+            return read(segment, key, segment._hash_function(key))
+
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key:val pair in the Hash Table, inserting a new entry if not
+        present. Only the key's segment is locked.
+        """
+        with self._writing(self._segment_index(key)) as segment:
+            segment.put(key, value)
+
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the parameter key, usually without
+        taking a lock.
+        """
+        return self._read(self._segment_index(key), key, HashMap._get_hashed)
+
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the HashTable contains key, else, False, usually
+        without taking a lock.
+        """
+        # Checks for the node itself, so keys stored with None count too
+        return self._read(
+            self._segment_index(key), key,
+            lambda segment, key, hash:
+                segment._find_node(key, hash) is not None)
+
+
+    def remove(self, key: str) -> None:
+        """
+        Removes an entry with a given key from the Hash Table.
+        """
+        with self._writing(self._segment_index(key)) as segment:
+            segment.remove(key)
+
+
+    def table_load(self) -> float:
+        """
+        Returns the table load of the Hash Table.
+        """
+        return self.get_size() / self.get_capacity()
+
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets across every segment.
+        """
+        count = 0
+        for index in range(self._segment_count):
+            # empty_buckets can finish an incremental rehash, so it writes
+            with self._writing(index) as segment:
+                count += segment.empty_buckets()
+        return count
+
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes every segment so the total capacity is about new_capacity.
+        """
+        segmentCapacity = max(new_capacity // self._segment_count, 1)
+        for index in range(self._segment_count):
+            with self._writing(index) as segment:
+                segment.resize_table(segmentCapacity)
+
+
+    def clear(self) -> None:
+        """
+        Clears the contents of every segment without affecting capacity.
+        All segment locks are held together, in order, so no write can land
+        in a segment that was already cleared.
+        """
+        for index in range(self._segment_count):
+            self._locks[index].acquire()
+        try:
+            for index in range(self._segment_count):
+                self._versions[index] += 1
+                self._segments[index].clear()
+                self._versions[index] += 1
+        finally:
+            for index in range(self._segment_count):
+                self._locks[index].release()
+
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a Dynamic Array of (key, value) tuples of the Hash Table's
+        contents. Each segment is copied under its own lock, so the result
+        is consistent per segment.
+        """
+        outArray = DynamicArray()
+        for index in range(self._segment_count):
+            with self._writing(index) as segment:
+                pairs = segment.get_keys_and_values()
+            for item in range(pairs.length()):
+                outArray.append(pairs[item])
+        return outArray
+
+
+    def _group_by_segment(self, items, key_of: callable) -> list:
+        """
+        Returns a list holding, for each segment, the items whose key belongs
+        to that segment.
+        """
+        groups = [[] for _ in range(self._segment_count)]
+        for item in items:
+            groups[self._segment_index(key_of(item))].append(item)
+        return groups
+
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates or inserts every (key, value) pair in pairs, taking each
+        segment's lock once for all of its pairs.
+        """
+        groups = self._group_by_segment(pairs, lambda pair: pair[0])
+        for index in range(self._segment_count):
+            if groups[index]:
+                with self._writing(index) as segment:
+                    segment.put_many(groups[index])
+
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a Dynamic Array of the values for every key in keys, with
+        None for keys that are not in the Hash Table.
+        """
+        outArray = DynamicArray()
+        for key in keys:
+            outArray.append(self.get(key))
+        return outArray
+
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes the entries for every key in keys, taking each segment's lock
+        once for all of its keys.
+        """
+        groups = self._group_by_segment(keys, lambda key: key)
+        for index in range(self._segment_count):
+            if groups[index]:
+                with self._writing(index) as segment:
+                    segment.remove_many(groups[index])
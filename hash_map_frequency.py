@@ -0,0 +1,279 @@
+# Description: Streaming frequency counting on top of the Separate Chaining
+#              HashMap: exact counts with incremental modes and top-k, and
+#              bounded-memory Space-Saving and Count-Min approximations.
+
+from array import array
+from heapq import heapify, heappop, heappush, nlargest
+from itertools import islice
+from operator import itemgetter
+
+from a6_include import DynamicArray, hash_function_1, hash_keys, word_hash
+from hash_map_sc import HashMap
+
+
+def _chunks(keys, chunk_size: int):
+    """
+    Yields lists of up to chunk_size keys from any iterable.
+    """
+    keys = iter(keys)
+    while True:
+        chunk = list(islice(keys, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class FrequencyCounter:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 chunk_size: int = 4096) -> None:
+        """
+        Initialize new FrequencyCounter that counts keys exactly in a
+        separate chaining HashMap. Keys fed through update are hashed
+        chunk_size at a time, and every key costs one hash and one bucket
+        walk.
+        """
+        self._map = HashMap(capacity, function)
+        self._chunk_size = chunk_size
+        # The modes are kept up to date as keys are counted
+        self._modes = []
+        self._max_count = 0
+
+    def get_size(self) -> int:
+        """
+        Return the number of distinct keys counted
+        """
+        return self._map.get_size()
+
+    # ------------------------------------------------------------------ #
+
+    def _counted(self, key: str, count: int) -> None:
+        """
+        Updates the modes after key's count has risen to count.
+        """
+        if count > self._max_count:
+            self._modes = [key]
+            self._max_count = count
+        elif count == self._max_count:
+            self._modes.append(key)
+
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Adds count (which must be positive) to key's count and returns the
+        new count.
+        """
+        count = self._map._add_hashed(key, count, self._map._hash_function(key))
+        self._counted(key, count)
+        return count
+
+
+    def update(self, keys) -> None:
+        """
+        Counts every key in an iterable, which is consumed in chunks so it
+        can be a generator over a stream of any length.
+        """
+        for chunk in _chunks(keys, self._chunk_size):
+            self.update_chunk(chunk)
+
+
+    def update_chunk(self, chunk: list) -> None:
+        """
+        Counts every key in a list, hashing the whole list in one batch.
+        """
+        map = self._map
+        hashes = hash_keys(map._hash_function, chunk)
+        for index in range(len(chunk)):
+            key = chunk[index]
+            self._counted(key, map._add_hashed(key, 1, hashes[index]))
+
+
+    def get(self, key: str) -> int:
+        """
+        Returns how many times key has been counted.
+        """
+        count = self._map.get(key)
+        return 0 if count is None else count
+
+
+    def modes(self) -> tuple:
+        """
+        Returns a tuple of a Dynamic Array with the keys counted most often
+        and their count, as find_mode does, without scanning the counts.
+        """
+        modeArray = DynamicArray()
+        for key in self._modes:
+            modeArray.append(key)
+        return (modeArray, self._max_count)
+
+
+    def top(self, k: int) -> DynamicArray:
+        """
+        Returns a Dynamic Array of the k (key, count) tuples with the highest
+        counts, highest first.
+        """
+        outArray = DynamicArray()
+        for pair in nlargest(k, self._map.items(), key=itemgetter(1)):
+            outArray.append(pair)
+        return outArray
+
+
+class SpaceSavingCounter:
+    def __init__(self,
+                 capacity: int,
+                 function: callable = hash_function_1) -> None:
+        """
+        Initialize new SpaceSavingCounter that tracks at most capacity keys,
+        so memory stays bounded however many distinct keys the stream has.
+        Once full, a new key replaces the key with the lowest count and
+        inherits that count as its possible overestimate. Any key counted
+        more than (total count / capacity) times is guaranteed to be kept.
+        """
+        self._capacity = capacity
+        # Each tracked key maps to a [count, error] list
+        self._map = HashMap(capacity, function)
+        # Min-heap of (count, key); entries whose count is out of date are
+        # skipped when popped and dropped when the heap is rebuilt
+        self._heap = []
+
+    def get_size(self) -> int:
+        """
+        Return the number of keys being tracked
+        """
+        return self._map.get_size()
+
+    # ------------------------------------------------------------------ #
+
+    def _evict(self) -> int:
+        """
+        Stops tracking the key with the lowest count and returns its count.
+        """
+        while True:
+            count, key = heappop(self._heap)
+            entry = self._map.get(key)
+            if entry is not None and entry[0] == count:
+                self._map.remove(key)
+                return count
+
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Adds count (which must be positive) to key's count and returns the
+        new estimate, which may overstate the true count.
+        """
+        map = self._map
+        hash = map._hash_function(key)
+        entry = map._get_hashed(key, hash)
+        if entry is not None:
+            entry[0] += count
+        else:
+            # Replace the least counted key if every slot is taken
+            floor = self._evict() if map.get_size() >= self._capacity else 0
+            entry = [floor + count, floor]
+            map._put_hashed(key, entry, hash)
+        heappush(self._heap, (entry[0], key))
+
+        # Every add pushes a heap entry, so clear out the stale ones
+        if len(self._heap) > 4 * self._capacity:
+            self._heap = [(entry[0], key) for key, entry in map.items()]
+            heapify(self._heap)
+        return entry[0]
+
+
+    def update(self, keys) -> None:
+        """
+        Counts every key in an iterable.
+        """
+        for key in keys:
+            self.add(key)
+
+
+    def get(self, key: str) -> int:
+        """
+        Returns the estimated count for key, or 0 if it isn't tracked.
+        """
+        entry = self._map.get(key)
+        return 0 if entry is None else entry[0]
+
+
+    def top(self, k: int) -> DynamicArray:
+        """
+        Returns a Dynamic Array of the k (key, count, error) tuples with the
+        highest estimated counts, highest first. The true count of each key
+        is between count - error and count.
+        """
+        outArray = DynamicArray()
+        for key, entry in nlargest(k, self._map.items(),
+                                   key=lambda pair: pair[1][0]):
+            outArray.append((key, entry[0], entry[1]))
+        return outArray
+
+
+class CountMinSketch:
+    def __init__(self,
+                 width: int = 2048,
+                 depth: int = 4,
+                 function: callable = word_hash) -> None:
+        """
+        Initialize new CountMinSketch with depth rows of width counters.
+        Estimates never undercount, and overcount by at most about
+        2 / width of the total count with probability 1 - 2 ** -depth.
+        function should return 64-bit hashes; one hash per key is split
+        into a row index for every row.
+        """
+        self._width = width
+        self._depth = depth
+        self._hash_function = function
+        self._counters = array('q', [0]) * (width * depth)
+
+    # ------------------------------------------------------------------ #
+
+    def _indexes(self, hash: int):
+        """
+        Yields the counter index for every row, derived from the two halves
+        of one 64-bit hash.
+        """
+        low = hash & 0xFFFFFFFF
+        high = (hash >> 32) | 1
+        for row in range(self._depth):
+            yield row * self._width + (low + row * high) % self._width
+
+
+    def add(self, key: str, count: int = 1) -> None:
+        """
+        Adds count to key's counters.
+        """
+        counters = self._counters
+        for index in self._indexes(self._hash_function(key)):
+            counters[index] += count
+
+
+    def update(self, keys, chunk_size: int = 4096) -> None:
+        """
+        Counts every key in an iterable, hashing chunk_size keys at a time.
+        """
+        counters = self._counters
+        for chunk in _chunks(keys, chunk_size):
+            for hash in hash_keys(self._hash_function, chunk):
+                for index in self._indexes(hash):
+                    counters[index] += 1
+
+
+    def estimate(self, key: str) -> int:
+        """
+        Returns the estimated count for key, which is never below its true
+        count.
+        """
+        counters = self._counters
+        return min(counters[index]
+                   for index in self._indexes(self._hash_function(key)))
+
+
+    def halve(self) -> None:
+        """
+        Halves every counter, so older counts fade as new ones are added.
+        """
+        counters = self._counters
+        for index in range(len(counters)):
+            counters[index] >>= 1
@@ -0,0 +1,433 @@
+# Description: Implementation of an Open Addressing HashMap whose slots and
+#              keys live in a memory-mapped file, so the map persists across
+#              restarts and reopening it costs O(1).
+#
+#              File layout (all integers are native signed 64-bit words):
+#                header   HEADER_WORDS words: magic, version, capacity, size,
+#                         tombstones, heap start, heap used, heap end and a
+#                         check hash of the hash function
+#                slots    capacity slots of SLOT_WORDS words each: stored
+#                         hash, key offset, key length, value
+#                heap     UTF-8 key bytes, appended as keys are inserted
+
+import mmap
+import os
+from sys import byteorder
+
+from a6_include import DynamicArray, hash_function_1
+
+
+MAGIC = int.from_bytes(b'PYHMMAP1', 'little', signed=True)
+VERSION = 1
+HEADER_WORDS = 16
+SLOT_WORDS = 4
+WORD = 8
+
+# Header word indices
+CAPACITY, SIZE, TOMBSTONES, HEAP_START, HEAP_USED, HEAP_END, CHECK = \
+    range(2, 9)
+
+# Stored hash values: 0 is an empty slot, -1 a tombstone, and live slots
+# hold the key's hash masked to 62 bits plus one
+EMPTY = 0
+TOMBSTONE = -1
+HASH_MASK = (1 << 62) - 1
+
+# Key hashed to detect a file being reopened with a different hash function
+CHECK_KEY = 'hash_map_mmap'
+
+
+class MappedHashMap:
+    def __init__(self, path: str,
+                 function: callable = hash_function_1,
+                 capacity: int = 11,
+                 readonly: bool = False) -> None:
+        """
+        Initialize new MappedHashMap backed by the file at path, that uses
+        quadratic probing for collision resolution
+        An existing file is mapped as is, without reading its entries, and
+        must have been written with the same hash function; otherwise a new
+        file with the given capacity is created. Keys are strings and values
+        are integers that fit in 64 bits. Any number of processes can open
+        the same file with readonly=True and share its pages, as long as no
+        process is writing to it at the same time.
+        """
+        self._path = path
+        self._hash_function = function
+        self._readonly = readonly
+        self._check = self._hash(CHECK_KEY)
+
+        if not os.path.exists(path):
+            if readonly:
+                raise FileNotFoundError(path)
+            self._create(path, self._next_prime(capacity),
+                         max(capacity * 16, mmap.PAGESIZE))
+        self._map_file()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self.get_capacity()):
+            stored = self._slots[i * SLOT_WORDS]
+            if stored == EMPTY:
+                out += str(i) + ': None\n'
+            elif stored == TOMBSTONE:
+                out += str(i) + ': TS\n'
+            else:
+                out += str(i) + ': K: ' + self._key_at(i) + \
+                    ' V: ' + str(self._slots[i * SLOT_WORDS + 3]) + '\n'
+        return out
+
+    def __enter__(self) -> "MappedHashMap":
+        """Return the map for use in a with block."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Unmap the file at the end of a with block."""
+        self.close()
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._header[SIZE]
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._header[CAPACITY]
+
+    # ------------------------------------------------------------------ #
+
+    def _hash(self, key: str) -> int:
+        """
+        Returns the value stored in a live slot's hash word for key.
+        """
+        return (self._hash_function(key) & HASH_MASK) + 1
+
+
+    def _create(self, path: str, capacity: int, heap_size: int) -> None:
+        """
+        Writes an empty map file with the given capacity and heap size.
+        The file is zero filled, which marks every slot as empty.
+        """
+        heapStart = (HEADER_WORDS + capacity * SLOT_WORDS) * WORD
+        with open(path, 'wb') as file:
+            file.truncate(heapStart + heap_size)
+            header = [0] * HEADER_WORDS
+            header[0], header[1] = MAGIC, VERSION
+            header[CAPACITY] = capacity
+            header[HEAP_START] = heapStart
+            header[HEAP_END] = heapStart + heap_size
+            header[CHECK] = self._check
+            file.write(b''.join(word.to_bytes(WORD, byteorder, signed=True)
+                                for word in header))
+
+
+    def _map_file(self) -> None:
+        """
+        Maps the file and sets up word views over its header and slots.
+        Nothing beyond the header is read, so this is O(1).
+        """
+        with open(self._path, 'rb' if self._readonly else 'r+b') as file:
+            access = mmap.ACCESS_READ if self._readonly else mmap.ACCESS_WRITE
+            self._mmap = mmap.mmap(file.fileno(), 0, access=access)
+
+        self._header = memoryview(self._mmap)[:HEADER_WORDS * WORD].cast('q')
+        if self._header[0] != MAGIC or self._header[1] != VERSION:
+            self.close()
+            raise ValueError(self._path + ' is not a MappedHashMap file')
+        if self._header[CHECK] != self._check:
+            self.close()
+            raise ValueError(self._path + ' was written with a different '
+                             'hash function')
+        self._slots = memoryview(self._mmap)[
+            HEADER_WORDS * WORD:self._header[HEAP_START]].cast('q')
+
+
+    def _require_writable(self) -> None:
+        """
+        Raises PermissionError if the map was opened read-only.
+        """
+        if self._readonly:
+            raise PermissionError(self._path + ' was opened read-only')
+
+
+    def _key_at(self, index: int) -> str:
+        """
+        Returns the key stored in the slot at index.
+        """
+        offset = self._slots[index * SLOT_WORDS + 1]
+        length = self._slots[index * SLOT_WORDS + 2]
+        return self._mmap[offset:offset + length].decode()
+
+
+    def _find_slot(self, key: bytes, stored: int) -> int:
+        """
+        Returns the slot index holding the encoded key, or -1 if the key is
+        not present. Probing continues past tombstones.
+        """
+        slots, data = self._slots, self._mmap
+        capacity = self._header[CAPACITY]
+        index = (stored - 1) % capacity
+        step = 1
+        probes = 0
+        while probes < capacity:
+            base = index * SLOT_WORDS
+            slotHash = slots[base]
+            if slotHash == EMPTY:
+                return -1
+            if slotHash == stored and slots[base + 2] == len(key):
+                offset = slots[base + 1]
+                if data[offset:offset + len(key)] == key:
+                    return index
+            index = (index + step) % capacity
+            step += 2
+            probes += 1
+        return -1
+
+
+    def _free_slot(self, stored: int) -> int:
+        """
+        Returns the first empty or tombstone slot on the probe path of a
+        stored hash. Raises RuntimeError if the path has none, which the
+        half-load limit on every insert and rebuild rules out.
+        """
+        slots = self._slots
+        capacity = self._header[CAPACITY]
+        index = (stored - 1) % capacity
+        step = 1
+        probes = 0
+        while probes < capacity:
+            if slots[index * SLOT_WORDS] <= EMPTY:
+                return index
+            index = (index + step) % capacity
+            step += 2
+            probes += 1
+        raise RuntimeError(self._path + ' has no free slot on the probe path')
+
+
+    def _rebuild(self, capacity: int, heap_size: int) -> None:
+        """
+        Rewrites the map into a new file with the given capacity and heap
+        size, dropping tombstones and the keys of removed entries, then
+        swaps it in place of the old file.
+        """
+        entries = []
+        for index in range(self.get_capacity()):
+            base = index * SLOT_WORDS
+            if self._slots[base] > EMPTY:
+                offset, length = self._slots[base + 1], self._slots[base + 2]
+                entries.append((self._slots[base],
+                                bytes(self._mmap[offset:offset + length]),
+                                self._slots[base + 3]))
+
+        # Build the new file next to the old one and rename it over it, so a
+        # crash part way through leaves the old file intact
+        newPath = self._path + '.resize'
+        self._create(newPath, capacity, heap_size)
+        self.close()
+        self._path, oldPath = newPath, self._path
+        self._map_file()
+        for stored, key, value in entries:
+            self._insert(stored, key, value)
+        self.close()
+        os.replace(newPath, oldPath)
+        self._path = oldPath
+        self._map_file()
+
+
+    def _insert(self, stored: int, key: bytes, value: int) -> None:
+        """
+        Writes a new entry for a key known not to be in the table, appending
+        its bytes to the key heap. The caller makes sure there is room.
+        """
+        header = self._header
+        # Find the slot first, so a failure leaves the heap untouched
+        index = self._free_slot(stored)
+        offset = header[HEAP_USED] + header[HEAP_START]
+        self._mmap[offset:offset + len(key)] = key
+        header[HEAP_USED] += len(key)
+
+        base = index * SLOT_WORDS
+        if self._slots[base] == TOMBSTONE:
+            header[TOMBSTONES] -= 1
+        self._slots[base + 1] = offset
+        self._slots[base + 2] = len(key)
+        self._slots[base + 3] = value
+        self._slots[base] = stored
+        header[SIZE] += 1
+
+
+    def put(self, key: str, value: int) -> None:
+        """
+        Updates the key:val pair in the Hash Table, inserting a new entry if not
+        present. Also resizes the Hash Table when load factor > 0.5, and
+        grows the key heap when it is full.
+        """
+        self._require_writable()
+        stored = self._hash(key)
+        encoded = key.encode()
+        index = self._find_slot(encoded, stored)
+        if index != -1:
+            self._slots[index * SLOT_WORDS + 3] = value
+            return
+
+        # Rebuilding remaps the file, so the header is re-read afterwards
+        header = self._header
+        capacity = header[CAPACITY]
+        heapSize = header[HEAP_END] - header[HEAP_START]
+        # Tombstones count towards the load so a free slot stays reachable
+        if (header[SIZE] + header[TOMBSTONES] + 1) / capacity > 0.5:
+            if (header[SIZE] + 1) / capacity > 0.5:
+                capacity = self._next_prime(capacity * 2)
+            self._rebuild(capacity, max(heapSize, header[HEAP_USED] * 2))
+            header = self._header
+        if header[HEAP_USED] + len(encoded) > \
+                header[HEAP_END] - header[HEAP_START]:
+            self._rebuild(self.get_capacity(),
+                          (header[HEAP_USED] + len(encoded)) * 2)
+
+        self._insert(stored, encoded, value)
+
+
+    def get(self, key: str):
+        """
+        Returns the value for the given key if it is in the Hash Table.
+        """
+        index = self._find_slot(key.encode(), self._hash(key))
+        if index != -1:
+            return self._slots[index * SLOT_WORDS + 3]
+
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the key is in the Hash Table, else, False.
+        """
+        return self._find_slot(key.encode(), self._hash(key)) != -1
+
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a Hash Table entry with the given key from the Hash Table.
+        Its key bytes are reclaimed the next time the file is rebuilt.
+        """
+        self._require_writable()
+        index = self._find_slot(key.encode(), self._hash(key))
+        if index != -1:
+            self._slots[index * SLOT_WORDS] = TOMBSTONE
+            self._header[SIZE] -= 1
+            self._header[TOMBSTONES] += 1
+
+
+    def table_load(self) -> float:
+        """
+        Returns the current Hash Table load.
+        """
+        return float(self.get_size() / self.get_capacity())
+
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the Hash Table.
+        """
+        return self.get_capacity() - self.get_size()
+
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the Hash Table to the next prime number, rewriting the file.
+        The new capacity is at least twice the size: quadratic probing on a
+        prime table only reaches half its slots, so a fuller table could
+        leave an entry with nowhere to go.
+        """
+        self._require_writable()
+        if new_capacity < self.get_size():
+            return
+        new_capacity = max(new_capacity, 2 * self.get_size())
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+        self._rebuild(new_capacity,
+                      self._header[HEAP_END] - self._header[HEAP_START])
+
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the Hash Table while preserving capacity.
+        """
+        self._require_writable()
+        self._slots[:] = memoryview(bytes(len(self._slots) * WORD)).cast('q')
+        self._header[SIZE] = 0
+        self._header[TOMBSTONES] = 0
+        self._header[HEAP_USED] = 0
+
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a Dynamic Array of (key, value) tuples of the Hash Table's
+        contents.
+        """
+        outArray = DynamicArray()
+        for index in range(self.get_capacity()):
+            if self._slots[index * SLOT_WORDS] > EMPTY:
+                outArray.append((self._key_at(index),
+                                 self._slots[index * SLOT_WORDS + 3]))
+        return outArray
+
+
+    def flush(self) -> None:
+        """
+        Writes any changes still in memory back to the file.
+        """
+        if not self._readonly:
+            self._mmap.flush()
+
+
+    def close(self) -> None:
+        """
+        Flushes and unmaps the file. The views into the map are released
+        first, since an mmap can't be closed while they exist.
+        """
+        if self._mmap is None:
+            return
+        self.flush()
+        for view in ('_slots', '_header'):
+            if hasattr(self, view):
+                getattr(self, view).release()
+                delattr(self, view)
+        self._mmap.close()
+        self._mmap = None
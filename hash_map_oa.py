@@ -5,32 +5,125 @@
 # Due Date: December 2, 2022
 # Description: Implementation of an Open Addressing HashMap.
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+from operator import attrgetter
+from time import monotonic, perf_counter
+
+from a6_include import (BUFFER_KEY_TYPES, TTL_SWEEP_STEP, DynamicArray,
+                        DynamicArrayException, HashEntry, OperationStats,
+                        SnapshotReader, hash_distribution, hash_function_1,
+                        hash_function_2, hash_keys, write_snapshot)
+
+
+# Stands in for a tombstone in the old table once an incremental rehash has
+# passed it, so the slot still continues old probe chains
+OLD_TOMBSTONE = HashEntry(None, None)
+OLD_TOMBSTONE.is_tombstone = True
+
+
+class HashMapIterator:
+    """
+    Separate iterator class for HashMap, walking the slots in order and
+    returning select(entry) for every live, unexpired entry
+    """
+
+    def __init__(self, map: "HashMap", select: callable) -> None:
+        """
+        Initialize the iterator at the first slot. Any incremental rehash
+        is finished first so every entry is in the current slots. Entries
+        that have expired by now are skipped, as get would report them
+        missing.
+        """
+        map._finish_rehash()
+        self._now = map._clock() if map._has_ttl else None
+        self._map = map
+        self._select = select
+        self._buckets = map._buckets
+        self._capacity = map._capacity
+        self._index = 0
+        self._modifications = map._modifications
+
+    def __iter__(self) -> "HashMapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self):
+        """Obtain next value and advance iterator."""
+        if self._map._modifications != self._modifications:
+            raise RuntimeError('HashMap changed during iteration')
+
+        # Skip empty slots, tombstones and expired entries
+        while self._index < self._capacity:
+            entry = self._buckets.get_unchecked(self._index)
+            self._index += 1
+            if entry and entry.is_tombstone == False and \
+                    (self._now is None or entry.expires is None or
+                     entry.expires > self._now):
+                return self._select(entry)
+        raise StopIteration
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function,
+                 rehash_step: int = 0, capacity_policy=None,
+                 tombstone_fraction: float = 0.25,
+                 shrink_load: float = 0.125) -> None:
         """
         Initialize new HashMap that uses
         quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        If rehash_step is above 0, growing the table is incremental: the old
+        and new slot arrays live side by side and every put, get and remove
+        moves rehash_step old slots across.
+        capacity_policy chooses table capacities (see PrimeCapacity,
+        PrimeLadderCapacity and PowerOfTwoCapacity in a6_include); by default
+        capacities are primes found with _next_prime.
+        The table is rebuilt at the same capacity once tombstones fill more
+        than tombstone_fraction of it, and halves (never below its starting
+        capacity) once the load drops below shrink_load.
         """
-        self._buckets = DynamicArray()
-
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        # capacity must be a prime number, or valid for the capacity policy
+        self._capacity_policy = capacity_policy
+        if capacity_policy is None:
+            self._capacity = self._next_prime(capacity)
+            self._probe_increment = 2
+        else:
+            self._capacity = capacity_policy.next_capacity(capacity)
+            self._probe_increment = capacity_policy.probe_increment
+            function = capacity_policy.hash_function(function)
+        self._buckets = DynamicArray.filled(self._capacity)
 
         self._hash_function = function
         self._size = 0
+        # Bumped by every insert, removal and resize, so iterators can tell
+        # that the map changed under them
+        self._modifications = 0
+
+        # Incremental rehash state; _old_buckets is None when not rehashing
+        self._rehash_step = rehash_step
+        # Slots each operation moves during a rehash; _grow raises it above
+        # rehash_step when that wouldn't finish before the next rehash
+        self._migrate_step = rehash_step
+        self._old_buckets = None
+        self._rehash_index = 0
+
+        # Tombstones in _buckets, and the limits that trigger cleanup
+        self._tombstones = 0
+        self._tombstone_fraction = tombstone_fraction
+        self._shrink_load = shrink_load
+        self._min_capacity = self._capacity
+
+        # Expiry state; nothing is checked or swept until a put gives a TTL
+        self._clock = monotonic
+        self._has_ttl = False
+        self._sweep_index = 0
+
+        # Operation counters; None until enable_stats is called
+        self._stats = None
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
+        self._finish_rehash()
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
@@ -85,32 +178,324 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
-    def put(self, key: str, value: object) -> None:
+    def _fit_capacity(self, capacity: int) -> int:
+        """
+        Return capacity if it is valid for the table, else the next valid
+        capacity above it.
+        """
+        if self._capacity_policy is not None:
+            return self._capacity_policy.next_capacity(capacity)
+        if self._is_prime(capacity):
+            return capacity
+        return self._next_prime(capacity)
+
+
+    def _fit_placement(self, capacity: int) -> int:
+        """
+        Return the valid capacity at or above capacity that the current
+        entries can be rebuilt into: at least twice the size, because
+        quadratic probing on a prime table only reaches half its slots and
+        a fuller table could leave an entry with nowhere to go.
+        """
+        return self._fit_capacity(max(capacity, 2 * self._size))
+
+
+    def put(self, key: str, value: object, ttl: float = None) -> None:
         """
         Updates the key:val pair in the Hash Table, inserting a new entry if not
         present. Also resizes the Hash Table when load factor = 1.
+        If ttl is given the entry expires ttl seconds from now; otherwise it
+        never expires.
+        """
+        self._before_insert()
+        expires = None
+        if ttl is not None:
+            expires = self._clock() + ttl
+            self._has_ttl = True
+        self._put_hashed(key, value, self._hash_function(key), expires)
+
+
+    def _before_insert(self) -> None:
+        """
+        Does the upkeep every operation that can add an entry starts with:
+        sweeps expired entries, moves an incremental rehash along, and grows
+        or compacts the table so half its slots stay free.
         """
+        if self._has_ttl:
+            self.sweep(TTL_SWEEP_STEP)
+        if self._old_buckets is not None:
+            self._migrate_slots(self._migrate_step)
         # Resize the HashTable if load >= 0.5
         if self.table_load() > 0.5:
-            self.resize_table(self._next_prime(self._capacity*2))
-        
-        initialIndex = self._hash_function(key) % self._capacity
-        j = 0
+            self._grow(self._fit_capacity(self._capacity*2))
+        # Live entries plus tombstones must also leave half the slots free,
+        # or probes for missing keys could visit the whole table. Compacting
+        # only pays off if it frees a good share of the slots; a table that
+        # is mostly live entries grows instead, or removes and inserts near
+        # the limit would compact every few operations
+        elif (self._size + self._tombstones) / self._capacity > 0.5:
+            if self._size / self._capacity > 0.25:
+                self._grow(self._fit_capacity(self._capacity*2))
+            else:
+                self._compact()
 
-        while self._buckets[(initialIndex + j**2) % self.get_capacity()] and \
-            self._buckets[(initialIndex + j**2) % self.get_capacity()].key != key and \
-            self._buckets[(initialIndex + j**2) % self.get_capacity()].is_tombstone == False:
-            j += 1
-        # Loop stops with j at the correct increment
+
+    def _put_hashed(self, key: str, value: object, hash: int,
+                    expires: float = None) -> None:
+        """
+        Updates or inserts key:val given the key's already computed hash,
+        setting the entry to expire at clock time expires (or never).
+        Does not check the table load.
+        """
+        # Keys still in the old table during a rehash are updated in place
+        oldIndex = self._old_slot(key, hash)
+        if oldIndex != -1:
+            entry = self._old_buckets[oldIndex]
+        else:
+            entry, index = self._probe(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if entry is None:
+            self._insert_at(index, key, value, hash, expires)
+            return
 
         # If overwriting, don't increment size
-        if self._buckets[(initialIndex + j**2) % self.get_capacity()] and \
-            self._buckets[(initialIndex + j**2) % self.get_capacity()].key == key and \
-            self._buckets[(initialIndex + j**2) % self.get_capacity()].is_tombstone == False:
-                self._buckets[(initialIndex + j**2) % self.get_capacity()] = HashEntry(key, value)
+        entry.value = value
+        if expires is not None or entry.expires is not None:
+            entry.expires = expires
+
+
+    def _probe(self, key: str, hash: int) -> tuple:
+        """
+        Probes the current table once for key given its already computed
+        hash. Returns (entry, index) for the live entry holding key, or
+        (None, index) where index is the slot a new entry for key belongs
+        in: the first tombstone passed, or the empty slot that ended the
+        probe.
+        """
+        slot = self._buckets.get_unchecked
+        capacity = self._capacity
+        index = hash % capacity
+        # Probe offsets (j**2, or triangular numbers for power of two
+        # capacities) are built up one step at a time
+        step, increment = 1, self._probe_increment
+        free = -1
+        probes = 0
+
+        # The key may sit past a tombstone, so keep probing until an empty
+        # slot, remembering the first tombstone to reuse
+        while probes < capacity:
+            entry = slot(index)
+            if entry is None:
+                break
+            if entry.is_tombstone:
+                if free == -1:
+                    free = index
+            # Cached hashes are compared first so most non-matching entries
+            # are skipped without a key comparison
+            elif entry.hash == hash and entry.key == key:
+                if self._stats is not None:
+                    self._stats.probes = probes + 1
+                return entry, index
+            index = (index + step) % capacity
+            step += increment
+            probes += 1
+
+        # The probe examined the slot it stopped at too
+        if self._stats is not None:
+            self._stats.probes = probes + 1
+        return None, (index if free == -1 else free)
+
+
+    def _insert_at(self, index: int, key: str, value: object, hash: int,
+                   expires: float = None) -> HashEntry:
+        """
+        Stores a new entry for a key known not to be in the Hash Table in
+        the slot at index, as found by _probe, and returns it.
+        """
+        if self._buckets.get_unchecked(index) is not None:
+            # Reusing a tombstone
+            self._tombstones -= 1
+        # A bytearray or memoryview key could change under the map
+        if isinstance(key, BUFFER_KEY_TYPES):
+            key = bytes(key)
+        entry = HashEntry(key, value, hash)
+        if expires is not None:
+            entry.expires = expires
+        self._buckets.set_unchecked(index, entry)
+        self._size += 1
+        self._modifications += 1
+        return entry
+
+
+    def _locate_slot(self, key: str, hash: int) -> tuple:
+        """
+        Returns (entry, index) for the live entry holding key given its
+        already computed hash, or (None, index) with the slot a new entry
+        belongs in, using a single probe. An expired entry is removed and
+        reported missing.
+        """
+        oldIndex = self._old_slot(key, hash)
+        if oldIndex != -1:
+            entry, index = self._old_buckets[oldIndex], -1
         else:
-            self._buckets[(initialIndex + j**2) % self.get_capacity()] = HashEntry(key, value)
-            self._size += 1
+            entry, index = self._probe(key, hash)
+        if entry is not None and entry.expires is not None and \
+                entry.expires <= self._clock():
+            # Expired entries are removed when they are looked up
+            self._remove_hashed(key, hash)
+            return self._probe(key, hash)
+        return entry, index
+
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes the Hash Table once so that count more entries can be added
+        without put triggering another resize.
+        """
+        needed = self._size + count
+        new_capacity = self._capacity
+        # Follow the same doubling sequence put would, but only rehash once
+        while needed / new_capacity > 0.5:
+            new_capacity = self._fit_capacity(new_capacity*2)
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
+        elif (needed + self._tombstones) / self._capacity > 0.5:
+            self._compact()
+
+
+    def _compact(self) -> None:
+        """
+        Rebuilds the Hash Table at its current capacity, dropping every
+        tombstone. With rehash_step the rebuild is incremental, like growth.
+        """
+        self._grow(self._capacity)
+
+
+    def _after_remove(self) -> None:
+        """
+        Compacts the Hash Table if tombstones have built up, and shrinks it
+        if the load has dropped below the low-water mark.
+        """
+        # Removals never use up free slots, so both can wait for a rehash
+        # in progress to finish rather than forcing it to finish now
+        if self._old_buckets is not None:
+            return
+        if self._shrink_load and self.table_load() < self._shrink_load and \
+                self._capacity > self._min_capacity:
+            # Halve until the load is back above the low-water mark, then
+            # rehash once; rehashing drops the tombstones too
+            new_capacity = self._capacity
+            while self._size / new_capacity < self._shrink_load and \
+                    new_capacity > self._min_capacity:
+                new_capacity = self._fit_capacity(new_capacity // 2)
+            self._grow(max(new_capacity, self._min_capacity))
+        elif self._tombstones > self._tombstone_fraction * self._capacity:
+            self._compact()
+
+
+    def _grow(self, new_capacity: int) -> None:
+        """
+        Grows the Hash Table to new_capacity, either all at once or by
+        starting an incremental rehash. Compacting and shrinking rehash
+        through here too, at the same or a smaller capacity.
+        """
+        if self._rehash_step < 1:
+            self.resize_table(new_capacity)
+            return
+
+        # Only one rehash can be in progress at a time
+        start = perf_counter()
+        self._finish_rehash()
+        new_capacity = self._fit_placement(new_capacity)
+        self._modifications += 1
+        self._old_buckets = self._buckets
+        self._rehash_index = 0
+        self._capacity = new_capacity
+        self._buckets = DynamicArray.filled(new_capacity)
+        self._tombstones = 0
+
+        # Only inserts can start the next rehash before this one is done
+        # (see _after_remove), once the table is half full. Each operation
+        # moves enough old slots that this rehash is over by then, so
+        # _finish_rehash never has to move the rest in one go
+        headroom = max(new_capacity // 2 - self._size, 1)
+        self._migrate_step = max(
+            self._rehash_step, -(-self._old_buckets.length() // headroom))
+        if self._stats is not None:
+            self._stats.record_resize(perf_counter() - start)
+
+
+    def _migrate_slots(self, count: int) -> None:
+        """
+        Moves the entries in up to count slots of the old table into the new
+        one, ending the incremental rehash once every slot has been visited.
+        """
+        oldBuckets = self._old_buckets
+        slot = self._buckets.get_unchecked
+        capacity = self._capacity
+        while count > 0 and self._rehash_index < oldBuckets.length():
+            entry = oldBuckets.get_unchecked(self._rehash_index)
+            if entry and entry.is_tombstone == False:
+                index = entry.hash % capacity
+                step = 1
+                # Keys are unique across both tables, so any free slot will
+                # do; _grow left the new table at least twice the size, so
+                # the probe always reaches one
+                while slot(index) and slot(index).is_tombstone == False:
+                    index = (index + step) % capacity
+                    step += self._probe_increment
+                if slot(index) is not None:
+                    self._tombstones -= 1
+                self._buckets.set_unchecked(index, entry)
+            elif entry:
+                # Tombstones are freed as they are passed rather than all at
+                # once when the old table is dropped
+                oldBuckets.set_unchecked(self._rehash_index, OLD_TOMBSTONE)
+            # Migrated slots stay in place so old probe chains aren't cut
+            self._rehash_index += 1
+            count -= 1
+
+        if self._rehash_index == oldBuckets.length():
+            self._old_buckets = None
+
+
+    def _finish_rehash(self) -> None:
+        """
+        Completes any incremental rehash that is in progress.
+        """
+        if self._old_buckets is not None:
+            self._migrate_slots(self._old_buckets.length())
+
+
+    def _old_slot(self, key: str, hash: int) -> int:
+        """
+        Returns the index of key in the old table during an incremental
+        rehash, or -1 if there is no rehash or the key isn't there.
+        """
+        if self._old_buckets is None:
+            return -1
+        slot = self._old_buckets.get_unchecked
+        capacity = self._old_buckets.length()
+        index = hash % capacity
+        step = 1
+        probes = 0
+        # The old table is at least half full, so bound the probe sequence in
+        # case every slot it can reach is occupied
+        while probes < capacity:
+            entry = slot(index)
+            if entry is None:
+                break
+            # Slots below _rehash_index have already been migrated
+            if index >= self._rehash_index and entry.is_tombstone == False \
+                and entry.hash == hash and entry.key == key:
+                if self._stats is not None:
+                    self._stats.probes = probes + 1
+                return index
+            index = (index + step) % capacity
+            step += self._probe_increment
+            probes += 1
+        return -1
 
 
     def table_load(self) -> float:
@@ -120,6 +505,75 @@ class HashMap:
         return float(self.get_size() / self.get_capacity())
 
 
+    def enable_stats(self, hook: callable = None) -> None:
+        """
+        Starts counting the slots every get and put probes and timing
+        resizes (compactions and shrinks included), from zero. hook, if
+        given, is called as hook(event, value) after each one (see
+        OperationStats). Until this is called the map keeps no counters at
+        all.
+        """
+        self._stats = OperationStats(hook)
+
+
+    def disable_stats(self) -> None:
+        """
+        Stops counting and drops the counters.
+        """
+        self._stats = None
+
+
+    def stats(self) -> dict:
+        """
+        Returns a dict describing the Hash Table's health: its size, capacity
+        and load, its empty slots and tombstones, a histogram of the probes
+        a lookup of each live entry takes ({probes: entries}) with the
+        longest and the mean, the hash_distribution of its keys, and the
+        operation counters from enable_stats (None if stats are disabled).
+        Every entry's probe sequence is replayed, so this is O(n) probes.
+        """
+        self._finish_rehash()
+        capacity = self._capacity
+        lengths = {}
+        hashes = []
+        empty = 0
+        totalProbes = 0
+        for slot in range(capacity):
+            entry = self._buckets[slot]
+            if entry is None:
+                empty += 1
+                continue
+            if entry.is_tombstone:
+                continue
+            # Follow the entry's probe sequence from its home slot
+            index = entry.hash % capacity
+            step = 1
+            probes = 1
+            while index != slot and probes < capacity:
+                index = (index + step) % capacity
+                step += self._probe_increment
+                probes += 1
+            lengths[probes] = lengths.get(probes, 0) + 1
+            totalProbes += probes
+            hashes.append(entry.hash)
+
+        report = {
+            'size': self._size,
+            'capacity': capacity,
+            'load': self.table_load(),
+            'empty_slots': empty,
+            'tombstones': self._tombstones,
+            'tombstone_ratio': self._tombstones / capacity,
+            'probe_lengths': dict(sorted(lengths.items())),
+            'max_probes': max(lengths, default=0),
+            'mean_probes': totalProbes / len(hashes) if hashes else 0.0,
+        }
+        report.update(hash_distribution(hashes, capacity))
+        report['operations'] = None if self._stats is None \
+            else self._stats.as_dict()
+        return report
+
+
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the Hash Table.
@@ -129,116 +583,555 @@ class HashMap:
 
     def resize_table(self, new_capacity: int) -> None:
         """
-        Resizes the Hash Table to the next prime number.
+        Resizes the Hash Table to the next valid capacity (the next prime
+        number by default).
         """
         if new_capacity < self.get_size():
             return
         
-        # If new_capacity isn't prime, adjust up to next prime
-        if not self._is_prime(new_capacity):
-            prime_capacity = self._next_prime(new_capacity)
-        else:
-            prime_capacity = new_capacity
+        # If new_capacity isn't prime (or valid for the capacity policy),
+        # adjust up to the next valid capacity, leaving the table at most
+        # half full
+        table_capacity = self._fit_placement(new_capacity)
+        start = perf_counter()
+
+        # An explicit resize completes any incremental rehash first
+        self._finish_rehash()
 
         # Copy current entries into a temporary table
         tempArray = DynamicArray()
-        for entry in range(self.get_capacity()):
-            # If the entry exists and is not a tombstone, add it to the tempArray
-            if self._buckets[entry] and self._buckets[entry].is_tombstone == False:
-                tempArray.append(self._buckets[entry])
+        tempArray.extend(entry for entry in self._buckets
+                         if entry and entry.is_tombstone == False)
 
-        self._buckets = DynamicArray()
-        self._size = 0
-        # Increase the size of the Hash Table to prime_capacity
-        for _ in range(prime_capacity):
-            self._buckets.append(None)
-        
-        self._capacity = prime_capacity
+        # Allocate the new table in one step
+        self._buckets = DynamicArray.filled(table_capacity)
+        slot = self._buckets.get_unchecked
 
-        # Rehash the values from tempArray to self._buckets
-        for item in range(tempArray.length()):
-            self.put(tempArray[item].key, tempArray[item].value)
+        self._capacity = table_capacity
+        self._tombstones = 0
+        self._modifications += 1
+
+        # Move the existing entries from tempArray to self._buckets using their
+        # cached hashes; keys are unique so only an empty slot is needed
+        for entry in tempArray:
+            if entry.hash is None:
+                entry.hash = self._hash_function(entry.key)
+            index = entry.hash % table_capacity
+            step = 1
+            while slot(index) is not None:
+                index = (index + step) % table_capacity
+                step += self._probe_increment
+            self._buckets.set_unchecked(index, entry)
+
+        if self._stats is not None:
+            self._stats.record_resize(perf_counter() - start)
 
 
     def get(self, key: str) -> object:
         """
         Returns the value for the given key if it is in the Hash Table.
         """
-        initialIndex = self._hash_function(key) % self.get_capacity()
-        j = 0
-        while self._buckets[(initialIndex + j**2) % self.get_capacity()] is not None \
-            and self._buckets[(initialIndex + j**2) % self.get_capacity()].is_tombstone == False:
-            if self._buckets[(initialIndex + j**2) % self.get_capacity()].key == key:
-                return self._buckets[(initialIndex + j**2) % self.get_capacity()].value
-            j += 1
+        if self._old_buckets is not None:
+            self._migrate_slots(self._migrate_step)
+        return self._get_hashed(key, self._hash_function(key))
+
+
+    def _get_hashed(self, key: str, hash: int) -> object:
+        """
+        Returns the value for key given its already computed hash.
+        """
+        entry = self._locate(key, hash)
+        if self._stats is not None:
+            self._stats.record('get')
+        if entry is not None:
+            return entry.value
+
+
+    def _find_entry(self, key: str, hash: int) -> HashEntry:
+        """
+        Returns the live entry for key given its already computed hash,
+        looking in the old table during an incremental rehash, or None.
+        """
+        oldIndex = self._old_slot(key, hash)
+        if oldIndex != -1:
+            return self._old_buckets[oldIndex]
+
+        slot = self._buckets.get_unchecked
+        capacity = self._capacity
+        index = hash % capacity
+        step = 1
+        probes = 0
+        # Tombstones don't end the probe; the key may have been placed after
+        # an entry that has since been removed
+        while probes < capacity:
+            entry = slot(index)
+            if entry is None:
+                break
+            if entry.hash == hash and entry.key == key and \
+                    entry.is_tombstone == False:
+                if self._stats is not None:
+                    self._stats.probes = probes + 1
+                return entry
+            index = (index + step) % capacity
+            step += self._probe_increment
+            probes += 1
+
+        if self._stats is not None:
+            self._stats.probes = probes + 1
+
+
+    def _locate(self, key: str, hash: int) -> HashEntry:
+        """
+        Returns the live entry for key given its already computed hash, or
+        None, with a single probe. An expired entry is removed and reported
+        missing.
+        """
+        entry = self._find_entry(key, hash)
+        if entry is not None and entry.expires is not None and \
+                entry.expires <= self._clock():
+            # Expired entries become tombstones when they are looked up
+            self._remove_hashed(key, hash)
+            return None
+        return entry
 
 
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the key is in the Hash Table, else, False.
         """
-        if self.get(key):
-            return True
-        return False
+        if self._old_buckets is not None:
+            self._migrate_slots(self._migrate_step)
+        # Checks for the entry itself, so keys stored with a falsy value
+        # count too
+        entry = self._locate(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record('get')
+        return entry is not None
 
 
     def remove(self, key: str) -> None:
         """
         Removes a Hash Table entry with the given key from the Hash Table.
         """
-        initialIndex = self._hash_function(key) % self.get_capacity()
-        j = 0
-        while self._buckets[(initialIndex + j**2) % self.get_capacity()] is not None:
-            if self._buckets[(initialIndex + j**2) % self.get_capacity()].key == key and \
-                self._buckets[(initialIndex + j**2) % self.get_capacity()].is_tombstone == False:
-                self._buckets[(initialIndex + j**2) % self.get_capacity()].is_tombstone = True
-                self._size -= 1
+        if self._old_buckets is not None:
+            self._migrate_slots(self._migrate_step)
+        self._remove_hashed(key, self._hash_function(key))
+        self._after_remove()
+
+
+    def _remove_hashed(self, key: str, hash: int) -> HashEntry:
+        """
+        Removes the entry for key given its already computed hash, returning
+        the removed entry or None.
+        """
+        oldIndex = self._old_slot(key, hash)
+        if oldIndex != -1:
+            entry = self._old_buckets[oldIndex]
+            entry.is_tombstone = True
+            self._size -= 1
+            self._modifications += 1
+            return entry
+
+        slot = self._buckets.get_unchecked
+        capacity = self._capacity
+        index = hash % capacity
+        step = 1
+        probes = 0
+        while probes < capacity:
+            entry = slot(index)
+            if entry is None:
                 break
-            j += 1
+            if entry.hash == hash and entry.key == key and entry.is_tombstone == False:
+                entry.is_tombstone = True
+                self._size -= 1
+                self._tombstones += 1
+                self._modifications += 1
+                return entry
+            index = (index + step) % capacity
+            step += self._probe_increment
+            probes += 1
+        return None
+
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value for key, first inserting default if key is not in
+        the Hash Table. The key is hashed and probed for once.
+        """
+        self._before_insert()
+        hash = self._hash_function(key)
+        entry, index = self._locate_slot(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if entry is not None:
+            return entry.value
+        self._insert_at(index, key, default, hash)
+        return default
+
+
+    def get_or_insert(self, key: str, factory: callable) -> object:
+        """
+        Returns the value for key, first inserting factory() if key is not in
+        the Hash Table; factory is only called for a missing key.
+        """
+        self._before_insert()
+        hash = self._hash_function(key)
+        entry, index = self._locate_slot(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if entry is not None:
+            return entry.value
+        value = factory()
+        self._insert_at(index, key, value, hash)
+        return value
+
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes key from the Hash Table and returns its value, or returns
+        default if key is not in the Hash Table.
+        """
+        if self._old_buckets is not None:
+            self._migrate_slots(self._migrate_step)
+        entry = self._remove_hashed(key, self._hash_function(key))
+        if entry is None:
+            return default
+        self._after_remove()
+        if entry.expires is not None and entry.expires <= self._clock():
+            return default
+        return entry.value
+
+
+    def update_with(self, key: str, function: callable,
+                    default: object = None) -> object:
+        """
+        Stores function(value) under key, using default as the value of a
+        missing key, and returns the new value; e.g.
+        update_with(key, lambda count: count + 1, 0) counts key with one hash
+        and one probe.
+        """
+        self._before_insert()
+        hash = self._hash_function(key)
+        entry, index = self._locate_slot(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if entry is not None:
+            entry.value = function(entry.value)
+            return entry.value
+        value = function(default)
+        self._insert_at(index, key, value, hash)
+        return value
+
+
+    def _merge_hashed(self, key: str, value: object, hash: int,
+                      combine: callable) -> object:
+        """
+        Stores combine(old value, value) under key, given the key's already
+        computed hash, or value if the key is new, and returns what was
+        stored. Like put, it moves the rehash along and grows the table,
+        but the key is only probed for once.
+        """
+        self._before_insert()
+        entry, index = self._locate_slot(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if entry is None:
+            self._insert_at(index, key, value, hash)
+            return value
+        entry.value = combine(entry.value, value)
+        return entry.value
 
 
     def clear(self) -> None:
         """
         Clears the contents of the Hash Table while preserving capacity.
         """
-        for index in range(self._capacity):
-            self._buckets[index] = None
+        self._old_buckets = None
+        self._buckets = DynamicArray.filled(self._capacity)
         self._size = 0
+        self._tombstones = 0
+        self._modifications += 1
+        self._has_ttl = False
 
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Returns a Dynamic Array of (key, value) tuples of the Hash Table's
-        contents.
+        contents, leaving out expired entries.
         """
         outArray = DynamicArray()
-        for element in range(self.get_capacity()):
-            if self._buckets[element] and self._buckets[element].is_tombstone == False:
-                outArray.append((self._buckets[element].key, self._buckets[element].value))
+        for entry in self._live_entries():
+            outArray.append((entry.key, entry.value))
 
         return outArray
 
 
-    def __iter__(self):
+    def sweep(self, count: int = None) -> int:
         """
-        Initialize iterator.
+        Turns the expired entries in up to count slots into tombstones,
+        carrying on from where the last sweep stopped, or in every slot if
+        count is None. Returns the number of entries removed. put sweeps a
+        few slots itself once any entry has a TTL.
         """
-        self._index = 0
-        return self
+        if not self._has_ttl:
+            return 0
+        if count is None:
+            # Entries still in the old table are only swept once migrated
+            self._finish_rehash()
+        now = self._clock()
+        capacity = self._capacity
+        count = capacity if count is None else min(count, capacity)
+        removed = 0
+        for _ in range(count):
+            entry = self._buckets[self._sweep_index % capacity]
+            self._sweep_index = (self._sweep_index + 1) % capacity
+            if entry and entry.is_tombstone == False and \
+                    entry.expires is not None and entry.expires <= now:
+                entry.is_tombstone = True
+                self._size -= 1
+                self._tombstones += 1
+                self._modifications += 1
+                removed += 1
+        # Let the usual tombstone cleanup compact or shrink the table
+        if removed:
+            self._after_remove()
+        return removed
 
 
-    def __next__(self):
+    def keys(self) -> HashMapIterator:
         """
-        Obtain next value and advance iterator.
+        Returns an iterator over the Hash Table's keys. Nothing is copied,
+        and the iterator raises RuntimeError if the map gains or loses
+        entries or is resized while it is in use.
         """
-        if not self._buckets[self._index]:
-            while not self._buckets[self._index] or self._buckets[self._index].is_tombstone == True:
-                self._index += 1
+        return HashMapIterator(self, attrgetter('key'))
+
+
+    def values(self) -> HashMapIterator:
+        """
+        Returns an iterator over the Hash Table's values.
+        """
+        return HashMapIterator(self, attrgetter('value'))
+
+
+    def items(self) -> HashMapIterator:
+        """
+        Returns an iterator over (key, value) tuples of the Hash Table's
+        contents.
+        """
+        return HashMapIterator(self, attrgetter('key', 'value'))
+
+
+    def _live_entries(self) -> list:
+        """
+        Returns a list of the Hash Table's unexpired entries, finishing any
+        incremental rehash first. The separate chaining HashMap has the same
+        method, so either kind of map can be the other side of merge,
+        update, intersect_keys and difference.
+        """
+        self._finish_rehash()
+        now = self._clock()
+        slot = self._buckets.get_unchecked
+        return [entry for entry in map(slot, range(self._capacity))
+                if entry and entry.is_tombstone == False and
+                (entry.expires is None or entry.expires > now)]
+
+
+    def _relink(self, entries: list) -> None:
+        """
+        Replaces the table with one of the same capacity holding only
+        entries, placed using their cached hashes. The capacity only grows
+        if entries would fill more than half of it.
+        """
+        self._old_buckets = None
+        self._size = len(entries)
+        self._capacity = self._fit_placement(self._capacity)
+        self._buckets = DynamicArray.filled(self._capacity)
+        slot = self._buckets.get_unchecked
+        capacity = self._capacity
+        for entry in entries:
+            index = entry.hash % capacity
+            step = 1
+            while slot(index) is not None:
+                index = (index + step) % capacity
+                step += self._probe_increment
+            self._buckets.set_unchecked(index, entry)
+        self._tombstones = 0
+        self._modifications += 1
+
+
+    def merge(self, other: "HashMap", combine: callable = None) -> None:
+        """
+        Adds every entry of another HashMap, open addressing or separate
+        chaining, to this one. For keys in both maps the value becomes
+        combine(this value, other value), or the other map's value if
+        combine is None. Cached hashes are reused when both maps use the
+        same hash function.
+        """
+        if combine is None:
+            combine = lambda mine, theirs: theirs
+        sameFunction = other._hash_function is self._hash_function
+        for entry in other._live_entries():
+            hash = entry.hash if sameFunction else \
+                self._hash_function(entry.key)
+            self._merge_hashed(entry.key, entry.value, hash, combine)
+
+
+    def update(self, other) -> None:
+        """
+        Stores every entry of other, another HashMap, a mapping such as a
+        dict, or an iterable of (key, value) pairs, replacing the values of
+        keys already present.
+        """
+        if hasattr(other, '_live_entries'):
+            self.merge(other)
+        elif hasattr(other, 'items'):
+            # Iterating a mapping yields its keys, not (key, value) pairs
+            self.put_many(other.items())
         else:
-            self._index += 1
+            self.put_many(other)
+
+
+    def intersect_keys(self, other: "HashMap") -> None:
+        """
+        Removes every entry whose key is not in other, another HashMap.
+        The smaller map is walked and the larger one probed, reusing cached
+        hashes when both maps use the same hash function. If the other map
+        is the smaller one, the table is rebuilt from the entries it shares
+        with this one.
+        """
+        if other is self:
+            return
+        sameFunction = other._hash_function is self._hash_function
+        if self._size <= other.get_size():
+            # Walk this map, probing the other for each key
+            for entry in self._live_entries():
+                hash = entry.hash if sameFunction else \
+                    other._hash_function(entry.key)
+                if other._locate(entry.key, hash) is None:
+                    self._remove_hashed(entry.key, entry.hash)
+            self._after_remove()
+            return
+
+        # Walk the other map, collecting the entries it shares with this
+        # one, and rebuild the table from just those
+        self._finish_rehash()
+        kept = []
+        for theirs in other._live_entries():
+            hash = theirs.hash if sameFunction else \
+                self._hash_function(theirs.key)
+            entry = self._locate(theirs.key, hash)
+            if entry is not None:
+                kept.append(entry)
+        self._relink(kept)
+        self._after_remove()
+
+
+    def difference(self, other: "HashMap") -> None:
+        """
+        Removes every entry whose key is in other, another HashMap. The
+        smaller map is walked and the larger one probed, reusing cached
+        hashes when both maps use the same hash function.
+        """
+        if other is self:
+            self.clear()
+            return
+        sameFunction = other._hash_function is self._hash_function
+        if other.get_size() < self._size:
+            # Walk the other map, removing its keys from this one
+            for entry in other._live_entries():
+                hash = entry.hash if sameFunction else \
+                    self._hash_function(entry.key)
+                self._remove_hashed(entry.key, hash)
+        else:
+            # Walk this map, probing the other for each key
+            for entry in self._live_entries():
+                hash = entry.hash if sameFunction else \
+                    other._hash_function(entry.key)
+                if other._locate(entry.key, hash) is not None:
+                    self._remove_hashed(entry.key, entry.hash)
+        self._after_remove()
+
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates or inserts every (key, value) pair in pairs. The table is
+        resized at most once for the whole batch and all keys are hashed up
+        front.
+        """
+        pairs = list(pairs)
+        hashes = hash_keys(self._hash_function, [pair[0] for pair in pairs])
+        self._reserve(len(pairs))
+        for index in range(len(pairs)):
+            key, value = pairs[index]
+            self._put_hashed(key, value, hashes[index])
 
-        if self._index == self.get_capacity()-1 or not self._buckets[self._index]:
-            raise StopIteration  
 
-        return self._buckets[self._index]
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a Dynamic Array of the values for every key in keys, with
+        None for keys that are not in the Hash Table.
+        """
+        keys = list(keys)
+        hashes = hash_keys(self._hash_function, keys)
+        outArray = DynamicArray()
+        for index in range(len(keys)):
+            outArray.append(self._get_hashed(keys[index], hashes[index]))
+        return outArray
+
 
+    def remove_many(self, keys) -> None:
+        """
+        Removes the entries for every key in keys from the Hash Table.
+        """
+        keys = list(keys)
+        hashes = hash_keys(self._hash_function, keys)
+        for index in range(len(keys)):
+            self._remove_hashed(keys[index], hashes[index])
+        self._after_remove()
+
+
+    def save(self, path: str, compress: bool = False) -> None:
+        """
+        Writes the Hash Table's contents to a binary snapshot file at path,
+        zlib compressing it if compress is True. Cached hashes are saved too,
+        so load can skip rehashing when it uses the same hash function.
+        Entries with a TTL are saved with the time they have left.
+        """
+        # Expired entries are left out, and the rest keep the time they have
+        # left to live
+        now = self._clock()
+        entries = [(entry.key, entry.value, entry.hash,
+                    None if entry.expires is None else entry.expires - now)
+                   for entry in self._live_entries()]
+        write_snapshot(path, entries, len(entries), self._hash_function,
+                       compress)
+
+
+    def load(self, path: str) -> None:
+        """
+        Adds the contents of a snapshot file written by save to the Hash
+        Table. The table is resized once up front, then the entries are
+        inserted a chunk at a time as they are read. Entries saved with a
+        TTL expire once the time they had left when saved has passed again.
+        """
+        with SnapshotReader(path, self._hash_function) as reader:
+            self._reserve(reader.count)
+            for keys, values, hashes, ttls in reader:
+                if hashes is None:
+                    hashes = hash_keys(self._hash_function, keys)
+                now = self._clock()
+                for index in range(len(keys)):
+                    expires = None
+                    if ttls and ttls[index] is not None:
+                        expires = now + ttls[index]
+                        self._has_ttl = True
+                    self._put_hashed(keys[index], values[index],
+                                     hashes[index], expires)
+
+
+    def __iter__(self) -> HashMapIterator:
+        """
+        Returns an iterator over the live entries as HashEntry objects.
+        """
+        return HashMapIterator(self, lambda entry: entry)
@@ -0,0 +1,307 @@
+# Description: Implementation of an Open Addressing HashMap that keeps its
+#              slots in parallel flat arrays (hashes, keys, values, state)
+#              instead of one HashEntry object per slot.
+
+from array import array
+
+from a6_include import (BUFFER_KEY_TYPES, DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+
+
+# Slot states stored in the state byte array
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Stored hashes are masked to fit a signed 64-bit array slot
+HASH_MASK = (1 << 63) - 1
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, key_type: type = str) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+        key_type=int stores the keys unboxed in a typed array (they must fit
+        in a signed 64-bit integer; use function=int_hash), and
+        key_type=bytes stores bytes copies of bytearray and memoryview keys
+        (use function=bytes_hash, which hashes them in place).
+        """
+        self._key_type = key_type
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+        # Removed slots stay tombstones until the next resize
+        self._tombstones = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += str(i) + ': K: ' + str(self._keys[i]) + \
+                    ' V: ' + str(self._values[i]) + \
+                    ' TS: ' + str(self._states[i] == TOMBSTONE) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the slot columns with empty columns of the given capacity.
+        """
+        self._hashes = array('q', [0]) * capacity
+        if self._key_type is int:
+            self._keys = array('q', [0]) * capacity
+        else:
+            self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._states = bytearray(capacity)
+
+
+    def _find_slot(self, key: str, hash: int) -> int:
+        """
+        Returns the slot index holding key, or -1 if the key is not present.
+        Probing continues past tombstones and stops at the first empty slot.
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash % capacity
+        j = 0
+        while j < capacity:
+            state = states[index]
+            if state == EMPTY:
+                return -1
+            if state == LIVE and hashes[index] == hash and keys[index] == key:
+                return index
+            # Quadratic step: (i + (j+1)^2) - (i + j^2) = 2j + 1
+            j += 1
+            index = (index + 2 * j - 1) % capacity
+        return -1
+
+
+    def _insert_slot(self, key: str, hash: int) -> int:
+        """
+        Returns the slot index key should be written to: its current slot if
+        present, otherwise the first tombstone or empty slot on its probe path.
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash % capacity
+        free = -1
+        j = 0
+        while j < capacity:
+            state = states[index]
+            if state == EMPTY:
+                return index if free == -1 else free
+            if state == TOMBSTONE:
+                if free == -1:
+                    free = index
+            elif hashes[index] == hash and keys[index] == key:
+                return index
+            j += 1
+            index = (index + 2 * j - 1) % capacity
+        return free
+
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key:val pair in the Hash Table, inserting a new entry if not
+        present. Also resizes the Hash Table when load factor > 0.5.
+        """
+        # Resize the HashTable if load > 0.5
+        if self.table_load() > 0.5:
+            self.resize_table(self._next_prime(self._capacity*2))
+        # Live slots plus tombstones must also leave half the slots free, or
+        # probes for missing keys could visit the whole table; a table that
+        # is mostly tombstones is rebuilt at the same capacity instead
+        elif (self._size + self._tombstones) / self._capacity > 0.5:
+            if self.table_load() > 0.25:
+                self.resize_table(self._next_prime(self._capacity*2))
+            else:
+                self.resize_table(self._capacity)
+
+        hash = self._hash_function(key) & HASH_MASK
+        index = self._insert_slot(key, hash)
+
+        # If overwriting, don't increment size
+        if self._states[index] != LIVE:
+            if isinstance(key, BUFFER_KEY_TYPES):
+                key = bytes(key)
+            # The typed array stores come first, so an int key too big for
+            # the key array raises OverflowError before the slot's state or
+            # any count changes
+            self._keys[index] = key
+            self._hashes[index] = hash
+            if self._states[index] == TOMBSTONE:
+                self._tombstones -= 1
+            self._states[index] = LIVE
+            self._size += 1
+        self._values[index] = value
+
+
+    def table_load(self) -> float:
+        """
+        Returns the current Hash Table load.
+        """
+        return float(self.get_size() / self.get_capacity())
+
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the Hash Table.
+        """
+        return self.get_capacity() - self.get_size()
+
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the Hash Table to the next prime number. The new table is
+        kept at most half full, since quadratic probing on a prime table
+        only reaches half its slots, so the capacity can end up larger than
+        new_capacity. Tombstones are dropped.
+        """
+        if new_capacity < self.get_size():
+            return
+
+        # If new_capacity isn't prime, adjust up to next prime
+        new_capacity = max(new_capacity, 2 * self._size)
+        if not self._is_prime(new_capacity):
+            prime_capacity = self._next_prime(new_capacity)
+        else:
+            prime_capacity = new_capacity
+
+        oldStates, oldHashes = self._states, self._hashes
+        oldKeys, oldValues = self._keys, self._values
+
+        self._capacity = prime_capacity
+        self._allocate(prime_capacity)
+        self._tombstones = 0
+
+        # Rehash live slots straight into the new columns; stored hashes are
+        # reused and there are no duplicates or tombstones to check for
+        states, hashes = self._states, self._hashes
+        keys, values = self._keys, self._values
+        for old in range(len(oldStates)):
+            if oldStates[old] != LIVE:
+                continue
+            hash = oldHashes[old]
+            index = hash % prime_capacity
+            j = 0
+            while states[index] != EMPTY:
+                j += 1
+                index = (index + 2 * j - 1) % prime_capacity
+            states[index] = LIVE
+            hashes[index] = hash
+            keys[index] = oldKeys[old]
+            values[index] = oldValues[old]
+
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value for the given key if it is in the Hash Table.
+        """
+        index = self._find_slot(key, self._hash_function(key) & HASH_MASK)
+        if index != -1:
+            return self._values[index]
+
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the key is in the Hash Table, else, False.
+        """
+        return self._find_slot(key, self._hash_function(key) & HASH_MASK) != -1
+
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a Hash Table entry with the given key from the Hash Table.
+        """
+        index = self._find_slot(key, self._hash_function(key) & HASH_MASK)
+        if index != -1:
+            self._states[index] = TOMBSTONE
+            self._keys[index] = 0 if self._key_type is int else None
+            self._values[index] = None
+            self._size -= 1
+            self._tombstones += 1
+
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the Hash Table while preserving capacity.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a Dynamic Array of (key, value) tuples of the Hash Table's
+        contents.
+        """
+        outArray = DynamicArray()
+        for index in range(self._capacity):
+            if self._states[index] == LIVE:
+                outArray.append((self._keys[index], self._values[index]))
+
+        return outArray
+
+
+    def __iter__(self):
+        """
+        Returns an iterator over the live entries as HashEntry objects.
+        """
+        for index in range(self._capacity):
+            if self._states[index] == LIVE:
+                yield HashEntry(self._keys[index], self._values[index])
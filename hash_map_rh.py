@@ -0,0 +1,292 @@
+# Description: Implementation of an Open Addressing HashMap that uses Robin
+#              Hood linear probing with backward shift deletion, so it has no
+#              tombstones and keeps probe lengths short at high load factors.
+#              A standalone map with the core interface only; see README.
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+
+
+# Empty slots are marked in the hash column; stored hashes are masked to
+# 63 bits so they are never negative
+EMPTY = -1
+HASH_MASK = (1 << 63) - 1
+
+
+class HashMap:
+    def __init__(self, capacity: int, function,
+                 max_load: float = 0.85) -> None:
+        """
+        Initialize new HashMap that uses
+        Robin Hood linear probing for collision resolution
+        The table grows once an insert would push the load above max_load.
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._max_load = max_load
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._hashes[i] == EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += str(i) + ': K: ' + str(self._keys[i]) + \
+                    ' V: ' + str(self._values[i]) + \
+                    ' D: ' + str(self._distance(i)) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the slot columns with empty columns of the given capacity.
+        """
+        self._hashes = array('q', [EMPTY]) * capacity
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+
+
+    def _distance(self, index: int) -> int:
+        """
+        Returns how far the entry at index is from its home slot.
+        """
+        return (index - self._hashes[index] % self._capacity) % self._capacity
+
+
+    def _find_slot(self, key: str, hash: int) -> int:
+        """
+        Returns the slot index holding key, or -1 if the key is not present.
+        The search stops as soon as it reaches an entry closer to its home
+        slot than key would be, since Robin Hood insertion would have placed
+        key before it.
+        """
+        hashes, keys = self._hashes, self._keys
+        capacity = self._capacity
+        index = hash % capacity
+        distance = 0
+        while True:
+            slotHash = hashes[index]
+            if slotHash == EMPTY:
+                return -1
+            if slotHash == hash and keys[index] == key:
+                return index
+            if (index - slotHash % capacity) % capacity < distance:
+                return -1
+            index += 1
+            if index == capacity:
+                index = 0
+            distance += 1
+
+
+    def _place(self, hash: int, key: str, value: object) -> None:
+        """
+        Places an entry for a key known not to be in the table, displacing
+        entries that are closer to their home slot than the one being placed.
+        """
+        hashes, keys, values = self._hashes, self._keys, self._values
+        capacity = self._capacity
+        index = hash % capacity
+        distance = 0
+        while True:
+            slotHash = hashes[index]
+            if slotHash == EMPTY:
+                hashes[index] = hash
+                keys[index] = key
+                values[index] = value
+                return
+            slotDistance = (index - slotHash % capacity) % capacity
+            if slotDistance < distance:
+                # Take from the rich: swap in the entry being placed and
+                # carry on placing the one that was there
+                hashes[index], hash = hash, slotHash
+                keys[index], key = key, keys[index]
+                values[index], value = value, values[index]
+                distance = slotDistance
+            index += 1
+            if index == capacity:
+                index = 0
+            distance += 1
+
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key:val pair in the Hash Table, inserting a new entry if not
+        present. Also resizes the Hash Table when the load would pass max_load.
+        """
+        hash = self._hash_function(key) & HASH_MASK
+        index = self._find_slot(key, hash)
+        if index != -1:
+            self._values[index] = value
+            return
+
+        # Resize the HashTable if this insert would pass max_load
+        if (self._size + 1) / self._capacity > self._max_load:
+            self.resize_table(self._next_prime(self._capacity*2))
+
+        self._place(hash, key, value)
+        self._size += 1
+
+
+    def table_load(self) -> float:
+        """
+        Returns the current Hash Table load.
+        """
+        return float(self.get_size() / self.get_capacity())
+
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the Hash Table.
+        """
+        return self.get_capacity() - self.get_size()
+
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the Hash Table to the next prime number.
+        """
+        if new_capacity <= self.get_size():
+            return
+
+        # If new_capacity isn't prime, adjust up to next prime
+        if not self._is_prime(new_capacity):
+            prime_capacity = self._next_prime(new_capacity)
+        else:
+            prime_capacity = new_capacity
+
+        oldHashes, oldKeys, oldValues = self._hashes, self._keys, self._values
+        self._capacity = prime_capacity
+        self._allocate(prime_capacity)
+
+        # Re-place the entries using their stored hashes
+        for index in range(len(oldHashes)):
+            if oldHashes[index] != EMPTY:
+                self._place(oldHashes[index], oldKeys[index], oldValues[index])
+
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value for the given key if it is in the Hash Table.
+        """
+        index = self._find_slot(key, self._hash_function(key) & HASH_MASK)
+        if index != -1:
+            return self._values[index]
+
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the key is in the Hash Table, else, False.
+        """
+        return self._find_slot(key, self._hash_function(key) & HASH_MASK) != -1
+
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a Hash Table entry with the given key from the Hash Table.
+        Later entries in the cluster are shifted back one slot, so no
+        tombstone is left behind.
+        """
+        index = self._find_slot(key, self._hash_function(key) & HASH_MASK)
+        if index == -1:
+            return
+
+        hashes, keys, values = self._hashes, self._keys, self._values
+        capacity = self._capacity
+        following = index + 1 if index + 1 < capacity else 0
+        # Shift back every following entry that isn't in its home slot
+        while hashes[following] != EMPTY and \
+                hashes[following] % capacity != following:
+            hashes[index] = hashes[following]
+            keys[index] = keys[following]
+            values[index] = values[following]
+            index = following
+            following = index + 1 if index + 1 < capacity else 0
+
+        hashes[index] = EMPTY
+        keys[index] = None
+        values[index] = None
+        self._size -= 1
+
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the Hash Table while preserving capacity.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a Dynamic Array of (key, value) tuples of the Hash Table's
+        contents.
+        """
+        outArray = DynamicArray()
+        for index in range(self._capacity):
+            if self._hashes[index] != EMPTY:
+                outArray.append((self._keys[index], self._values[index]))
+
+        return outArray
+
+
+    def __iter__(self):
+        """
+        Returns an iterator over the entries as HashEntry objects.
+        """
+        for index in range(self._capacity):
+            if self._hashes[index] != EMPTY:
+                yield HashEntry(self._keys[index], self._values[index],
+                                self._hashes[index])
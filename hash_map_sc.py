@@ -5,40 +5,150 @@
 # Due Date: December 2, 2022
 # Description: Implementation of an Separate Chaining HashMap.
 
+from itertools import islice
+from multiprocessing import Pool
+from operator import add, attrgetter
+from time import monotonic, perf_counter
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+from a6_include import (BUFFER_KEY_TYPES, TTL_SWEEP_STEP, DynamicArray,
+                        LinkedList, OperationStats, SLNode, SnapshotReader,
+                        hash_distribution, hash_function_1, hash_function_2,
+                        hash_keys, write_snapshot)
+
+
+# Every empty bucket starts out as this one shared list, so building a table
+# is a single allocation. _bucket_at gives a bucket its own list before
+# anything is inserted, so this one always stays empty
+EMPTY_BUCKET = LinkedList()
+
+
+class HashMapIterator:
+    """
+    Separate iterator class for HashMap, walking the buckets in order and
+    returning select(node) for every unexpired node
+    """
+
+    def __init__(self, map: "HashMap", select: callable) -> None:
+        """
+        Initialize the iterator at the first bucket. Any incremental rehash
+        is finished first so every node is in the current buckets. Nodes
+        that have expired by now are skipped, as get would report them
+        missing.
+        """
+        map._finish_rehash()
+        self._now = map._clock() if map._has_ttl else None
+        self._map = map
+        self._select = select
+        self._buckets = map._buckets
+        self._capacity = map._capacity
+        self._index = 0
+        self._nodes = None
+        self._modifications = map._modifications
+
+    def __iter__(self) -> "HashMapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self):
+        """Obtain next value and advance iterator."""
+        if self._map._modifications != self._modifications:
+            raise RuntimeError('HashMap changed during iteration')
+
+        while True:
+            node = next(self._nodes, None) if self._nodes else None
+            while node is None:
+                # Move on to the next bucket that holds any nodes
+                while self._index < self._capacity and \
+                        self._buckets[self._index].length() == 0:
+                    self._index += 1
+                if self._index == self._capacity:
+                    raise StopIteration
+                self._nodes = iter(self._buckets[self._index])
+                self._index += 1
+                node = next(self._nodes, None)
+            if self._now is None or node.expires is None or \
+                    node.expires > self._now:
+                return self._select(node)
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 rehash_step: int = 0,
+                 capacity_policy=None) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        If rehash_step is above 0, growing the table is incremental: the old
+        and new bucket arrays live side by side and every put, get and remove
+        moves rehash_step old buckets across.
+        capacity_policy chooses table capacities (see PrimeCapacity,
+        PrimeLadderCapacity and PowerOfTwoCapacity in a6_include); by default
+        capacities are primes found with _next_prime.
         """
-        self._buckets = DynamicArray()
-
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        # capacity must be a prime number, or valid for the capacity policy
+        self._capacity_policy = capacity_policy
+        if capacity_policy is None:
+            self._capacity = self._next_prime(capacity)
+        else:
+            self._capacity = capacity_policy.next_capacity(capacity)
+            function = capacity_policy.hash_function(function)
+        self._buckets = DynamicArray.filled(self._capacity, EMPTY_BUCKET)
 
         self._hash_function = function
         self._size = 0
+        # Bumped by every insert, removal and resize, so iterators can tell
+        # that the map changed under them
+        self._modifications = 0
+
+        # Incremental rehash state; _old_buckets is None when not rehashing
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._rehash_index = 0
+
+        # Expiry state; nothing is checked or swept until a put gives a TTL
+        self._clock = monotonic
+        self._has_ttl = False
+        self._sweep_index = 0
+
+        # Operation counters; None until enable_stats is called
+        self._stats = None
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
+        self._finish_rehash()
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
         return out
 
+    def __getstate__(self) -> dict:
+        """
+        Return the map's state for pickling, with the buckets flattened to
+        a list of (key, value, hash) tuples so long chains don't recurse.
+        """
+        self._finish_rehash()
+        state = self.__dict__.copy()
+        # Stats hooks may not pickle, and the counters describe this copy
+        state['_stats'] = None
+        state['_buckets'] = [(node.key, node.value, node.hash)
+                             for index in range(self._capacity)
+                             for node in self._buckets[index]]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restore a pickled map, rebuilding its buckets from the cached hashes.
+        """
+        entries = state.pop('_buckets')
+        self.__dict__.update(state)
+        self._buckets = DynamicArray.filled(self._capacity, EMPTY_BUCKET)
+        for key, value, hash in entries:
+            self._bucket_at(hash % self._capacity).insert(key, value, hash)
+
     def _next_prime(self, capacity: int) -> int:
         """
         Increment from given number and the find the closest prime number
@@ -88,29 +198,210 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
-    def put(self, key: str, value: object) -> None:
+    def _fit_capacity(self, capacity: int) -> int:
+        """
+        Return capacity if it is valid for the table, else the next valid
+        capacity above it.
+        """
+        if self._capacity_policy is not None:
+            return self._capacity_policy.next_capacity(capacity)
+        if self._is_prime(capacity):
+            return capacity
+        return self._next_prime(capacity)
+
+
+    def put(self, key: str, value: object, ttl: float = None) -> None:
         """
         Updates the key:val pair in the Hash Table, inserting a new entry if not
         present. Also resizes the Hash Table when load factor = 1.
+        If ttl is given the entry expires ttl seconds from now; otherwise it
+        never expires.
         """
+        self._before_insert()
+        expires = None
+        if ttl is not None:
+            expires = self._clock() + ttl
+            self._has_ttl = True
+        self._put_hashed(key, value, self._hash_function(key), expires)
+
+
+    def _before_insert(self) -> None:
+        """
+        Does the upkeep every operation that can add an entry starts with:
+        sweeps expired entries, moves an incremental rehash along and grows
+        the table once its load reaches 1.
+        """
+        if self._has_ttl:
+            self.sweep(TTL_SWEEP_STEP)
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
         # Resize the HashTable if load >= 1
-        if self.table_load() >= 1:
-            self.resize_table(self._next_prime(self._capacity*2))
-        # Insert into the front of the LL returned at the hashIndex bucket
-        hashIndex = self._hash_function(key) % self._capacity
-        if self._buckets[hashIndex].contains(key):
+        if self._size >= self._capacity:
+            self._grow(self._fit_capacity(self._capacity*2))
+
+
+    def _put_hashed(self, key: str, value: object, hash: int,
+                    expires: float = None) -> None:
+        """
+        Updates or inserts key:val given the key's already computed hash,
+        setting the entry to expire at clock time expires (or never).
+        Does not check the table load.
+        """
+        node = self._find_node(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if node:
             # Overwrite old value
-            self._buckets[hashIndex].contains(key).value = value
+            node.value = value
+            if expires is not None or node.expires is not None:
+                node.expires = expires
         else:
-            # Create new value
-            self._buckets[hashIndex].insert(key, value)
-            self._size += 1
+            self._insert_hashed(key, value, hash, expires)
+
+
+    def _insert_hashed(self, key: str, value: object, hash: int,
+                       expires: float = None) -> SLNode:
+        """
+        Inserts a new node for a key known not to be in the Hash Table, at
+        the front of its bucket, and returns it. Does not check the table
+        load.
+        """
+        # A bytearray or memoryview key could change under the map
+        if isinstance(key, BUFFER_KEY_TYPES):
+            key = bytes(key)
+        # Create new value, caching its hash for later resizes
+        node = SLNode(key, value, None, hash)
+        if expires is not None:
+            node.expires = expires
+        self._bucket_at(hash % self._capacity).insert_node(node)
+        self._size += 1
+        self._modifications += 1
+        return node
+
+
+    def _merge_hashed(self, key: str, value: object, hash: int,
+                      combine: callable) -> object:
+        """
+        Stores combine(old value, value) under key, given the key's already
+        computed hash, or value if the key is new, and returns what was
+        stored. Like put, it moves the rehash along and grows the table,
+        but the key's bucket is only walked once.
+        """
+        self._before_insert()
+        node = self._locate(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if node is None:
+            self._insert_hashed(key, value, hash)
+            return value
+        node.value = combine(node.value, value)
+        return node.value
+
+
+    def _add_hashed(self, key: str, amount: int, hash: int) -> int:
+        """
+        Adds amount to the number stored under key, given the key's already
+        computed hash, storing amount if the key is new. Returns the new
+        number.
+        """
+        return self._merge_hashed(key, amount, hash, add)
+
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes the Hash Table once so that count more entries can be added
+        without put triggering another resize.
+        """
+        needed = self._size + count
+        new_capacity = self._capacity
+        # Follow the same doubling sequence put would, but only rehash once
+        while needed > new_capacity:
+            new_capacity = self._fit_capacity(new_capacity*2)
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
+
+
+    def _grow(self, new_capacity: int) -> None:
+        """
+        Grows the Hash Table to new_capacity, either all at once or by
+        starting an incremental rehash.
+        """
+        if self._rehash_step < 1:
+            self.resize_table(new_capacity)
+            return
+
+        # Only one rehash can be in progress at a time. The new buckets start
+        # out empty and get their own lists as nodes arrive, so starting a
+        # rehash doesn't allocate every LinkedList
+        start = perf_counter()
+        self._finish_rehash()
+        self._modifications += 1
+        self._old_buckets = self._buckets
+        self._rehash_index = 0
+        self._capacity = new_capacity
+        self._buckets = DynamicArray.filled(new_capacity, EMPTY_BUCKET)
+        if self._stats is not None:
+            self._stats.record_resize(perf_counter() - start)
+
+
+    def _migrate_buckets(self, count: int) -> None:
+        """
+        Moves up to count buckets from the old bucket array into the new one,
+        ending the incremental rehash once every bucket has been moved.
+        """
+        oldBuckets = self._old_buckets
+        while count > 0 and self._rehash_index < oldBuckets.length():
+            # Nodes are relinked rather than copied, so they keep any extra
+            # fields a subclass gave them
+            for node in oldBuckets[self._rehash_index]:
+                self._bucket_at(node.hash % self._capacity).insert_node(node)
+            # Migrated buckets are never looked at again
+            oldBuckets[self._rehash_index] = None
+            self._rehash_index += 1
+            count -= 1
+
+        if self._rehash_index == oldBuckets.length():
+            self._old_buckets = None
+
+
+    def _bucket_at(self, index: int) -> LinkedList:
+        """
+        Returns the bucket at index for inserting into, first giving it a
+        list of its own if it is still the shared EMPTY_BUCKET.
+        """
+        bucket = self._buckets.get_unchecked(index)
+        if bucket is EMPTY_BUCKET:
+            bucket = LinkedList()
+            self._buckets.set_unchecked(index, bucket)
+        return bucket
+
+
+    def _finish_rehash(self) -> None:
+        """
+        Completes any incremental rehash that is in progress.
+        """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+
+
+    def _old_bucket(self, hash: int) -> LinkedList:
+        """
+        Returns the old bucket a hash maps to during an incremental rehash,
+        or None if there is no rehash or that bucket was already migrated.
+        """
+        if self._old_buckets is None:
+            return None
+        index = hash % self._old_buckets.length()
+        if index < self._rehash_index:
+            return None
+        return self._old_buckets[index]
 
 
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the Hash Table.
         """
+        self._finish_rehash()
         count = 0
         # Count of empty buckets
         for index in range(self.get_capacity()):
@@ -126,95 +417,598 @@ class HashMap:
         return self.get_size() / self.get_capacity()
 
 
+    def enable_stats(self, hook: callable = None) -> None:
+        """
+        Starts counting the chain nodes every get and put examines and
+        timing resizes, from zero. hook, if given, is called as
+        hook(event, value) after each one (see OperationStats). Until this
+        is called the map keeps no counters at all.
+        """
+        self._stats = OperationStats(hook)
+
+
+    def disable_stats(self) -> None:
+        """
+        Stops counting and drops the counters.
+        """
+        self._stats = None
+
+
+    def stats(self) -> dict:
+        """
+        Returns a dict describing the Hash Table's health: its size, capacity
+        and load, a histogram of chain lengths ({length: buckets}) with the
+        longest and the mean non-empty chain, the hash_distribution of its
+        keys, and the operation counters from enable_stats (None if stats
+        are disabled). Every bucket is walked, so this is O(n).
+        """
+        self._finish_rehash()
+        lengths = {}
+        hashes = []
+        for index in range(self._capacity):
+            bucket = self._buckets[index]
+            lengths[bucket.length()] = lengths.get(bucket.length(), 0) + 1
+            for node in bucket:
+                hashes.append(node.hash)
+
+        chains = self._capacity - lengths.get(0, 0)
+        report = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'load': self.table_load(),
+            'empty_buckets': lengths.get(0, 0),
+            'chain_lengths': dict(sorted(lengths.items())),
+            'max_chain': max(lengths),
+            'mean_chain': self._size / chains if chains else 0.0,
+        }
+        report.update(hash_distribution(hashes, self._capacity))
+        report['operations'] = None if self._stats is None \
+            else self._stats.as_dict()
+        return report
+
+
     def clear(self) -> None:
         """
         Clears the contents of the current Hash Table without affecting the 
         capacity.
         """
-        for index in range(self._capacity):
-            self._buckets[index] = LinkedList()
+        self._old_buckets = None
+        self._buckets = DynamicArray.filled(self._capacity, EMPTY_BUCKET)
         self._size = 0
+        self._modifications += 1
+        self._has_ttl = False
 
 
     def resize_table(self, new_capacity: int) -> None:
         """
-        Resizes the Hash Table to the next prime number.
+        Resizes the Hash Table to the next valid capacity (the next prime
+        number by default).
         """
         # If resize is 0 or the same as current capacity, do nothing
         if new_capacity < 1:
             return
 
-        # If new_capacity isn't prime, adjust up to next prime
-        if not self._is_prime(new_capacity):
-            prime_capacity = self._next_prime(new_capacity)
-        else:
-            prime_capacity = new_capacity
+        # If new_capacity isn't prime (or valid for the capacity policy),
+        # adjust up to the next valid capacity
+        table_capacity = self._fit_capacity(new_capacity)
+        start = perf_counter()
+
+        # An explicit resize completes any incremental rehash first
+        self._finish_rehash()
 
         # Store current Hash Table contents in a temporary dynamic array
         tempArray = DynamicArray()
-        for element in range(self._buckets.length()):
-            if self._buckets[element].length() != 0:
+        for bucket in self._buckets:
+            if bucket.length() != 0:
                 # If there is something at index, go through the LL
-                for node in self._buckets[element]:
-                    tempArray.append(node)
+                tempArray.extend(bucket)
 
-        # Clear the existing contents from the Hash Table
-        self.clear()
+        # Allocate the new, empty buckets in one step
+        self._modifications += 1
+        self._capacity = table_capacity
+        self._buckets = DynamicArray.filled(self._capacity, EMPTY_BUCKET)
 
-        # Add the appropriate number of buckets to the Hash Table
-        self._capacity = prime_capacity
-        self._buckets = DynamicArray()
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        # Rehash the nodes using their cached hashes; keys are already
+        # unique so they can be inserted without a duplicate check
+        for node in tempArray:
+            if node.hash is None:
+                node.hash = self._hash_function(node.key)
+            self._bucket_at(node.hash % self._capacity).insert_node(node)
 
-        # Rehash the values from tempDynamicArray to self._buckets
-        for index in range(tempArray.length()):
-            self.put(tempArray[index].key, tempArray[index].value)
+        if self._stats is not None:
+            self._stats.record_resize(perf_counter() - start)
 
 
     def get(self, key: str):
         """
         Returns the value associated with the parameter key.
         """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
         # Returns the value with the given key
-        if self._buckets[self._hash_function(key) % self._capacity].contains(key):
-            return self._buckets[self._hash_function(key) % self._capacity].contains(key).value
+        return self._get_hashed(key, self._hash_function(key))
+
+
+    def _get_hashed(self, key: str, hash: int):
+        """
+        Returns the value for key given its already computed hash.
+        """
+        node = self._locate(key, hash)
+        if self._stats is not None:
+            self._stats.record('get')
+        if node is not None:
+            return node.value
+
+
+    def _find_node(self, key: str, hash: int):
+        """
+        Returns the node holding key given its already computed hash, looking
+        in the old buckets during an incremental rehash, or None.
+        """
+        if self._stats is not None:
+            return self._count_find_node(key, hash)
+
+        oldBucket = self._old_bucket(hash)
+        if oldBucket is not None:
+            node = oldBucket.contains(key, hash)
+            if node:
+                return node
+
+        return self._buckets.get_unchecked(
+            hash % self._capacity).contains(key, hash)
+
+
+    def _count_find_node(self, key: str, hash: int):
+        """
+        Does what _find_node does while stats are enabled, walking the
+        chains itself so the stats' probes are the number of nodes examined
+        in the bucket the lookup ended in.
+        """
+        probes = 0
+        for bucket in (self._old_bucket(hash),
+                       self._buckets.get_unchecked(hash % self._capacity)):
+            if bucket is None:
+                continue
+            probes = 0
+            for node in bucket:
+                probes += 1
+                if node.hash == hash and node.key == key:
+                    self._stats.probes = probes
+                    return node
+        self._stats.probes = probes
+        return None
+
+
+    def _locate(self, key: str, hash: int):
+        """
+        Returns the live node holding key given its already computed hash,
+        or None, with a single walk of its bucket. This is the lookup every
+        read-modify-write operation is built on; an expired node is removed
+        and reported missing.
+        """
+        node = self._find_node(key, hash)
+        if node is not None and node.expires is not None and \
+                node.expires <= self._clock():
+            # Expired entries are removed when they are looked up
+            self._remove_hashed(key, hash)
+            return None
+        return node
 
 
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the HashTable contains key, else, False.
         """
-        if self.get(key) is not None:
-            return True
-        return False
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+        # Checks for the node itself, so keys stored with None count too
+        node = self._locate(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record('get')
+        return node is not None
 
 
     def remove(self, key: str) -> None:
         """
         Removes an entry with a given key from the Hash Table.
         """
-        if self._buckets[self._hash_function(key) % self._capacity].contains(key):
-            self._buckets[self._hash_function(key) % self._capacity].remove(key)
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+        self._remove_hashed(key, self._hash_function(key))
+
+
+    def _remove_hashed(self, key: str, hash: int) -> SLNode:
+        """
+        Removes the entry for key given its already computed hash, returning
+        the removed node or None.
+        """
+        oldBucket = self._old_bucket(hash)
+        node = oldBucket.remove(key, hash) if oldBucket is not None else None
+        if node is None:
+            node = self._buckets.get_unchecked(
+                hash % self._capacity).remove(key, hash)
+        if node is not None:
             self._size -= 1
+            self._modifications += 1
+        return node
+
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value for key, first inserting default if key is not in
+        the Hash Table. The key is hashed and its bucket walked once.
+        """
+        self._before_insert()
+        hash = self._hash_function(key)
+        node = self._locate(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if node is not None:
+            return node.value
+        self._insert_hashed(key, default, hash)
+        return default
+
+
+    def get_or_insert(self, key: str, factory: callable) -> object:
+        """
+        Returns the value for key, first inserting factory() if key is not in
+        the Hash Table; factory is only called for a missing key.
+        """
+        self._before_insert()
+        hash = self._hash_function(key)
+        node = self._locate(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if node is not None:
+            return node.value
+        value = factory()
+        self._insert_hashed(key, value, hash)
+        return value
+
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes key from the Hash Table and returns its value, or returns
+        default if key is not in the Hash Table.
+        """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+        node = self._remove_hashed(key, self._hash_function(key))
+        if node is None or (node.expires is not None and
+                            node.expires <= self._clock()):
+            return default
+        return node.value
+
+
+    def update_with(self, key: str, function: callable,
+                    default: object = None) -> object:
+        """
+        Stores function(value) under key, using default as the value of a
+        missing key, and returns the new value; e.g.
+        update_with(key, lambda count: count + 1, 0) counts key with one hash
+        and one walk of its bucket.
+        """
+        self._before_insert()
+        hash = self._hash_function(key)
+        node = self._locate(key, hash)
+        if self._stats is not None:
+            self._stats.record('put')
+        if node is not None:
+            node.value = function(node.value)
+            return node.value
+        value = function(default)
+        self._insert_hashed(key, value, hash)
+        return value
 
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Returns a Dynamic Array of (key, value) tuples of the Hash Table's
-        contents.
+        contents, leaving out expired entries.
         """
         # Return a DA of tuples of key:value pairs
         outArray = DynamicArray()
-        
-        for element in range(self.get_capacity()):
-            if self._buckets[element].length != 0:
-                for node in self._buckets[element]:
-                    outArray.append((node.key, node.value))
+        for node in self._live_entries():
+            outArray.append((node.key, node.value))
+
+        return outArray
+
+
+    def sweep(self, count: int = None) -> int:
+        """
+        Removes the expired entries in up to count buckets, carrying on from
+        where the last sweep stopped, or in every bucket if count is None.
+        Returns the number of entries removed. put sweeps a few buckets
+        itself once any entry has a TTL.
+        """
+        if not self._has_ttl:
+            return 0
+        if count is None:
+            # Entries still in the old table are only swept once migrated
+            self._finish_rehash()
+        now = self._clock()
+        capacity = self._capacity
+        count = capacity if count is None else min(count, capacity)
+        removed = 0
+        for _ in range(count):
+            bucket = self._buckets[self._sweep_index % capacity]
+            self._sweep_index = (self._sweep_index + 1) % capacity
+            if bucket.length() == 0:
+                continue
+            expired = [node for node in bucket
+                       if node.expires is not None and node.expires <= now]
+            # Unlink through _remove_hashed so subclasses see every removal
+            for node in expired:
+                self._remove_hashed(node.key, node.hash)
+            removed += len(expired)
+        return removed
+
+
+    def keys(self) -> HashMapIterator:
+        """
+        Returns an iterator over the Hash Table's keys. Nothing is copied,
+        and the iterator raises RuntimeError if the map gains or loses
+        entries or is resized while it is in use.
+        """
+        return HashMapIterator(self, attrgetter('key'))
+
+
+    def values(self) -> HashMapIterator:
+        """
+        Returns an iterator over the Hash Table's values.
+        """
+        return HashMapIterator(self, attrgetter('value'))
+
+
+    def items(self) -> HashMapIterator:
+        """
+        Returns an iterator over (key, value) tuples of the Hash Table's
+        contents.
+        """
+        return HashMapIterator(self, attrgetter('key', 'value'))
+
+
+    def _live_entries(self) -> list:
+        """
+        Returns a list of the Hash Table's unexpired nodes, finishing any
+        incremental rehash first. The open addressing HashMap has the same
+        method, so either kind of map can be the other side of merge,
+        update, intersect_keys and difference.
+        """
+        self._finish_rehash()
+        now = self._clock()
+        return [node for index in range(self._capacity)
+                for node in self._buckets.get_unchecked(index)
+                if node.expires is None or node.expires > now]
+
+
+    def _aligned(self, other) -> bool:
+        """
+        Returns True if other is a separate chaining HashMap whose keys land
+        in the same buckets as this one's: same capacity and hash function,
+        and neither map in the middle of an incremental rehash.
+        """
+        return isinstance(other, HashMap) and \
+            other._capacity == self._capacity and \
+            other._hash_function is self._hash_function and \
+            self._old_buckets is None and other._old_buckets is None
+
+
+    def _relink(self, nodes: list) -> None:
+        """
+        Replaces the buckets with ones holding only nodes, relinked using
+        their cached hashes.
+        """
+        self._old_buckets = None
+        self._buckets = DynamicArray.filled(self._capacity, EMPTY_BUCKET)
+        for node in nodes:
+            self._bucket_at(node.hash % self._capacity).insert_node(node)
+        self._size = len(nodes)
+        self._modifications += 1
+
+
+    def merge(self, other: "HashMap", combine: callable = None) -> None:
+        """
+        Adds every entry of another HashMap, separate chaining or open
+        addressing, to this one. For keys in both maps the value becomes
+        combine(this value, other value), or the other map's value if
+        combine is None. Cached hashes are reused when both maps use the
+        same hash function.
+        """
+        if combine is None:
+            combine = lambda mine, theirs: theirs
+        sameFunction = other._hash_function is self._hash_function
+        for node in other._live_entries():
+            hash = node.hash if sameFunction else \
+                self._hash_function(node.key)
+            self._merge_hashed(node.key, node.value, hash, combine)
+
+
+    def update(self, other) -> None:
+        """
+        Stores every entry of other, another HashMap, a mapping such as a
+        dict, or an iterable of (key, value) pairs, replacing the values of
+        keys already present.
+        """
+        if hasattr(other, '_live_entries'):
+            self.merge(other)
+        elif hasattr(other, 'items'):
+            # Iterating a mapping yields its keys, not (key, value) pairs
+            self.put_many(other.items())
+        else:
+            self.put_many(other)
+
+
+    def intersect_keys(self, other: "HashMap") -> None:
+        """
+        Removes every entry whose key is not in other, another HashMap.
+        The smaller map is walked and the larger one probed, reusing cached
+        hashes when both maps use the same hash function. When the other
+        map is a separate chaining HashMap with the same capacity too,
+        matching keys sit in matching buckets, so the tables are compared
+        bucket by bucket without probing either one.
+        """
+        if other is self:
+            return
+        self._finish_rehash()
+        if self._aligned(other):
+            now = other._clock()
+            for index in range(self._capacity):
+                mine = self._buckets.get_unchecked(index)
+                if mine.length() == 0:
+                    continue
+                theirs = other._buckets.get_unchecked(index)
+                # Unlink through _remove_hashed so subclasses see every
+                # removal
+                for node in list(mine):
+                    match = theirs.contains(node.key, node.hash) \
+                        if theirs.length() else None
+                    if match is None or \
+                            match.expires is not None and match.expires <= now:
+                        self._remove_hashed(node.key, node.hash)
+            return
+
+        sameFunction = other._hash_function is self._hash_function
+        if self._size <= other.get_size():
+            # Walk this map, probing the other for each key
+            for node in self._live_entries():
+                hash = node.hash if sameFunction else \
+                    other._hash_function(node.key)
+                if other._locate(node.key, hash) is None:
+                    self._remove_hashed(node.key, node.hash)
+            return
+
+        # Walk the other map, collecting the nodes it shares with this one,
+        # and rebuild the table from just those
+        kept = []
+        for entry in other._live_entries():
+            hash = entry.hash if sameFunction else \
+                self._hash_function(entry.key)
+            node = self._locate(entry.key, hash)
+            if node is not None:
+                kept.append(node)
+        self._relink(kept)
+
+
+    def difference(self, other: "HashMap") -> None:
+        """
+        Removes every entry whose key is in other, another HashMap. The
+        smaller map is walked and the larger one probed, reusing cached
+        hashes when both maps use the same hash function, and aligned
+        separate chaining tables are compared bucket by bucket as in
+        intersect_keys.
+        """
+        if other is self:
+            self.clear()
+            return
+        self._finish_rehash()
+        if self._aligned(other):
+            now = other._clock()
+            for index in range(self._capacity):
+                mine = self._buckets.get_unchecked(index)
+                theirs = other._buckets.get_unchecked(index)
+                if mine.length() == 0 or theirs.length() == 0:
+                    continue
+                for node in list(mine):
+                    match = theirs.contains(node.key, node.hash)
+                    if match is not None and \
+                            (match.expires is None or match.expires > now):
+                        self._remove_hashed(node.key, node.hash)
+            return
+
+        sameFunction = other._hash_function is self._hash_function
+        if other.get_size() < self._size:
+            # Walk the other map, removing its keys from this one
+            for entry in other._live_entries():
+                hash = entry.hash if sameFunction else \
+                    self._hash_function(entry.key)
+                self._remove_hashed(entry.key, hash)
+            return
+
+        # Walk this map, probing the other for each key
+        for node in self._live_entries():
+            hash = node.hash if sameFunction else \
+                other._hash_function(node.key)
+            if other._locate(node.key, hash) is not None:
+                self._remove_hashed(node.key, node.hash)
+
 
+    def put_many(self, pairs) -> None:
+        """
+        Updates or inserts every (key, value) pair in pairs. The table is
+        resized at most once for the whole batch and all keys are hashed up
+        front.
+        """
+        pairs = list(pairs)
+        hashes = hash_keys(self._hash_function, [pair[0] for pair in pairs])
+        self._reserve(len(pairs))
+        for index in range(len(pairs)):
+            key, value = pairs[index]
+            self._put_hashed(key, value, hashes[index])
+
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a Dynamic Array of the values for every key in keys, with
+        None for keys that are not in the Hash Table.
+        """
+        keys = list(keys)
+        hashes = hash_keys(self._hash_function, keys)
+        outArray = DynamicArray()
+        for index in range(len(keys)):
+            outArray.append(self._get_hashed(keys[index], hashes[index]))
         return outArray
 
 
+    def remove_many(self, keys) -> None:
+        """
+        Removes the entries for every key in keys from the Hash Table.
+        """
+        keys = list(keys)
+        hashes = hash_keys(self._hash_function, keys)
+        for index in range(len(keys)):
+            self._remove_hashed(keys[index], hashes[index])
+
+
+    def save(self, path: str, compress: bool = False) -> None:
+        """
+        Writes the Hash Table's contents to a binary snapshot file at path,
+        zlib compressing it if compress is True. Cached hashes are saved too,
+        so load can skip rehashing when it uses the same hash function.
+        Entries with a TTL are saved with the time they have left.
+        """
+        # Expired entries are left out, and the rest keep the time they have
+        # left to live
+        now = self._clock()
+        entries = [(node.key, node.value, node.hash,
+                    None if node.expires is None else node.expires - now)
+                   for node in self._live_entries()]
+        write_snapshot(path, entries, len(entries), self._hash_function,
+                       compress)
+
+
+    def load(self, path: str) -> None:
+        """
+        Adds the contents of a snapshot file written by save to the Hash
+        Table. The table is resized once up front, then the entries are
+        inserted a chunk at a time as they are read. Entries saved with a
+        TTL expire once the time they had left when saved has passed again.
+        """
+        with SnapshotReader(path, self._hash_function) as reader:
+            self._reserve(reader.count)
+            for keys, values, hashes, ttls in reader:
+                if hashes is None:
+                    hashes = hash_keys(self._hash_function, keys)
+                now = self._clock()
+                for index in range(len(keys)):
+                    expires = None
+                    if ttls and ttls[index] is not None:
+                        expires = now + ttls[index]
+                        self._has_ttl = True
+                    self._put_hashed(keys[index], values[index],
+                                     hashes[index], expires)
+
+
 def find_mode(da: DynamicArray):
     """
     Returns a tuple of a Dynamic array with the modal values and their occurance.
@@ -222,17 +1016,14 @@ def find_mode(da: DynamicArray):
     map = HashMap(da.length(), hash_function_1)
     modeArray = DynamicArray()
     maxCount = 1
-    for element in range(da.length()):
-        count = 1   
-        if map.contains_key(da[element]):
-            count = map.get(da[element]) + 1
-            map.put(da[element], count)
-            # Update maxCount if new highest mode
-            if map.get(da[element]) >= maxCount:
-                maxCount = map.get(da[element])
-        else:
-            count = 1
-            map.put(da[element], count)
+    # Hash every element up front, then count each with a single bucket walk
+    keys = [da[element] for element in range(da.length())]
+    hashes = hash_keys(hash_function_1, keys)
+    for element in range(len(keys)):
+        count = map._add_hashed(keys[element], 1, hashes[element])
+        # Update maxCount if new highest mode
+        if count > maxCount:
+            maxCount = count
 
     tupleArray = map.get_keys_and_values()
     for item in range(tupleArray.length()):
@@ -241,3 +1032,67 @@ def find_mode(da: DynamicArray):
 
     return (modeArray, maxCount)
 
+
+def _count_chunk(keys: list) -> HashMap:
+    """
+    Returns a HashMap counting every key in keys, built in a worker process.
+    """
+    map = HashMap(11, hash_function_1)
+    hashes = hash_keys(hash_function_1, keys)
+    for index in range(len(keys)):
+        map._add_hashed(keys[index], 1, hashes[index])
+    return map
+
+
+def _split(source, chunk_size: int):
+    """
+    Yields lists of up to chunk_size keys from a DynamicArray or any other
+    iterable, such as an open file.
+    """
+    if isinstance(source, DynamicArray):
+        for start in range(0, source.length(), chunk_size):
+            end = min(start + chunk_size, source.length())
+            yield [source[index] for index in range(start, end)]
+        return
+
+    source = iter(source)
+    while True:
+        chunk = list(islice(source, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parallel_find_mode(source, processes: int = None,
+                       chunk_size: int = 65536):
+    """
+    Returns the same modal values and count as find_mode, counting chunks of
+    the source in a pool of worker processes. source can be a DynamicArray
+    or any iterable, which is read one chunk at a time. Each worker counts a
+    chunk into its own HashMap, and the partial maps are merged as they
+    arrive.
+    """
+    map = None
+    with Pool(processes) as pool:
+        for partial in pool.imap_unordered(_count_chunk,
+                                           _split(source, chunk_size)):
+            # The first partial map becomes the result the rest merge into
+            if map is None:
+                map = partial
+            else:
+                map.merge(partial, add)
+
+    modeArray = DynamicArray()
+    maxCount = 1
+    if map is None:
+        return (modeArray, maxCount)
+
+    tupleArray = map.get_keys_and_values()
+    for item in range(tupleArray.length()):
+        if tupleArray[item][1] > maxCount:
+            maxCount = tupleArray[item][1]
+    for item in range(tupleArray.length()):
+        if tupleArray[item][1] == maxCount:
+            modeArray.append(tupleArray[item][0])
+
+    return (modeArray, maxCount)
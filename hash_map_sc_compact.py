@@ -0,0 +1,357 @@
+# Description: Implementation of a Separate Chaining HashMap that keeps its
+#              chains as index links into shared flat arrays (hashes, keys,
+#              values, next) instead of a LinkedList of SLNodes per bucket.
+
+from array import array
+
+from a6_include import (BUFFER_KEY_TYPES, DynamicArray, SLNode, bytes_hash,
+                        hash_function_1, hash_function_2, int_hash)
+
+
+# End of a chain, and the head of an empty bucket
+NO_ENTRY = -1
+
+# Stored hashes are masked to fit a signed 64-bit array slot
+HASH_MASK = (1 << 63) - 1
+
+
+class HashMap:
+    def __init__(self, capacity: int = 11,
+                 function: callable = None,
+                 key_type: type = str) -> None:
+        """
+        Initialize new HashMap that uses
+        separate chaining for collision resolution
+        Each bucket is a single integer, the index of its first entry, and
+        each entry is one slot in the hash, key, value and next arrays.
+        key_type=int stores the keys unboxed in the typed key array (they
+        must fit in a signed 64-bit integer) and hashes them with int_hash
+        by default; key_type=bytes hashes bytes, bytearray and memoryview
+        keys in place with bytes_hash by default and stores bytes copies.
+        Other keys are hashed with hash_function_1 by default.
+        """
+        if function is None:
+            function = {int: int_hash, bytes: bytes_hash}.get(
+                key_type, hash_function_1)
+        self._key_type = key_type
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._heads = array('q', [NO_ENTRY]) * self._capacity
+        self._allocate(0)
+
+        self._hash_function = function
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            chain = []
+            index = self._heads[i]
+            while index != NO_ENTRY:
+                chain.append(str(SLNode(self._keys[index],
+                                        self._values[index])))
+                index = self._links[index]
+            if chain:
+                out += str(i) + ': SLL [' + ' -> '.join(chain) + ']\n'
+            else:
+                out += str(i) + ': SLL []\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number and the find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, count: int) -> None:
+        """
+        Replaces the entry columns with columns of count unused entries,
+        with no free list.
+        """
+        self._hashes = array('q', [0]) * count
+        if self._key_type is int:
+            self._keys = array('q', [0]) * count
+        else:
+            self._keys = [None] * count
+        self._values = [None] * count
+        self._links = array('q', [NO_ENTRY]) * count
+        # Removed entries are chained through _links for reuse
+        self._free = NO_ENTRY
+
+
+    def _find_index(self, key: str, hash: int) -> int:
+        """
+        Returns the entry index holding key, or NO_ENTRY if the key is not
+        present.
+        """
+        hashes, keys, links = self._hashes, self._keys, self._links
+        index = self._heads[hash % self._capacity]
+        # Cached hashes are compared first so most non-matching entries are
+        # skipped without a key comparison
+        while index != NO_ENTRY:
+            if hashes[index] == hash and keys[index] == key:
+                return index
+            index = links[index]
+        return NO_ENTRY
+
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key:val pair in the Hash Table, inserting a new entry if not
+        present. Also resizes the Hash Table when load factor = 1.
+        """
+        # Resize the HashTable if load >= 1
+        if self._size >= self._capacity:
+            self.resize_table(self._capacity*2)
+
+        hash = self._hash_function(key) & HASH_MASK
+        index = self._find_index(key, hash)
+        if index != NO_ENTRY:
+            # Overwrite old value
+            self._values[index] = value
+            return
+
+        if isinstance(key, BUFFER_KEY_TYPES):
+            key = bytes(key)
+        # Reuse a removed entry's slot, or add one to the end of the columns
+        # The key is stored first, so an int key too big for the typed key
+        # array raises OverflowError before anything else changes
+        if self._free != NO_ENTRY:
+            index = self._free
+            self._keys[index] = key
+            self._free = self._links[index]
+            self._hashes[index] = hash
+            self._values[index] = value
+        else:
+            index = len(self._keys)
+            self._keys.append(key)
+            self._hashes.append(hash)
+            self._values.append(value)
+            self._links.append(NO_ENTRY)
+
+        # New entries go at the front of their bucket's chain
+        bucket = hash % self._capacity
+        self._links[index] = self._heads[bucket]
+        self._heads[bucket] = index
+        self._size += 1
+
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the Hash Table.
+        """
+        return self._heads.count(NO_ENTRY)
+
+
+    def table_load(self) -> float:
+        """
+        Returns the table load of the Hash Table.
+        """
+        return self.get_size() / self.get_capacity()
+
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the current Hash Table without affecting the
+        capacity.
+        """
+        self._heads = array('q', [NO_ENTRY]) * self._capacity
+        self._allocate(0)
+        self._size = 0
+
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the Hash Table to the next prime number.
+        The entries are rewritten in bucket order, so afterwards every chain
+        is a contiguous run of entries and the free list is empty.
+        """
+        # If resize is 0 or less, do nothing
+        if new_capacity < 1:
+            return
+
+        # If new_capacity isn't prime, adjust up to next prime
+        if not self._is_prime(new_capacity):
+            prime_capacity = self._next_prime(new_capacity)
+        else:
+            prime_capacity = new_capacity
+
+        # Collect the live entries by walking every chain
+        oldHashes, oldKeys = self._hashes, self._keys
+        oldValues, oldLinks = self._values, self._links
+        live = []
+        for bucket in range(self._capacity):
+            index = self._heads[bucket]
+            while index != NO_ENTRY:
+                live.append(index)
+                index = oldLinks[index]
+
+        # Counting sort the entries by their new bucket, using the stored
+        # hashes, to find where each bucket's run starts
+        counts = array('q', [0]) * (prime_capacity + 1)
+        for index in live:
+            counts[oldHashes[index] % prime_capacity + 1] += 1
+        for bucket in range(prime_capacity):
+            counts[bucket + 1] += counts[bucket]
+
+        self._capacity = prime_capacity
+        self._heads = array('q', [NO_ENTRY]) * prime_capacity
+        self._allocate(len(live))
+        hashes, keys = self._hashes, self._keys
+        values, links = self._values, self._links
+
+        # Place each entry in its bucket's run; every entry but the last in a
+        # run links to the one after it
+        for index in live:
+            hash = oldHashes[index]
+            bucket = hash % prime_capacity
+            position = counts[bucket]
+            counts[bucket] += 1
+            hashes[position] = hash
+            keys[position] = oldKeys[index]
+            values[position] = oldValues[index]
+            if self._heads[bucket] == NO_ENTRY:
+                self._heads[bucket] = position
+            else:
+                links[position - 1] = position
+
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the parameter key.
+        """
+        index = self._find_index(key, self._hash_function(key) & HASH_MASK)
+        if index != NO_ENTRY:
+            return self._values[index]
+
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the HashTable contains key, else, False.
+        """
+        return self._find_index(
+            key, self._hash_function(key) & HASH_MASK) != NO_ENTRY
+
+
+    def remove(self, key: str) -> None:
+        """
+        Removes an entry with a given key from the Hash Table.
+        """
+        hash = self._hash_function(key) & HASH_MASK
+        bucket = hash % self._capacity
+        hashes, keys, links = self._hashes, self._keys, self._links
+
+        previous, index = NO_ENTRY, self._heads[bucket]
+        while index != NO_ENTRY:
+            if hashes[index] == hash and keys[index] == key:
+                # Unlink the entry from its chain
+                if previous == NO_ENTRY:
+                    self._heads[bucket] = links[index]
+                else:
+                    links[previous] = links[index]
+                # Drop its references and put it on the free list
+                keys[index] = 0 if self._key_type is int else None
+                self._values[index] = None
+                links[index] = self._free
+                self._free = index
+                self._size -= 1
+                return
+            previous, index = index, links[index]
+
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a Dynamic Array of (key, value) tuples of the Hash Table's
+        contents.
+        """
+        outArray = DynamicArray()
+        for key, value in self.items():
+            outArray.append((key, value))
+
+        return outArray
+
+
+    def items(self):
+        """
+        Returns an iterator over (key, value) tuples of the Hash Table's
+        contents, bucket by bucket.
+        """
+        keys, values, links = self._keys, self._values, self._links
+        for bucket in range(self._capacity):
+            index = self._heads[bucket]
+            while index != NO_ENTRY:
+                yield keys[index], values[index]
+                index = links[index]
+
+
+    def __iter__(self):
+        """
+        Returns an iterator over the entries as SLNode objects.
+        """
+        for key, value in self.items():
+            yield SLNode(key, value)
+
+
+def find_mode(da: DynamicArray):
+    """
+    Returns a tuple of a Dynamic array with the modal values and their occurance.
+    """
+    map = HashMap(da.length(), hash_function_1)
+    modeArray = DynamicArray()
+    maxCount = 1
+    for element in range(da.length()):
+        key = da[element]
+        count = map.get(key)
+        count = 1 if count is None else count + 1
+        map.put(key, count)
+        # Update maxCount if new highest mode
+        if count > maxCount:
+            maxCount = count
+
+    for key, count in map.items():
+        if count == maxCount:
+            modeArray.append(key)
+
+    return (modeArray, maxCount)
@@ -0,0 +1,351 @@
+# Description: Implementation of a sharded HashMap that partitions its keys
+#              across worker processes, each holding its own SC or OA
+#              HashMap, so a single map can use every core.
+
+from multiprocessing import Pipe, Process
+
+from a6_include import DynamicArray, hash_function_1
+import hash_map_oa
+import hash_map_sc
+
+
+def _shard_mode(map) -> tuple:
+    """
+    Returns (keys, count) for the keys with the highest value in a shard's
+    map, the shard's share of a find_mode aggregation. Like find_mode, the
+    count is never below 1, so an empty shard returns ([], 1).
+    """
+    keys = []
+    maxCount = 1
+    pairs = map.get_keys_and_values()
+    for item in range(pairs.length()):
+        key, count = pairs[item]
+        if count > maxCount:
+            keys, maxCount = [key], count
+        elif count == maxCount:
+            keys.append(key)
+    return keys, maxCount
+
+
+def _count_many(map, keys) -> None:
+    """
+    Adds one to the count stored under every key in keys.
+    """
+    for key in keys:
+        map.update_with(key, lambda count: count + 1, 0)
+
+
+# Commands a shard worker understands, applied to its own map
+_COMMANDS = {
+    'put': lambda map, key, value: map.put(key, value),
+    'get': lambda map, key: map.get(key),
+    'contains_key': lambda map, key: map.contains_key(key),
+    'remove': lambda map, key: map.remove(key),
+    'put_many': lambda map, pairs: map.put_many(pairs),
+    'get_many': lambda map, keys: map.get_many(keys),
+    'remove_many': lambda map, keys: map.remove_many(keys),
+    'count_many': _count_many,
+    'mode': _shard_mode,
+    'size': lambda map: map.get_size(),
+    'capacity': lambda map: map.get_capacity(),
+    'empty_buckets': lambda map: map.empty_buckets(),
+    'resize_table': lambda map, capacity: map.resize_table(capacity),
+    'clear': lambda map: map.clear(),
+    'get_keys_and_values': lambda map: map.get_keys_and_values(),
+}
+
+
+def _shard_worker(connection, map_type: str, capacity: int,
+                  function: callable) -> None:
+    """
+    Runs in a shard's process: builds its map, then answers commands from
+    the connection until it receives 'close'.
+    """
+    if map_type == 'oa':
+        map = hash_map_oa.HashMap(capacity, function)
+    else:
+        map = hash_map_sc.HashMap(capacity, function)
+
+    while True:
+        command, args = connection.recv()
+        if command == 'close':
+            break
+        try:
+            connection.send((True, _COMMANDS[command](map, *args)))
+        except Exception as error:
+            connection.send((False, error))
+    connection.close()
+
+
+class ShardedHashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 shards: int = 4,
+                 map_type: str = 'sc') -> None:
+        """
+        Initialize new ShardedHashMap that runs one worker process per shard.
+        map_type picks the HashMap each shard holds ('sc' or 'oa'), and
+        capacity is split across the shards. function must be picklable,
+        e.g. a module level function like hash_function_1.
+        """
+        self._shard_count = max(shards, 1)
+        shardCapacity = max(capacity // self._shard_count, 1)
+
+        self._connections = []
+        self._processes = []
+        for _ in range(self._shard_count):
+            parentEnd, childEnd = Pipe()
+            process = Process(target=_shard_worker, daemon=True,
+                              args=(childEnd, map_type, shardCapacity,
+                                    function))
+            process.start()
+            childEnd.close()
+            self._connections.append(parentEnd)
+            self._processes.append(process)
+
+    def __enter__(self) -> "ShardedHashMap":
+        """Return the map for use in a with block."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Shut the workers down at the end of a with block."""
+        self.close()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._broadcast('size'))
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the total of every shard's capacity
+        """
+        return sum(self._broadcast('capacity'))
+
+    # ------------------------------------------------------------------ #
+
+    def _shard_index(self, key: str) -> int:
+        """
+        Returns the index of the shard that owns key.
+        Shards are picked in this process with Python's built in hash, so
+        routing is consistent without running the map's hash function.
+        """
+        return hash(key) % self._shard_count
+
+
+    def _receive(self, index: int):
+        """
+        Returns the next result from a shard, raising the shard's error if
+        its command failed.
+        """
+        succeeded, result = self._connections[index].recv()
+        if not succeeded:
+            raise result
+        return result
+
+
+    def _call(self, index: int, command: str, *args):
+        """
+        Runs a command on one shard and returns its result.
+        """
+        self._connections[index].send((command, args))
+        return self._receive(index)
+
+
+    def _collect(self, indices) -> dict:
+        """
+        Returns a dict of the results from the shards at indices, each of
+        which has a command outstanding. Every reply is read before the
+        first shard's error is raised, so no reply is left in a pipe to be
+        taken later as the answer to another command.
+        """
+        results = {}
+        error = None
+        for index in indices:
+            succeeded, result = self._connections[index].recv()
+            if succeeded:
+                results[index] = result
+            elif error is None:
+                error = result
+        if error is not None:
+            raise error
+        return results
+
+
+    def _broadcast(self, command: str, *args) -> list:
+        """
+        Runs a command on every shard in parallel and returns their results
+        in shard order.
+        """
+        for connection in self._connections:
+            connection.send((command, args))
+        results = self._collect(range(self._shard_count))
+        return [results[index] for index in range(self._shard_count)]
+
+
+    def _scatter(self, command: str, groups: list) -> list:
+        """
+        Sends each shard its own group of items in parallel, skipping empty
+        groups, and returns the results (None for skipped shards).
+        """
+        for index in range(self._shard_count):
+            if groups[index]:
+                self._connections[index].send((command, (groups[index],)))
+        results = self._collect(index for index in range(self._shard_count)
+                                if groups[index])
+        return [results.get(index) for index in range(self._shard_count)]
+
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key:val pair in the owning shard.
+        """
+        self._call(self._shard_index(key), 'put', key, value)
+
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the parameter key.
+        """
+        return self._call(self._shard_index(key), 'get', key)
+
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the HashTable contains key, else, False.
+        """
+        return self._call(self._shard_index(key), 'contains_key', key)
+
+
+    def remove(self, key: str) -> None:
+        """
+        Removes an entry with a given key from the owning shard.
+        """
+        self._call(self._shard_index(key), 'remove', key)
+
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates or inserts every (key, value) pair in pairs, one message
+        per shard.
+        """
+        groups = [[] for _ in range(self._shard_count)]
+        for pair in pairs:
+            groups[self._shard_index(pair[0])].append(pair)
+        self._scatter('put_many', groups)
+
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a Dynamic Array of the values for every key in keys, with
+        None for keys that are not in the Hash Table.
+        """
+        keys = list(keys)
+        groups = [[] for _ in range(self._shard_count)]
+        shardOf = []
+        for key in keys:
+            shardOf.append(self._shard_index(key))
+            groups[shardOf[-1]].append(key)
+        results = self._scatter('get_many', groups)
+
+        # Put every shard's answers back in the order the keys were given
+        positions = [0] * self._shard_count
+        outArray = DynamicArray()
+        for index in shardOf:
+            outArray.append(results[index][positions[index]])
+            positions[index] += 1
+        return outArray
+
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes the entries for every key in keys, one message per shard.
+        """
+        groups = [[] for _ in range(self._shard_count)]
+        for key in keys:
+            groups[self._shard_index(key)].append(key)
+        self._scatter('remove_many', groups)
+
+
+    def count_many(self, keys) -> None:
+        """
+        Adds one to the count stored under every key in keys, counting a
+        missing key as 0. The shards count their keys in parallel.
+        """
+        groups = [[] for _ in range(self._shard_count)]
+        for key in keys:
+            groups[self._shard_index(key)].append(key)
+        self._scatter('count_many', groups)
+
+
+    def find_mode(self) -> tuple:
+        """
+        Returns a tuple of a Dynamic Array with the keys holding the highest
+        count and that count, aggregated across the shards in parallel.
+        """
+        modeArray = DynamicArray()
+        results = self._broadcast('mode')
+        maxCount = max(count for _, count in results)
+        for keys, count in results:
+            if count == maxCount:
+                for key in keys:
+                    modeArray.append(key)
+        return (modeArray, maxCount)
+
+
+    def table_load(self) -> float:
+        """
+        Returns the table load of the Hash Table.
+        """
+        return self.get_size() / self.get_capacity()
+
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets across every shard.
+        """
+        return sum(self._broadcast('empty_buckets'))
+
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes every shard so the total capacity is about new_capacity.
+        """
+        self._broadcast('resize_table',
+                        max(new_capacity // self._shard_count, 1))
+
+
+    def clear(self) -> None:
+        """
+        Clears the contents of every shard without affecting capacity.
+        """
+        self._broadcast('clear')
+
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a Dynamic Array of (key, value) tuples of the Hash Table's
+        contents, gathered from the shards in parallel.
+        """
+        outArray = DynamicArray()
+        for pairs in self._broadcast('get_keys_and_values'):
+            for item in range(pairs.length()):
+                outArray.append(pairs[item])
+        return outArray
+
+
+    def close(self) -> None:
+        """
+        Stops every shard's worker process.
+        """
+        for index in range(len(self._connections)):
+            try:
+                self._connections[index].send(('close', ()))
+            except (BrokenPipeError, OSError):
+                pass
+            self._processes[index].join()
+            self._connections[index].close()
+        self._connections = []
+        self._processes = []
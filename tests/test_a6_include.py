@@ -0,0 +1,116 @@
+import pytest
+
+from a6_include import (DynamicArray, DynamicArrayException, LinkedList,
+                        PowerOfTwoCapacity, PrimeCapacity,
+                        PrimeLadderCapacity, bytes_hash, fnv1a_hash,
+                        hash_function_1, hash_function_2, hash_keys,
+                        int_hash, make_seeded_hash, word_hash)
+
+
+KEYS = ['', 'a', 'hash map', 'a much longer key than eight bytes', 'ünïcödé',
+        'x' * 17]
+
+
+def test_linked_list_contains_checks_cached_hash():
+    chain = LinkedList()
+    chain.insert('a', 1, 5)
+    chain.insert('b', 2, 5)
+    assert chain.contains('a', 5).value == 1
+    assert chain.contains('a').value == 1
+    assert chain.contains('a', 6) is None
+    assert chain.contains('c', 5) is None
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2,
+                                      fnv1a_hash, word_hash])
+def test_batch_hashes_match_single_hashes(function):
+    assert list(function.batch(KEYS)) == [function(key) for key in KEYS]
+    assert hash_keys(function, KEYS) == [function(key) for key in KEYS]
+
+
+def test_seeded_hashes_differ_by_seed():
+    first, second = make_seeded_hash(1), make_seeded_hash(2)
+    assert first('key') == word_hash('key', 1)
+    assert first('key') != second('key')
+    assert list(first.batch(KEYS)) == [first(key) for key in KEYS]
+    assert all(0 <= hash < 1 << 64 for hash in hash_keys(fnv1a_hash, KEYS))
+
+
+def test_batch_hashes_without_numpy(monkeypatch):
+    import a6_include
+    monkeypatch.setattr(a6_include, 'np', None)
+    for function in (hash_function_1, hash_function_2, fnv1a_hash,
+                     word_hash):
+        assert list(function.batch(KEYS)) == [function(key) for key in KEYS]
+
+
+def test_prime_ladder_matches_trial_division():
+    ladder, primes = PrimeLadderCapacity(), PrimeCapacity()
+    assert all(primes.is_prime(rung) for rung in ladder.LADDER)
+    for capacity in (1, 4, 80, 1000, 5000, 700000):
+        assert primes.is_prime(ladder.next_capacity(capacity))
+        assert ladder.next_capacity(capacity) >= capacity
+    assert ladder.next_capacity(ladder.LADDER[-1] + 1) == \
+        primes.next_capacity(ladder.LADDER[-1] + 1)
+
+
+def test_power_of_two_capacity():
+    policy = PowerOfTwoCapacity()
+    assert [policy.next_capacity(n) for n in (1, 2, 3, 64, 65)] == \
+        [2, 2, 4, 64, 128]
+    mixed = policy.hash_function(hash_function_1)
+    # These keys' hash_function_1 hashes all share their low three bits;
+    # the finalizer spreads them over a power of two table
+    keys = ['`', 'h', 'p', 'x']
+    assert len({hash_function_1(key) % 8 for key in keys}) == 1
+    assert len({mixed(key) % 8 for key in keys}) > 1
+
+
+def test_dynamic_array_filled_extend_and_iterate():
+    array = DynamicArray.filled(3, 0)
+    array.extend(range(1, 3))
+    assert len(array) == array.length() == 5
+    assert list(array) == [0, 0, 0, 1, 2]
+    shared = DynamicArray.filled(2, [])
+    assert shared[0] is shared[1]
+
+
+def test_dynamic_array_slices_are_views():
+    array = DynamicArray(list(range(6)))
+    view = array[1:6:2]
+    assert list(view) == [1, 3, 5] and len(view) == view.length() == 3
+    view[1] = 'x'
+    assert array[3] == 'x'
+    assert list(array[-2:]) == [4, 5]
+    with pytest.raises(DynamicArrayException):
+        view[3]
+
+
+def test_dynamic_array_unchecked_access():
+    array = DynamicArray([1, 2])
+    array.set_unchecked(1, 5)
+    assert array.get_unchecked(1) == 5
+    with pytest.raises(DynamicArrayException):
+        array[2]
+    with pytest.raises(DynamicArrayException):
+        array[-1] = 0
+
+
+def test_int_hash_handles_negative_and_wide_keys():
+    keys = [0, 1, -1, (1 << 63) - 1, -(1 << 63), 1 << 70, -(1 << 70)]
+    hashes = [int_hash(key) for key in keys]
+    assert len(set(hashes)) == len(keys)
+    assert all(0 <= hash < 1 << 64 for hash in hashes)
+    assert int_hash.batch(keys) == hashes
+    assert int_hash.batch(keys[:3]) == hashes[:3]
+    assert int_hash(5, 1) != int_hash(5)
+
+
+def test_bytes_hash_reads_any_buffer_in_place():
+    for text in KEYS:
+        data = text.encode()
+        assert bytes_hash(data) == word_hash(text)
+        assert bytes_hash(bytearray(data)) == bytes_hash(data)
+        assert bytes_hash(memoryview(data)) == bytes_hash(data)
+    assert bytes_hash.batch([b'a', bytearray(b'b')]) == \
+        [bytes_hash(b'a'), bytes_hash(b'b')]
@@ -0,0 +1,45 @@
+import io
+import json
+from array import array
+
+import benchmark
+
+
+def test_percentiles():
+    samples = array('q', range(1, 101))
+    assert benchmark.percentiles(samples) == \
+        {'p50': 51, 'p90': 91, 'p99': 100, 'max': 100}
+    assert benchmark.percentiles(array('q')) is None
+
+
+def test_compare_flags_only_large_drops():
+    def result(speed):
+        return {'workload': 'insert', 'map': 'sc', 'hash': 'h', 'size': 10,
+                'ops_per_sec': speed}
+
+    assert benchmark.compare([result(95)], [result(100)], 0.1) == []
+    assert len(benchmark.compare([result(80)], [result(100)], 0.1)) == 1
+
+
+def test_every_workload_runs_on_every_map():
+    results = benchmark.benchmark(benchmark.WORKLOADS, benchmark.MAPS,
+                                  ['hash_function_1'], [50], 1, 1, False,
+                                  log=io.StringIO())
+    assert len(results) == len(benchmark.WORKLOADS) * len(benchmark.MAPS)
+    assert all(result['ops'] > 0 and result['seconds'] >= 0
+               for result in results)
+
+
+def test_main_writes_json_and_reports_regressions(tmp_path):
+    output = tmp_path / 'results.json'
+    arguments = ['--sizes', '50', '--workloads', 'insert', '--maps', 'sc',
+                 '--hashes', 'hash_function_1', '--repeat', '1',
+                 '--no-memory', '--output', str(output)]
+    assert benchmark.main(arguments) == 0
+    report = json.loads(output.read_text())
+    assert report['results'][0]['workload'] == 'insert'
+
+    report['results'][0]['ops_per_sec'] *= 100
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(report))
+    assert benchmark.main(arguments + ['--compare', str(baseline)]) == 1
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from a6_include import word_hash
+from hash_map_async import AsyncHashMap
+
+
+MAP_TYPES = ['sc', 'oa']
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def filled_map(map_type: str, count: int = 300) -> AsyncHashMap:
+    map = AsyncHashMap(11, word_hash, map_type, chunk_size=16)
+    asyncio.run(map.put_many(('k' + str(index), index)
+                             for index in range(count)))
+    return map
+
+
+@pytest.mark.parametrize('map_type', MAP_TYPES)
+def test_put_get_remove(map_type):
+    async def run():
+        map = AsyncHashMap(11, word_hash, map_type, chunk_size=4)
+        for index in range(100):
+            await map.put('k' + str(index), index)
+        await map.remove('k5')
+        values = await map.get_many(['k0', 'k5', 'k99', 'missing'])
+        return map, [values[index] for index in range(values.length())]
+    map, values = asyncio.run(run())
+    assert values == [0, None, 99, None]
+    assert map.get_size() == 99
+
+
+@pytest.mark.parametrize('map_type', MAP_TYPES)
+def test_resize_and_clear(map_type):
+    map = filled_map(map_type)
+
+    async def run():
+        await map.resize_table(2000)
+        assert map._map._old_buckets is None
+        assert map.get_capacity() >= 2000
+        assert await map.get('k150') == 150
+        await map.clear()
+        assert map.get_size() == 0 and await map.get('k150') is None
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('map_type', MAP_TYPES)
+def test_scans_see_every_entry_once(map_type):
+    map = filled_map(map_type)
+
+    async def run():
+        pairs = await map.get_keys_and_values()
+        walked = []
+        async for pair in map:
+            walked.append(pair)
+            if len(walked) == 10:
+                # Resizing mid-scan restarts the walk without repeats
+                await map.resize_table(1000)
+        return list(pairs), walked
+    pairs, walked = asyncio.run(run())
+    expected = sorted(('k' + str(index), index) for index in range(300))
+    assert sorted(pairs) == expected
+    assert sorted(walked) == expected
+
+
+@pytest.mark.parametrize('map_type', MAP_TYPES)
+def test_save_and_load_keep_remaining_ttl(map_type, tmp_path):
+    clock = FakeClock()
+    map = filled_map(map_type, 50)
+    map._map._clock = clock
+    path = str(tmp_path / 'snap')
+
+    async def run():
+        await map.put('short', 1, ttl=5)
+        await map.put('long', 2, ttl=50)
+        clock.now += 10
+        await map.save(path)
+        loaded = AsyncHashMap(11, word_hash, map_type)
+        loaded._map._clock = clock
+        await loaded.load(path)
+        return loaded
+    loaded = asyncio.run(run())
+    assert loaded.get_size() == 51
+    assert loaded._map.get('short') is None
+    assert loaded._map.get('k49') == 49
+    clock.now += 39
+    assert loaded._map.get('long') == 2
+    clock.now += 2
+    assert loaded._map.get('long') is None
@@ -0,0 +1,101 @@
+from hash_map_bounded import (BoundedHashMap, LFUPolicy, LRUPolicy,
+                              TinyLFUPolicy)
+from hash_map_sc import HashMap
+
+
+def node_of(map: BoundedHashMap, key: str):
+    return map._find_node(key, map._hash_function(key))
+
+
+def test_lru_evicts_least_recently_used():
+    map = BoundedHashMap(max_entries=3, policy=LRUPolicy())
+    for key in ('a', 'b', 'c'):
+        map.put(key, key)
+    map.get('a')
+    map.put('d', 'd')
+    assert not map.contains_key('b')
+    assert all(map.contains_key(key) for key in ('a', 'c', 'd'))
+    assert map.get_evictions() == 1
+
+
+def test_lfu_evicts_least_frequently_used():
+    map = BoundedHashMap(max_entries=3, policy=LFUPolicy())
+    for key in ('a', 'b', 'c'):
+        map.put(key, key)
+    map.get('a')
+    map.get('a')
+    map.get('c')
+    map.put('d', 'd')
+    assert not map.contains_key('b')
+    assert all(map.contains_key(key) for key in ('a', 'c', 'd'))
+
+
+def test_put_many_never_grows_the_table():
+    map = BoundedHashMap(max_entries=10)
+    capacity = map.get_capacity()
+    map.put_many(('k' + str(index), index) for index in range(1000))
+    assert map.get_capacity() == capacity
+    assert map.get_size() == 10
+    # The newest entries survive LRU eviction
+    assert map.get('k999') == 999
+
+
+def test_update_with_counts_one_use():
+    map = BoundedHashMap(max_entries=10, policy=LFUPolicy())
+    map.put('a', 0)
+    assert node_of(map, 'a').frequency == 1
+    assert map.update_with('a', lambda count: count + 1, 0) == 1
+    assert node_of(map, 'a').frequency == 2
+
+
+def test_update_with_records_key_once_in_tinylfu_sketch():
+    policy = TinyLFUPolicy()
+    map = BoundedHashMap(max_entries=10, policy=policy)
+    map.put('a', 0)
+    before = policy._sketch.estimate('a')
+    map.update_with('a', lambda count: count + 1, 0)
+    assert policy._sketch.estimate('a') == before + 1
+
+
+def test_max_bytes_evicts_to_fit():
+    map = BoundedHashMap(max_bytes=200, size_of=lambda item: 50)
+    for key in ('a', 'b', 'c'):
+        map.put(key, key)
+    assert map.get_size() == 2
+    assert map.get_bytes() == 200
+
+
+def test_tinylfu_rejects_one_off_keys():
+    map = BoundedHashMap(max_entries=2, policy=TinyLFUPolicy())
+    map.put('a', 1)
+    map.put('b', 2)
+    for _ in range(5):
+        map.get('a')
+        map.get('b')
+    # A key seen once is less popular than either cached key
+    map.put('once', 3)
+    assert not map.contains_key('once')
+    assert map.contains_key('a') and map.contains_key('b')
+
+
+def test_counts_hits_and_misses():
+    map = BoundedHashMap(max_entries=5)
+    map.put('a', 1)
+    map.get('a')
+    map.get('a')
+    map.get('missing')
+    assert (map.get_hits(), map.get_misses()) == (2, 1)
+
+
+def test_intersect_keys_keeps_bytes_and_policy_in_step():
+    map = BoundedHashMap(max_entries=100, size_of=lambda item: 1)
+    for index in range(50):
+        map.put('k' + str(index), index)
+    other = HashMap(11)
+    for index in range(45, 60):
+        other.put('k' + str(index), index)
+    map.intersect_keys(other)
+    assert map.get_size() == 5 and map.get_bytes() == 10
+    for index in range(100):
+        map.put('n' + str(index), index)
+    assert map.get_size() == 100 and map.get_bytes() == 200
@@ -0,0 +1,69 @@
+from threading import Thread
+
+from hash_map_concurrent import ConcurrentHashMap
+
+
+def test_contains_key_counts_keys_stored_with_none():
+    map = ConcurrentHashMap(segments=4)
+    map.put('none', None)
+    map.put('zero', 0)
+    assert map.contains_key('none')
+    assert map.contains_key('zero')
+    assert not map.contains_key('missing')
+
+
+def test_contains_key_during_write_takes_locked_path():
+    map = ConcurrentHashMap(segments=4)
+    map.put('none', None)
+    index = map._segment_index('none')
+    # An odd version means a write is in progress, so the read must not
+    # trust the lock-free lookup
+    map._versions[index] += 1
+    assert map.contains_key('none')
+    assert not map.contains_key('missing')
+
+
+def test_threaded_writers_and_readers():
+    map = ConcurrentHashMap(segments=4)
+    errors = []
+
+    def write(start):
+        for index in range(start, start + 2000):
+            map.put('k' + str(index), index)
+        for index in range(start, start + 2000, 2):
+            map.remove('k' + str(index))
+
+    def read():
+        for index in range(8000):
+            value = map.get('k' + str(index))
+            if value is not None and value != index:
+                errors.append((index, value))
+
+    threads = [Thread(target=write, args=(start,))
+               for start in range(0, 8000, 2000)]
+    threads += [Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert map.get_size() == 4000
+    assert all(map.get('k' + str(index)) == index
+               for index in range(1, 8000, 2))
+
+
+def test_read_retries_under_lock_when_a_write_lands():
+    map = ConcurrentHashMap(segments=1)
+    map.put('a', 1)
+    calls = []
+
+    def read(segment, key, hash):
+        calls.append(key)
+        if len(calls) == 1:
+            # A write finishing mid-read changes the version
+            map._versions[0] += 2
+            return 'torn'
+        return segment._get_hashed(key, hash)
+
+    assert map._read(0, 'a', read) == 1
+    assert len(calls) == 2
@@ -0,0 +1,69 @@
+from collections import Counter
+from random import Random
+
+from a6_include import DynamicArray
+from hash_map_frequency import (CountMinSketch, FrequencyCounter,
+                                SpaceSavingCounter)
+from hash_map_sc import find_mode
+
+
+def zipf_stream(count: int, seed: int = 7) -> list:
+    random = Random(seed)
+    return ['w' + str(int(random.paretovariate(1.2))) for _ in range(count)]
+
+
+def test_frequency_counter_matches_counter():
+    stream = zipf_stream(20000)
+    expected = Counter(stream)
+    counter = FrequencyCounter(chunk_size=1000)
+    counter.update(iter(stream))
+    assert counter.get_size() == len(expected)
+    assert all(counter.get(key) == count for key, count in expected.items())
+    assert counter.get('never seen') == 0
+
+    modes, count = counter.modes()
+    best = max(expected.values())
+    assert count == best
+    assert sorted(modes[index] for index in range(modes.length())) == \
+        sorted(key for key, seen in expected.items() if seen == best)
+    top = counter.top(3)
+    assert [top[index][1] for index in range(3)] == \
+        [seen for _, seen in expected.most_common(3)]
+
+
+def test_space_saving_keeps_heavy_hitters_within_bounds():
+    stream = zipf_stream(20000)
+    expected = Counter(stream)
+    counter = SpaceSavingCounter(50)
+    counter.update(stream)
+    assert counter.get_size() <= 50
+    for key, count in expected.items():
+        if count > len(stream) / 50:
+            # Guaranteed kept, and never underestimated
+            assert counter.get(key) >= count
+    top = counter.top(5)
+    for index in range(top.length()):
+        key, estimate, error = top[index]
+        assert estimate - error <= expected[key] <= estimate
+
+
+def test_count_min_never_underestimates():
+    stream = zipf_stream(20000)
+    expected = Counter(stream)
+    sketch = CountMinSketch(256)
+    sketch.update(stream)
+    assert all(sketch.estimate(key) >= count
+               for key, count in expected.items())
+    before = sketch.estimate('w1')
+    sketch.halve()
+    assert sketch.estimate('w1') == before // 2
+
+
+def test_find_mode():
+    array = DynamicArray()
+    for key in ['a', 'b', 'a', 'c', 'b', 'a', 'b']:
+        array.append(key)
+    modes, count = find_mode(array)
+    assert sorted(modes[index] for index in range(modes.length())) == \
+        ['a', 'b']
+    assert count == 3
@@ -0,0 +1,54 @@
+import pytest
+
+from a6_include import hash_function_2
+from hash_map_mmap import SLOT_WORDS, MappedHashMap
+
+
+def constant_hash(key: str) -> int:
+    return 0
+
+
+def test_resize_below_half_load_grows_instead_of_hanging(tmp_path):
+    with MappedHashMap(str(tmp_path / 'map'), constant_hash, 50) as map:
+        for index in range(6):
+            map.put('k' + str(index), index)
+        map.resize_table(7)
+        assert map.table_load() <= 0.5
+        assert [map.get('k' + str(index)) for index in range(6)] == \
+            list(range(6))
+
+
+def test_free_slot_probe_is_bounded(tmp_path):
+    with MappedHashMap(str(tmp_path / 'map'), constant_hash, 7) as map:
+        for index in range(map.get_capacity()):
+            map._slots[index * SLOT_WORDS] = 1
+        with pytest.raises(RuntimeError):
+            map._free_slot(1)
+
+
+def test_entries_persist_across_reopening(tmp_path):
+    path = str(tmp_path / 'map')
+    with MappedHashMap(path, capacity=5) as map:
+        for index in range(300):
+            map.put('key number ' + str(index), index)
+        map.remove('key number 7')
+        map.put('key number 8', -8)
+    with MappedHashMap(path) as map:
+        assert map.get_size() == 299
+        assert map.get('key number 7') is None
+        assert map.get('key number 8') == -8
+        assert map.get('key number 299') == 299
+
+
+def test_readonly_and_mismatched_opens(tmp_path):
+    path = str(tmp_path / 'map')
+    with MappedHashMap(path) as map:
+        map.put('a', 1)
+    with MappedHashMap(path, readonly=True) as map:
+        assert map.get('a') == 1
+        with pytest.raises(PermissionError):
+            map.put('b', 2)
+    with pytest.raises(ValueError):
+        MappedHashMap(path, hash_function_2)
+    with pytest.raises(FileNotFoundError):
+        MappedHashMap(str(tmp_path / 'missing'), readonly=True)
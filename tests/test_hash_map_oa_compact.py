@@ -0,0 +1,93 @@
+from random import Random
+
+import pytest
+
+from a6_include import bytes_hash, int_hash, word_hash
+from hash_map_oa_compact import HashMap
+
+
+def test_resize_below_half_load_grows_instead_of_hanging():
+    map = HashMap(50, lambda key: 0)
+    for index in range(6):
+        map.put('k' + str(index), index)
+    map.resize_table(7)
+    assert map.table_load() <= 0.5
+    assert [map.get('k' + str(index)) for index in range(6)] == list(range(6))
+
+
+def test_churn_reclaims_tombstones():
+    map = HashMap(11, word_hash)
+    for round in range(50):
+        for index in range(100):
+            map.put('k' + str(round * 100 + index), index)
+        for index in range(100):
+            map.remove('k' + str(round * 100 + index))
+    assert map.get_size() == 0
+    assert map._tombstones <= map.get_capacity() // 2
+    assert map.get('missing') is None
+
+
+def test_int_key_overflow_leaves_counts_unchanged():
+    map = HashMap(11, lambda key: 0, key_type=int)
+    map.put(1, 'one')
+    map.remove(1)
+    assert map._tombstones == 1
+    with pytest.raises(OverflowError):
+        map.put(1 << 70, 'too big')
+    assert map._tombstones == 1
+    assert map.get_size() == 0
+    map.put(2, 'two')
+    assert map._tombstones == 0
+    assert map.get(2) == 'two'
+
+
+def test_matches_dict_under_random_operations():
+    map = HashMap(5, word_hash)
+    expected = {}
+    random = Random(1)
+    for _ in range(3000):
+        key = 'k' + str(random.randrange(300))
+        if random.random() < 0.6:
+            value = random.random()
+            map.put(key, value)
+            expected[key] = value
+        else:
+            map.remove(key)
+            expected.pop(key, None)
+        assert map.get_size() == len(expected)
+    assert map.table_load() <= 0.5
+    pairs = map.get_keys_and_values()
+    assert dict(pairs[index] for index in range(pairs.length())) == expected
+    assert all(map.contains_key(key) for key in expected)
+
+
+def test_clear_keeps_capacity():
+    map = HashMap(11, word_hash)
+    for index in range(20):
+        map.put('k' + str(index), index)
+    capacity = map.get_capacity()
+    map.clear()
+    assert map.get_size() == 0
+    assert map.get_capacity() == capacity
+    assert map.get('k1') is None
+    assert map.empty_buckets() == capacity
+
+
+def test_int_keys_are_stored_unboxed():
+    map = HashMap(11, int_hash, key_type=int)
+    keys = [-5, 0, 1 << 40] + list(range(100, 130))
+    for key in keys:
+        map.put(key, str(key))
+    assert all(map.get(key) == str(key) for key in keys)
+    map.remove(0)
+    assert not map.contains_key(0) and map.get_size() == len(keys) - 1
+    assert map._keys.typecode == 'q'
+
+
+def test_bytes_keys_are_stored_as_bytes_copies():
+    map = HashMap(11, bytes_hash, key_type=bytes)
+    key = bytearray(b'key')
+    map.put(key, 1)
+    key[0] = ord('x')
+    assert map.get(b'key') == 1 and map.get(memoryview(b'key')) == 1
+    assert type(map.get_keys_and_values()[0][0]) is bytes
@@ -0,0 +1,46 @@
+from random import Random
+
+from a6_include import word_hash
+from hash_map_rh import EMPTY, HashMap
+
+
+def test_matches_dict_under_random_operations():
+    map = HashMap(5, word_hash)
+    expected = {}
+    random = Random(3)
+    for _ in range(3000):
+        key = 'k' + str(random.randrange(300))
+        if random.random() < 0.6:
+            value = random.random()
+            map.put(key, value)
+            expected[key] = value
+        else:
+            map.remove(key)
+            expected.pop(key, None)
+        assert map.get_size() == len(expected)
+    assert map.table_load() <= 0.85
+    assert all(map.get(key) == value for key, value in expected.items())
+    assert sorted(entry.key for entry in map) == sorted(expected)
+
+
+def test_remove_shifts_back_without_tombstones():
+    map = HashMap(11, lambda key: 0)
+    for key in ('a', 'b', 'c'):
+        map.put(key, key)
+    map.remove('a')
+    # Backward shift moves b and c into slots 0 and 1
+    assert [map._keys[index] for index in range(3)] == ['b', 'c', None]
+    assert map._hashes[2] == EMPTY
+    assert map.get('c') == 'c' and not map.contains_key('a')
+
+
+def test_probe_distances_stay_ordered():
+    map = HashMap(101, word_hash)
+    for index in range(80):
+        map.put('k' + str(index), index)
+    # Robin Hood keeps each cluster sorted so no entry sits more than one
+    # step further from home than the entry before it
+    for index in range(map.get_capacity()):
+        following = (index + 1) % map.get_capacity()
+        if map._hashes[index] != EMPTY and map._hashes[following] != EMPTY:
+            assert map._distance(following) <= map._distance(index) + 1
@@ -0,0 +1,374 @@
+import pickle
+from random import Random
+
+import pytest
+
+from a6_include import (DynamicArray, PowerOfTwoCapacity, bytes_hash,
+                        fnv1a_hash, word_hash)
+import hash_map_oa
+from hash_map_sc import (EMPTY_BUCKET, HashMap, find_mode,
+                         parallel_find_mode)
+
+
+def test_update_from_dict_stores_its_items():
+    map = HashMap(11)
+    map.put('ab', 0)
+    map.update({'ab': 1, 'cd': 2})
+    assert map.get_size() == 2
+    assert map.get('ab') == 1
+    assert map.get('cd') == 2
+    assert not map.contains_key('a')
+
+
+def test_update_from_pairs():
+    map = HashMap(11)
+    map.update([('ab', 1), ('cd', 2)])
+    assert map.get('ab') == 1
+    assert map.get('cd') == 2
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def expiring_map(clock: FakeClock) -> HashMap:
+    map = HashMap(11, word_hash)
+    map._clock = clock
+    map.put('short', 1, ttl=5)
+    map.put('long', 2, ttl=50)
+    map.put('forever', 3)
+    return map
+
+
+def test_iteration_leaves_out_expired_entries():
+    clock = FakeClock()
+    map = expiring_map(clock)
+    clock.now += 10
+    assert sorted(map.keys()) == ['forever', 'long']
+    assert sorted(map.items()) == [('forever', 3), ('long', 2)]
+    pairs = map.get_keys_and_values()
+    assert sorted(pairs[index] for index in range(pairs.length())) == \
+        [('forever', 3), ('long', 2)]
+    assert map.get('short') is None
+
+
+def test_save_drops_expired_entries_and_keeps_remaining_ttl(tmp_path):
+    clock = FakeClock()
+    map = expiring_map(clock)
+    clock.now += 10
+    map.save(str(tmp_path / 'snap'))
+
+    loaded = HashMap(11, word_hash)
+    loadClock = FakeClock()
+    loadClock.now = 7.0
+    loaded._clock = loadClock
+    loaded.load(str(tmp_path / 'snap'))
+    assert loaded.get_size() == 2
+    assert not loaded.contains_key('short')
+    assert loaded.get('long') == 2
+    # 'long' had 40 seconds left when saved
+    loadClock.now += 39
+    assert loaded.get('long') == 2
+    loadClock.now += 2
+    assert loaded.get('long') is None
+    assert loaded.get('forever') == 3
+
+
+class CountingHash:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, key: str) -> int:
+        self.calls += 1
+        return word_hash(key)
+
+
+def test_resize_reuses_cached_hashes():
+    function = CountingHash()
+    map = HashMap(11, function)
+    for index in range(100):
+        map.put('k' + str(index), index)
+    calls = function.calls
+    map.resize_table(1000)
+    assert function.calls == calls
+    assert all(map.get('k' + str(index)) == index for index in range(100))
+    node = map._find_node('k5', word_hash('k5'))
+    assert node.hash == word_hash('k5')
+
+
+def test_batch_operations():
+    map = HashMap(11, word_hash)
+    resizes = []
+    resize = map.resize_table
+    map.resize_table = lambda capacity: (resizes.append(capacity),
+                                         resize(capacity))
+    map.put_many(('k' + str(index), index) for index in range(500))
+    assert len(resizes) == 1
+    assert map.get_size() == 500
+    values = map.get_many(['k1', 'missing', 'k499'])
+    assert [values[index] for index in range(values.length())] == \
+        [1, None, 499]
+    map.remove_many('k' + str(index) for index in range(0, 500, 2))
+    assert map.get_size() == 250
+    assert map.get('k2') is None and map.get('k3') == 3
+
+
+def test_incremental_rehash_keeps_every_entry_visible():
+    map = HashMap(3, word_hash, rehash_step=1)
+    expected = {}
+    random = Random(5)
+    sawRehash = False
+    for _ in range(4000):
+        key = 'k' + str(random.randrange(400))
+        if random.random() < 0.7:
+            value = random.random()
+            map.put(key, value)
+            expected[key] = value
+        else:
+            map.remove(key)
+            expected.pop(key, None)
+        sawRehash = sawRehash or map._old_buckets is not None
+        assert map.get_size() == len(expected)
+    assert sawRehash
+    assert all(map.get(key) == value for key, value in expected.items())
+    map._finish_rehash()
+    assert map._old_buckets is None
+    assert sorted(map.keys()) == sorted(expected)
+
+
+def test_power_of_two_capacity_policy():
+    map = HashMap(10, word_hash, capacity_policy=PowerOfTwoCapacity())
+    for index in range(1000):
+        map.put('k' + str(index), index)
+    capacity = map.get_capacity()
+    assert capacity & (capacity - 1) == 0
+    assert all(map.get('k' + str(index)) == index for index in range(1000))
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_snapshot_round_trip(tmp_path, compress):
+    path = str(tmp_path / 'snap')
+    map = HashMap(11, word_hash)
+    for index in range(5000):
+        map.put('k' + str(index), [index])
+    map.save(path, compress)
+
+    same = HashMap(11, word_hash)
+    same.load(path)
+    other = HashMap(11, fnv1a_hash)
+    other.load(path)
+    for loaded in (same, other):
+        assert loaded.get_size() == 5000
+        assert all(loaded.get('k' + str(index)) == [index]
+                   for index in range(5000))
+    # Hashes saved with word_hash are recomputed for the other function
+    assert all(entry.hash == fnv1a_hash(entry.key)
+               for entry in other._live_entries())
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other'
+    path.write_bytes(b'not a snapshot')
+    with pytest.raises(ValueError):
+        HashMap(11, word_hash).load(str(path))
+
+
+def test_iterators_walk_in_place_and_detect_changes():
+    map = HashMap(11, word_hash)
+    for index in range(50):
+        map.put('k' + str(index), index)
+    keys, values = map.keys(), map.values()
+    assert sorted(zip(keys, values)) == sorted(map.items())
+    assert sorted(map.values()) == list(range(50))
+
+    items = map.items()
+    next(items)
+    map.put('new', 1)
+    with pytest.raises(RuntimeError):
+        next(items)
+
+    values = map.values()
+    next(values)
+    map.put('new', 2)
+    # Updating a value in place doesn't add or remove entries
+    assert len(list(values)) == 50
+
+
+def test_parallel_find_mode_matches_find_mode():
+    random = Random(9)
+    array = DynamicArray()
+    for _ in range(3000):
+        array.append('w' + str(random.randrange(40)))
+    modes, count = find_mode(array)
+    parallelModes, parallelCount = parallel_find_mode(array, processes=2,
+                                                      chunk_size=500)
+    assert parallelCount == count
+    assert sorted(parallelModes[index]
+                  for index in range(parallelModes.length())) == \
+        sorted(modes[index] for index in range(modes.length()))
+
+
+def test_merge_combines_counts_and_maps_pickle():
+    first, second = HashMap(11, word_hash), HashMap(11, word_hash)
+    for key in ('a', 'b'):
+        first.put(key, 1)
+    for key in ('b', 'c'):
+        second.put(key, 2)
+    first.merge(second, lambda mine, theirs: mine + theirs)
+    assert sorted(first.items()) == [('a', 1), ('b', 3), ('c', 2)]
+
+    copy = pickle.loads(pickle.dumps(first))
+    assert sorted(copy.items()) == [('a', 1), ('b', 3), ('c', 2)]
+    copy.put('d', 4)
+    assert copy.get('d') == 4 and first.get('d') is None
+
+
+def test_expired_entries_are_removed_lazily_and_by_sweep():
+    clock = FakeClock()
+    map = expiring_map(clock)
+    map.put('cleared', 4, ttl=5)
+    # Overwriting without a TTL makes the entry permanent again
+    map.put('cleared', 4)
+    clock.now += 10
+    assert map.get_size() == 4
+    assert not map.contains_key('short')
+    assert map.get_size() == 3
+    map.put('other', 5, ttl=5)
+    clock.now += 100
+    assert map.sweep() == 2
+    assert sorted(map.keys()) == ['cleared', 'forever']
+
+
+def test_single_lookup_helpers():
+    map = HashMap(11, word_hash)
+    assert map.setdefault('a', []) == []
+    map.setdefault('a', ['ignored']).append(1)
+    assert map.get('a') == [1]
+
+    calls = []
+    factory = lambda: calls.append(1) or 'made'
+    assert map.get_or_insert('b', factory) == 'made'
+    assert map.get_or_insert('b', factory) == 'made'
+    assert len(calls) == 1
+
+    assert map.update_with('count', lambda count: count + 1, 0) == 1
+    assert map.update_with('count', lambda count: count + 1, 0) == 2
+
+    assert map.pop('b') == 'made'
+    assert map.pop('b', 'gone') == 'gone'
+    map.put('falsy', 0)
+    assert map.contains_key('falsy')
+    assert map.get_size() == 3
+
+
+def test_update_with_hashes_once():
+    function = CountingHash()
+    map = HashMap(11, function)
+    map.update_with('a', lambda count: count + 1, 0)
+    map.update_with('a', lambda count: count + 1, 0)
+    assert function.calls == 2
+    assert map.get('a') == 2
+
+
+def test_stats_describe_chains_and_operations():
+    map = HashMap(11, word_hash)
+    assert map.stats()['operations'] is None
+    events = []
+    map.enable_stats(lambda event, value: events.append(event))
+    for index in range(30):
+        map.put('k' + str(index), index)
+    map.get('k1')
+    stats = map.stats()
+    chains = stats['chain_lengths']
+    assert sum(chains.values()) == stats['capacity']
+    assert sum(length * count for length, count in chains.items()) == 30
+    assert chains.get(0, 0) == stats['empty_buckets']
+    operations = stats['operations']
+    assert (operations['puts'], operations['gets']) == (30, 1)
+    assert operations['resizes'] == events.count('resize') > 0
+    assert events.count('put') == 30 and events.count('get') == 1
+
+
+def test_empty_buckets_share_one_list_until_written():
+    map = HashMap(11)
+    assert all(bucket is EMPTY_BUCKET for bucket in map._buckets)
+    map.put('key', 1)
+    assert EMPTY_BUCKET.length() == 0
+    assert sum(bucket is not EMPTY_BUCKET for bucket in map._buckets) == 1
+    assert map.empty_buckets() == map.get_capacity() - 1
+
+
+def test_buffer_keys_are_stored_as_bytes_copies():
+    map = HashMap(11, bytes_hash)
+    key = bytearray(b'key')
+    map.put(key, 1)
+    key[0] = ord('x')
+    assert map.get(b'key') == 1 and map.get(memoryview(b'key')) == 1
+    assert not map.contains_key(key)
+    assert type(map.get_keys_and_values()[0][0]) is bytes
+
+
+def set_operation_maps(other_kind: str, mine: range, theirs: range):
+    first = HashMap(11, word_hash)
+    first.put_many(('k' + str(index), index) for index in mine)
+    if other_kind == 'oa':
+        second = hash_map_oa.HashMap(11, word_hash)
+    elif other_kind == 'sc other hash':
+        second = HashMap(11, fnv1a_hash)
+    else:
+        second = HashMap(11, word_hash)
+    second.put_many(('k' + str(index), -index) for index in theirs)
+    if other_kind == 'sc aligned':
+        second.resize_table(first.get_capacity())
+        assert first._aligned(second)
+    return first, second
+
+
+OTHER_KINDS = ['sc aligned', 'sc', 'sc other hash', 'oa']
+SIZES = [(range(0, 300), range(200, 260)), (range(0, 60), range(30, 400))]
+
+
+@pytest.mark.parametrize('other_kind', OTHER_KINDS)
+@pytest.mark.parametrize('mine, theirs', SIZES)
+def test_intersect_keys_and_difference_match_sets(other_kind, mine, theirs):
+    first, second = set_operation_maps(other_kind, mine, theirs)
+    first.intersect_keys(second)
+    assert sorted(first.items()) == \
+        sorted(('k' + str(index), index) for index in set(mine) & set(theirs))
+    assert first.get_size() == len(set(mine) & set(theirs))
+
+    first, second = set_operation_maps(other_kind, mine, theirs)
+    first.difference(second)
+    assert sorted(first.items()) == \
+        sorted(('k' + str(index), index) for index in set(mine) - set(theirs))
+    first.difference(first)
+    assert first.get_size() == 0
+
+
+@pytest.mark.parametrize('other_kind', OTHER_KINDS)
+def test_merge_and_update_across_map_kinds(other_kind):
+    first, second = set_operation_maps(other_kind, range(0, 20), range(10, 30))
+    first.merge(second, lambda mine, theirs: (mine, theirs))
+    assert first.get('k15') == (15, -15)
+    assert first.get('k5') == 5 and first.get('k25') == -25
+    first, second = set_operation_maps(other_kind, range(0, 20), range(10, 30))
+    first.update(second)
+    assert first.get('k15') == -15 and first.get_size() == 30
+
+
+def test_set_operations_ignore_expired_entries_of_other():
+    clock = FakeClock()
+    first = HashMap(11, word_hash)
+    first.put_many([('short', 1), ('forever', 2)])
+    other = expiring_map(clock)
+    other.resize_table(first.get_capacity())
+    clock.now += 10
+    first.difference(other)
+    assert sorted(first.keys()) == ['short']
+    first.put('forever', 2)
+    first.intersect_keys(other)
+    assert sorted(first.keys()) == ['forever']
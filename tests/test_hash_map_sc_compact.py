@@ -0,0 +1,65 @@
+from random import Random
+
+from a6_include import word_hash
+from hash_map_sc_compact import NO_ENTRY, HashMap
+
+
+def test_matches_dict_under_random_operations():
+    map = HashMap(5, word_hash)
+    expected = {}
+    random = Random(4)
+    for _ in range(3000):
+        key = 'k' + str(random.randrange(300))
+        if random.random() < 0.6:
+            value = random.random()
+            map.put(key, value)
+            expected[key] = value
+        else:
+            map.remove(key)
+            expected.pop(key, None)
+        assert map.get_size() == len(expected)
+    assert all(map.get(key) == value for key, value in expected.items())
+    assert dict(map.items()) == expected
+
+
+def test_removed_entries_are_reused():
+    map = HashMap(11, word_hash)
+    for index in range(5):
+        map.put('k' + str(index), index)
+    slots = len(map._keys)
+    map.remove('k2')
+    assert map._free != NO_ENTRY
+    map.put('new', 1)
+    assert map._free == NO_ENTRY
+    assert len(map._keys) == slots
+
+
+def test_resize_makes_every_chain_contiguous():
+    map = HashMap(3, lambda key: len(key))
+    for key in ('a', 'bb', 'c', 'dd', 'e', 'fff'):
+        map.put(key, key)
+    map.resize_table(7)
+    for bucket in range(map.get_capacity()):
+        index = map._heads[bucket]
+        while index != NO_ENTRY and map._links[index] != NO_ENTRY:
+            assert map._links[index] == index + 1
+            index = map._links[index]
+    assert sorted(map.items()) == sorted((key, key) for key in
+                                         ('a', 'bb', 'c', 'dd', 'e', 'fff'))
+
+
+def test_int_keys_default_to_int_hash():
+    map = HashMap(11, key_type=int)
+    for key in (-5, 0, 1 << 40):
+        map.put(key, str(key))
+    assert map.get(1 << 40) == str(1 << 40) and map.contains_key(-5)
+    assert map._keys.typecode == 'q'
+
+
+def test_bytes_keys_default_to_bytes_hash():
+    map = HashMap(11, key_type=bytes)
+    key = bytearray(b'key')
+    map.put(key, 1)
+    key[0] = ord('x')
+    assert map.get(b'key') == 1 and map.get(memoryview(b'key')) == 1
+    assert type(map.get_keys_and_values()[0][0]) is bytes
@@ -0,0 +1,53 @@
+from hash_map_sharded import ShardedHashMap
+
+
+def test_find_mode_of_empty_map_matches_sc():
+    with ShardedHashMap(shards=2) as map:
+        modes, count = map.find_mode()
+        assert modes.length() == 0
+        assert count == 1
+
+
+def test_find_mode_across_shards():
+    with ShardedHashMap(shards=2) as map:
+        map.count_many(['a', 'b', 'a', 'c', 'b', 'a', 'b'])
+        modes, count = map.find_mode()
+        assert sorted(modes[index] for index in range(modes.length())) == \
+            ['a', 'b']
+        assert count == 3
+
+
+def test_failed_batch_leaves_every_shard_in_sync():
+    with ShardedHashMap(shards=4) as map:
+        map.put('x', 'stored')
+        # hash_function_1 rejects int keys, so the shards holding them fail
+        # while the others succeed
+        pairs = [(index, index) for index in range(50)] + \
+            [('k' + str(index), index) for index in range(50)]
+        try:
+            map.put_many(pairs)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError('put_many of int keys should fail')
+        assert map.get('x') == 'stored'
+        assert map.get('k7') in (7, None)
+        assert map.get_size() >= 1
+
+
+def test_single_and_batch_operations():
+    with ShardedHashMap(shards=3, map_type='oa') as map:
+        map.put('a', 1)
+        map.put_many(('k' + str(index), index) for index in range(100))
+        assert map.get_size() == 101
+        assert map.get('a') == 1 and map.contains_key('k50')
+        values = map.get_many(['k1', 'missing', 'k99'])
+        assert [values[index] for index in range(values.length())] == \
+            [1, None, 99]
+        map.remove('a')
+        map.remove_many('k' + str(index) for index in range(50))
+        pairs = map.get_keys_and_values()
+        assert sorted(pairs[index] for index in range(pairs.length())) == \
+            sorted(('k' + str(index), index) for index in range(50, 100))
+        map.clear()
+        assert map.get_size() == 0